@@ -0,0 +1,203 @@
+"""Vectorized Pulse scoring for many portfolios at once.
+
+Mirrors the scalar functions in :mod:`app.api.scoring` on a dense
+portfolios x tickers weight matrix so advisor books with thousands of
+portfolios are scored with a handful of NumPy operations.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import chain
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from ..config import ASSET_CLASS_MAP, EXPECTED_RETURN_BY_ASSET
+from ..services.model_registry import model_registry
+from ..services.ticker_metrics import TickerMetricsTable, ticker_metrics
+from ..utils.math_ops import round_scores
+from .scoring import (
+    BOND_TICKERS,
+    COMMODITY_TICKERS,
+    GOLD_TICKERS,
+    MAX_DIVERSIFICATION_SCORE,
+    MAX_RESILIENCE_SCORE,
+    MAX_RETURN_EFFICIENCY_SCORE,
+    MAX_RISK_BALANCE_SCORE,
+)
+
+ASSET_CLASSES: List[str] = list(EXPECTED_RETURN_BY_ASSET)
+EQUITY_CLASSES = ("Equities", "International Equities")
+DEFENSIVE_CLASSES = ("Long Bonds", "Intermediate Bonds", "Core Bonds", "Inflation Bonds")
+DIVERSIFIER_CLASSES = ("Gold", "Commodities", "Real Estate")
+
+
+class TickerIndex:
+    """Interns ticker symbols to dense column indices."""
+
+    def __init__(self) -> None:
+        self.columns: Dict[str, int] = {}
+        self.tickers: List[str] = []
+
+    def intern(self, ticker: str) -> int:
+        column = self.columns.get(ticker)
+        if column is None:
+            column = self.columns[ticker] = len(self.tickers)
+            self.tickers.append(ticker)
+        return column
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+
+@dataclass(frozen=True)
+class BatchScores:
+    """Score components per portfolio, one row per input portfolio."""
+
+    distribution: np.ndarray
+    diversification: np.ndarray
+    resilience: np.ndarray
+    return_efficiency: np.ndarray
+    expected_return: np.ndarray
+    risk_balance: np.ndarray
+    total: np.ndarray
+    tracking: np.ndarray
+    model_keys: List[str]
+
+    def grades(self) -> List[str]:
+        return ["🟢" if total >= 80 else ("🟡" if total >= 60 else "🔴") for total in self.total.tolist()]
+
+
+def build_weight_matrix(
+    portfolios: Sequence[Dict[str, float]],
+    index: TickerIndex | None = None,
+) -> tuple[np.ndarray, TickerIndex]:
+    """Return a dense ``(portfolios, tickers)`` weight matrix and its ticker index.
+
+    Model tickers are interned first so tracking error can slice their columns.
+    Tickers are used as given, like the scalar scorers; upload normalization
+    already upper-cases them.
+    """
+    index = index or TickerIndex()
+    for ticker in model_registry.tickers:
+        index.intern(ticker)
+    tickers = list(chain.from_iterable(portfolios))
+    for ticker in dict.fromkeys(tickers):
+        index.intern(ticker)
+    cols = list(map(index.columns.__getitem__, tickers))
+    values = np.fromiter(chain.from_iterable(weights.values() for weights in portfolios), dtype=float, count=len(cols))
+    rows = np.repeat(np.arange(len(portfolios)), [len(weights) for weights in portfolios])
+    # Dict keys are unique, so every (row, column) pair is written exactly once.
+    matrix = np.zeros((len(portfolios), len(index)))
+    matrix[rows, np.asarray(cols, dtype=np.intp)] = values
+    return matrix, index
+
+
+def _class_matrix(index: TickerIndex) -> np.ndarray:
+    onehot = np.zeros((len(index), len(ASSET_CLASSES)))
+    class_column = {asset_class: i for i, asset_class in enumerate(ASSET_CLASSES)}
+    for column, ticker in enumerate(index.tickers):
+        onehot[column, class_column[ASSET_CLASS_MAP.get(ticker.upper(), "Other")]] = 1.0
+    return onehot
+
+
+def _ticker_mask(index: TickerIndex, tickers: set) -> np.ndarray:
+    return np.array([ticker in tickers for ticker in index.tickers], dtype=float)
+
+
+def _class_sum(distribution: np.ndarray, classes: Sequence[str]) -> np.ndarray:
+    return distribution[:, [ASSET_CLASSES.index(asset_class) for asset_class in classes]].sum(axis=1)
+
+
+def _metric_ratio(reference: float, values: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(values <= 0, 1.0, np.clip(reference / values, 0.0, 1.0))
+
+
+def score_weight_matrix(
+    weights: np.ndarray,
+    index: TickerIndex,
+    table: TickerMetricsTable = ticker_metrics,
+) -> BatchScores:
+    """Score every row of ``weights`` exactly like :func:`app.api.scoring.pulse_score`."""
+    distribution = weights @ _class_matrix(index)
+
+    # Rows whose positive holdings all have historical metrics use them, as
+    # the scalar scorers do; the rest fall back to the asset-mix heuristics.
+    metrics = table.columns(index.tickers)
+    known = ~np.isnan(metrics).any(axis=1)
+    covered = ~((weights > 0) & ~known).any(axis=1) & (weights.sum(axis=1) > 0)
+    profile = (weights @ np.where(known[:, None], metrics, 0.0)) / np.where(covered, weights.sum(axis=1), 1.0)[:, None]
+    reference = table.model_reference()
+
+    evenness = np.minimum(distribution, 0.2).sum(axis=1)
+    diversification = round_scores(np.minimum(evenness, 1.0) * MAX_DIVERSIFICATION_SCORE, 2)
+
+    bonds = weights @ _ticker_mask(index, BOND_TICKERS)
+    gold = weights @ _ticker_mask(index, GOLD_TICKERS)
+    commodities = weights @ _ticker_mask(index, COMMODITY_TICKERS)
+    buffer = bonds + 0.5 * (gold + commodities)
+    resilience = round_scores(np.clip(buffer / 0.6, 0.0, 1.0) * MAX_RESILIENCE_SCORE, 2)
+    if reference is not None and covered.any():
+        drawdown = _metric_ratio(-reference[1], -profile[:, 1])
+        volatility = _metric_ratio(reference[2], profile[:, 2])
+        measured = round_scores((0.5 * drawdown + 0.5 * volatility) * MAX_RESILIENCE_SCORE, 2)
+        resilience = np.where(covered, measured, resilience)
+
+    expected = distribution @ np.array([EXPECTED_RETURN_BY_ASSET[c] for c in ASSET_CLASSES])
+    expected = np.where(covered, profile[:, 0], expected)
+    return_efficiency = round_scores(np.clip((expected - 0.02) / 0.06, 0.0, 1.0) * MAX_RETURN_EFFICIENCY_SCORE, 2)
+
+    balance_gap = (
+        np.abs(_class_sum(distribution, EQUITY_CLASSES) - 0.45)
+        + np.abs(_class_sum(distribution, DEFENSIVE_CLASSES) - 0.35)
+        + np.abs(_class_sum(distribution, DIVERSIFIER_CLASSES) - 0.20)
+    )
+    risk_balance = round_scores(np.clip(1.0 - balance_gap, 0.0, 1.0) * MAX_RISK_BALANCE_SCORE, 2)
+
+    total = round_scores(diversification + resilience + return_efficiency + risk_balance, 2)
+
+    # L1 distance = weight held outside the model + |u - m| over the model's tickers.
+    row_totals = weights.sum(axis=1)
+    model_keys = list(model_registry.keys)
+    tracking = np.empty((len(weights), len(model_keys)))
+    for j, key in enumerate(model_keys):
+        model_weights = model_registry.weights(key)
+        columns = [index.columns[ticker] for ticker in model_weights]
+        held = weights[:, columns]
+        outside = row_totals - held.sum(axis=1)
+        inside = np.abs(held - np.array(list(model_weights.values()))).sum(axis=1)
+        tracking[:, j] = round_scores((outside + inside) / 2, 4)
+
+    return BatchScores(
+        distribution=distribution,
+        diversification=diversification,
+        resilience=resilience,
+        return_efficiency=return_efficiency,
+        expected_return=round_scores(expected, 4),
+        risk_balance=risk_balance,
+        total=total,
+        tracking=tracking,
+        model_keys=model_keys,
+    )
+
+
+def score_portfolios(portfolios: Sequence[Dict[str, float]]) -> BatchScores:
+    """Build the weight matrix for ``portfolios`` and score every row."""
+    weights, index = build_weight_matrix(portfolios)
+    return score_weight_matrix(weights, index)
+
+
+def score_weight_rows(
+    tickers: Sequence[str],
+    rows: np.ndarray,
+    table: TickerMetricsTable = ticker_metrics,
+) -> BatchScores:
+    """Score a ``(rows, len(tickers))`` weight array whose columns are ``tickers``."""
+    index = TickerIndex()
+    for ticker in model_registry.tickers:
+        index.intern(ticker)
+    columns = [index.intern(ticker) for ticker in tickers]
+    weights = np.zeros((len(rows), len(index)))
+    weights[:, columns] = rows
+    return score_weight_matrix(weights, index, table)
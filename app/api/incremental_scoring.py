@@ -0,0 +1,232 @@
+"""Holding-level edits with incremental re-scoring.
+
+:class:`HoldingsState` keeps raw position amounts together with the running
+aggregates the Pulse score and tracking errors are built from, so changing a
+few positions updates the result without walking the whole portfolio.
+"""
+from __future__ import annotations
+
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..config import ASSET_CLASS_MAP
+from ..services.model_registry import model_registry
+from ..services.ticker_metrics import METRIC_FIELDS, TickerMetricsTable, ticker_metrics
+from ..utils.math_ops import round_score
+from .scoring import (
+    BOND_TICKERS,
+    COMMODITY_TICKERS,
+    GOLD_TICKERS,
+    assemble_score,
+    resilience_from,
+    return_efficiency_from,
+)
+
+# (ticker, new amount or None, delta or None); exactly one of the two is set.
+HoldingEdit = Tuple[str, Optional[float], Optional[float]]
+
+
+class HoldingsState:
+    """Raw amounts per ticker plus running sums that make edits O(changed holdings).
+
+    Kept up to date on every edit:
+
+    * the portfolio total and per-asset-class totals (and holding counts);
+    * bond, gold and commodity totals for the heuristic resilience score;
+    * per model, the amount held outside the model's tickers. Tracking error
+      is ``(outside / total + Σ_{i∈model} |u_i / total - m_i|) / 2``; the second
+      term only visits the model's own tickers;
+    * a lazy max-heap of amounts for the concentration suggestion, ties
+      going to the earliest held ticker as in :func:`app.api.scoring.pulse_score`;
+    * ``Σ amount x metrics`` for the historical-metric scores, rebuilt only
+      when the metrics table itself changes.
+    """
+
+    def __init__(self, amounts: Dict[str, float], table: TickerMetricsTable = ticker_metrics) -> None:
+        self.amounts: Dict[str, float] = {}
+        self.total = 0.0
+        self.class_totals: Dict[str, float] = {}
+        self.class_counts: Dict[str, int] = {}
+        self.buffer_totals = {"bonds": 0.0, "gold": 0.0, "commodities": 0.0}
+        self.outside: Dict[str, float] = dict.fromkeys(model_registry.keys, 0.0)
+        # (-amount, position in ``amounts``, ticker)
+        self._heap: List[Tuple[float, int, str]] = []
+        self._positions: Dict[str, int] = {}
+        # asset class -> lazy min-heap of (position, ticker), for class order
+        self._class_heads: Dict[str, List[Tuple[int, str]]] = {}
+        self._next_position = 0
+        self._table = table
+        self._metrics_version = -1
+        self._metric_sum = np.zeros(len(METRIC_FIELDS))
+        self._unknown = 0
+        # Normalized weights last persisted, used to detect outside changes.
+        self.stored_weights: Dict[str, float] | None = None
+        self.stored_total: float | None = None
+        for ticker, amount in amounts.items():
+            self._set(ticker.upper(), amount)
+
+    @classmethod
+    def from_weights(cls, weights: Dict[str, float], total_value: float) -> "HoldingsState":
+        state = cls({ticker: weight * total_value for ticker, weight in weights.items()})
+        state.stored_weights, state.stored_total = weights, total_value
+        return state
+
+    def matches(self, weights: Dict[str, float], total_value: float) -> bool:
+        """Whether the store still holds what this state last persisted."""
+        if self.stored_weights is None or total_value != self.stored_total:
+            return False
+        return weights is self.stored_weights or weights == self.stored_weights
+
+    # -- edits -------------------------------------------------------------
+
+    def apply(self, edits: Iterable[HoldingEdit]) -> None:
+        """Set (``amount``), adjust (``delta``) or remove (``amount`` 0) positions.
+
+        Raises ``ValueError`` before changing anything if an edit would make a
+        position or the portfolio total non-positive.
+        """
+        self.commit(self.resolve(edits))
+
+    def commit(self, resolved: Dict[str, float]) -> None:
+        """Apply amounts returned by :meth:`resolve`."""
+        for key, value in resolved.items():
+            self._set(key, value)
+
+    def weights_after(self, resolved: Dict[str, float]) -> Tuple[Dict[str, float], float]:
+        """Weights and total :meth:`commit` would leave, without changing the state."""
+        total = self.total + sum(value - self.amounts.get(key, 0.0) for key, value in resolved.items())
+        amounts = dict(self.amounts)
+        for ticker, amount in resolved.items():
+            if amount > 0:
+                amounts[ticker] = amount
+            else:
+                amounts.pop(ticker, None)
+        return {ticker: amount / total for ticker, amount in amounts.items()}, total
+
+    def resolve(self, edits: Iterable[HoldingEdit]) -> Dict[str, float]:
+        """New amount per edited ticker; raises ``ValueError`` like :meth:`apply`."""
+        resolved: Dict[str, float] = {}
+        for ticker, amount, delta in edits:
+            key = ticker.upper()
+            current = resolved.get(key, self.amounts.get(key, 0.0))
+            value = amount if amount is not None else current + (delta or 0.0)
+            if value < 0:
+                raise ValueError(f"Position {key} would become negative.")
+            resolved[key] = value
+        new_total = self.total + sum(value - self.amounts.get(key, 0.0) for key, value in resolved.items())
+        if new_total <= 0:
+            raise ValueError("Portfolio must have a positive total value.")
+        return resolved
+
+    def _set(self, ticker: str, amount: float) -> None:
+        previous = self.amounts.get(ticker)
+        change = amount - (previous or 0.0)
+        asset_class = ASSET_CLASS_MAP.get(ticker, "Other")
+        if amount <= 0:
+            if previous is None:
+                return
+            del self.amounts[ticker]
+            del self._positions[ticker]
+            self.class_counts[asset_class] -= 1
+            if not self.class_counts[asset_class]:
+                del self.class_counts[asset_class]
+                del self.class_totals[asset_class]
+                del self._class_heads[asset_class]
+            else:
+                self.class_totals[asset_class] += change
+        else:
+            self.amounts[ticker] = amount
+            if previous is None:
+                # Re-added tickers move to the end of ``amounts``, as in a dict.
+                self._positions[ticker] = self._next_position
+                self._next_position += 1
+                heapq.heappush(self._class_heads.setdefault(asset_class, []), (self._positions[ticker], ticker))
+                self.class_counts[asset_class] = self.class_counts.get(asset_class, 0) + 1
+            self.class_totals[asset_class] = self.class_totals.get(asset_class, 0.0) + change
+            heapq.heappush(self._heap, (-amount, self._positions[ticker], ticker))
+        self.total += change
+        if ticker in BOND_TICKERS:
+            self.buffer_totals["bonds"] += change
+        elif ticker in GOLD_TICKERS:
+            self.buffer_totals["gold"] += change
+        elif ticker in COMMODITY_TICKERS:
+            self.buffer_totals["commodities"] += change
+        for key in model_registry.keys:
+            if ticker not in model_registry.weights(key):
+                self.outside[key] += change
+        if self._metrics_version == self._table.version:
+            self._fold_metrics(ticker, previous or 0.0, amount)
+        if len(self._heap) > 2 * len(self.amounts) + 16:
+            self._heap = [(-value, self._positions[key], key) for key, value in self.amounts.items()]
+            heapq.heapify(self._heap)
+            self._class_heads = {}
+            for key in self.amounts:
+                heads = self._class_heads.setdefault(ASSET_CLASS_MAP.get(key, "Other"), [])
+                heads.append((self._positions[key], key))
+
+    def _fold_metrics(self, ticker: str, previous: float, amount: float) -> None:
+        row = self._table.get(ticker)
+        if row is None:
+            self._unknown += (amount > 0) - (previous > 0)
+        else:
+            self._metric_sum += (amount - previous) * row
+
+    # -- derived values ----------------------------------------------------
+
+    def weights(self) -> Dict[str, float]:
+        total = self.total
+        return {ticker: amount / total for ticker, amount in self.amounts.items()}
+
+    def distribution(self) -> Dict[str, float]:
+        # Classes in order of their earliest held ticker, as pulse_score builds them.
+        total = self.total
+        order = sorted(self.class_totals, key=self._first_position)
+        return {asset_class: self.class_totals[asset_class] / total for asset_class in order}
+
+    def _first_position(self, asset_class: str) -> int:
+        heads = self._class_heads[asset_class]
+        while self._positions.get(heads[0][1]) != heads[0][0]:
+            heapq.heappop(heads)
+        return heads[0][0]
+
+    def largest(self) -> Tuple[str | None, float]:
+        heap = self._heap
+        while heap and (self.amounts.get(heap[0][2]) != -heap[0][0] or self._positions[heap[0][2]] != heap[0][1]):
+            heapq.heappop(heap)
+        return (heap[0][2], -heap[0][0] / self.total) if heap else (None, 0)
+
+    def tracking_errors(self) -> Dict[str, float]:
+        total = self.total
+        tracking: Dict[str, float] = {}
+        for key in model_registry.keys:
+            model_weights = model_registry.weights(key)
+            inside = sum(abs(self.amounts.get(t, 0.0) / total - w) for t, w in model_weights.items())
+            tracking[key] = round_score((self.outside[key] / total + inside) / 2, 4)
+        return tracking
+
+    def _profile(self) -> np.ndarray | None:
+        table = self._table
+        if self._metrics_version != table.version:
+            # Price refreshes change the metrics themselves; re-fold once.
+            self._metric_sum = np.zeros(len(METRIC_FIELDS))
+            self._unknown = 0
+            self._metrics_version = table.version
+            for ticker, amount in self.amounts.items():
+                self._fold_metrics(ticker, 0.0, amount)
+        if self._unknown or self.total <= 0:
+            return None
+        return self._metric_sum / self.total
+
+    def score(self) -> Tuple[float, Dict[str, float], float, List[str], str, Dict[str, float]]:
+        """Same result as :func:`app.api.scoring.pulse_score` on :meth:`weights`."""
+        distribution = self.distribution()
+        profile = self._profile()
+        buffer = self.buffer_totals["bonds"] + 0.5 * (self.buffer_totals["gold"] + self.buffer_totals["commodities"])
+        return assemble_score(
+            distribution,
+            resilience_from(profile, self._table.model_reference(), buffer / self.total),
+            return_efficiency_from(distribution, profile),
+            self.largest(),
+        )
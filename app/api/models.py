@@ -38,6 +38,11 @@ class PortfolioUploadResponse(BaseModel):
     total_value: float
 
 
+class CsvUploadResponse(PortfolioUploadResponse):
+    lots: int = Field(..., description="CSV rows aggregated into holdings.")
+    skipped_rows: int = Field(..., description="Rows ignored (cash, totals, unparseable values).")
+
+
 class ScoreBreakdown(BaseModel):
     diversification: float
     resilience: float
@@ -58,6 +63,30 @@ class ScoreResponse(BaseModel):
     top_suggestions: List[str]
 
 
+class HoldingChange(BaseModel):
+    ticker: str = Field(..., description="Ticker symbol, e.g. VTI")
+    amount: Optional[float] = Field(None, ge=0, description="New position amount; 0 removes the position.")
+    delta: Optional[float] = Field(None, description="Amount to add to (or, if negative, take from) the position.")
+
+    @root_validator
+    def check_amount_or_delta(cls, values):  # type: ignore[override]
+        if (values.get("amount") is None) == (values.get("delta") is None):
+            raise ValueError("Each change must provide exactly one of amount or delta.")
+        return values
+
+
+class HoldingsPatchRequest(BaseModel):
+    changes: List[HoldingChange] = Field(..., min_items=1)
+
+
+class HoldingsPatchResponse(BaseModel):
+    user_id: str
+    total_value: float
+    holdings_count: int
+    score: ScoreResponse
+    tracking_error: Dict[str, float]
+
+
 class ModelPerformance(BaseModel):
     model_key: str
     model_name: str
@@ -78,10 +107,97 @@ class RebalanceAdjustment(BaseModel):
     notional_change: float
 
 
+class ModelAlternative(BaseModel):
+    model_key: str
+    model_name: str
+    tracking_error: float
+
+
 class RebalanceSuggestionResponse(BaseModel):
     target_model: str
     target_weights: Dict[str, float]
     adjustments: List[RebalanceAdjustment]
+    alternatives: List[ModelAlternative] = []
+
+
+class BatchPortfolio(BaseModel):
+    id: str = Field(..., description="Caller-supplied identifier echoed back in the results")
+    portfolio: List[PortfolioItem]
+
+
+class BatchScoreRequest(BaseModel):
+    portfolios: List[BatchPortfolio]
+
+
+class BatchScoreResult(BaseModel):
+    id: str
+    pulse_score: float
+    grade: str
+    breakdown: ScoreBreakdown
+    expected_return: float
+    tracking_error: Dict[str, float]
+
+
+class BatchScoreResponse(BaseModel):
+    results: List[BatchScoreResult]
+
+
+class PortfolioSummaryResponse(BaseModel):
+    score: ScoreResponse
+    model_comparison: ModelComparisonResponse
+    rebalance: RebalanceSuggestionResponse
+
+
+class BacktestPoint(BaseModel):
+    date: str
+    value: float
+
+
+class BacktestCurve(BaseModel):
+    key: str
+    name: str
+    cagr: float
+    max_drawdown: float
+    points: List[BacktestPoint]
+
+
+class BacktestResponse(BaseModel):
+    rebalance_frequency: str
+    curves: List[BacktestCurve]
+
+
+class ScoreHistoryPoint(BaseModel):
+    date: str
+    pulse_score: float
+    breakdown: ScoreBreakdown
+    tracking_error: Dict[str, float]
+
+
+class ScoreHistoryResponse(BaseModel):
+    frequency: str
+    points: List[ScoreHistoryPoint]
+
+
+class Percentiles(BaseModel):
+    p5: float
+    p50: float
+    p95: float
+
+
+class SimulationOutcome(BaseModel):
+    key: str
+    name: str
+    max_drawdown: Percentiles
+    terminal_value: Percentiles = Field(..., description="Growth of 1 over the horizon.")
+
+
+class SimulationResponse(BaseModel):
+    paths: int
+    horizon_days: int
+    block_days: int
+    seed: int
+    history_days: int
+    outcomes: List[SimulationOutcome]
 
 
 class ErrorResponse(BaseModel):
@@ -1,85 +1,83 @@
 """Portfolio endpoints for Portfolio Pulse."""
 from __future__ import annotations
 
-from typing import Dict
+import hashlib
+import json
+import os
+import threading
+from typing import Awaitable, Callable, Dict, Iterable, List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
-from ..config import MODEL_NAMES, MODEL_PORTFOLIOS
-from ..services.data_loader import expected_performance
-from ..services.rebalance import generate_rebalance_plan, select_target_model
+from ..config import GLOBAL_CONFIG
+from ..services.backtest import BacktestResult, curve_cagr, downsample, drifted_weights, max_drawdown, run_backtests
+from ..services.data_loader import prefetch_histories, price_data_digest, touch_histories
+from ..services.model_metrics import model_metrics
+from ..services.model_registry import model_registry
+from ..services.portfolio_store import build_portfolio_store
+from ..services.rebalance import generate_rebalance_plan, rank_target_models, registry_tracking_errors
+from ..services.risk import expected_performance, risk_engine
+from ..services.simulation import run_simulation
+from ..services.ticker_metrics import TickerMetricsTable, ticker_metrics
+from ..utils.admission import is_degraded
 from ..utils.auth import get_current_user
-from ..utils.math_ops import normalize_portfolio
+from ..utils.cache import LRUCache
+from ..utils.csv_lots import CsvFormatError, LotAggregator
+from ..utils.math_ops import normalize_portfolio, portfolio_fingerprint, round_score
 from . import models
-from .scoring import model_tracking_error, pulse_score
+from .batch_scoring import score_portfolios, score_weight_rows
+from .incremental_scoring import HoldingsState
+from .scoring import build_asset_class_distribution, pulse_score
 
 router = APIRouter(prefix="/portfolio", tags=["portfolio"])
+DEFAULT_ALTERNATIVES = 2
+CSV_UPLOAD_MAX_BYTES = int(os.getenv("CSV_UPLOAD_MAX_BYTES", str(64 * 1024 * 1024)))
+portfolio_store = build_portfolio_store()
+# (user id, path, query) -> (ETag, serialized JSON body)
+response_cache: LRUCache[tuple] = LRUCache(maxsize=int(os.getenv("RESPONSE_CACHE_SIZE", "16384")))
+# (risk model version, portfolio fingerprint) -> BacktestResult
+backtest_cache: LRUCache[BacktestResult] = LRUCache(maxsize=int(os.getenv("BACKTEST_CACHE_SIZE", "256")))
+# Past dates are scored with the asset-mix components: today's trailing
+# metrics would leak later prices into earlier scores.
+_NO_METRICS = TickerMetricsTable()
+# user id -> HoldingsState for incremental PATCH /holdings edits
+holdings_states: LRUCache[HoldingsState] = LRUCache(maxsize=int(os.getenv("HOLDINGS_STATE_CACHE_SIZE", "4096")))
+# Serializes use of a user's cached HoldingsState within this process
+# (striped, so memory stays bounded). Edits from other workers are serialized
+# by the store's read-modify-write transaction.
+_holdings_locks = [threading.Lock() for _ in range(64)]
 
 
-class PortfolioStore:
-    """In-memory portfolio store keyed by user id."""
-
-    def __init__(self) -> None:
-        self._store: Dict[str, Dict[str, float]] = {}
-        self._values: Dict[str, float] = {}
-
-    def set_portfolio(self, user_id: str, weights: Dict[str, float], total_value: float) -> None:
-        self._store[user_id] = weights
-        self._values[user_id] = total_value
-
-    def get_portfolio(self, user_id: str) -> Dict[str, float]:
-        if user_id not in self._store:
-            raise KeyError("Portfolio not found")
-        return self._store[user_id]
-
-    def get_total_value(self, user_id: str) -> float:
-        return self._values.get(user_id, 100.0)
-
-
-portfolio_store = PortfolioStore()
+def _normalize_request(payload: models.PortfolioUploadRequest) -> tuple[Dict[str, float], float]:
+    return _normalize_items(payload.portfolio)
 
 
-def _normalize_request(payload: models.PortfolioUploadRequest) -> tuple[Dict[str, float], float]:
+def _normalize_items(items: List[models.PortfolioItem]) -> tuple[Dict[str, float], float]:
     normalized_inputs = []
     total_value = 0.0
-    has_amount = any(item.amount for item in payload.portfolio)
+    has_amount = any(item.amount for item in items)
     if has_amount:
-        total_value = sum((item.amount or 0) for item in payload.portfolio)
-        normalized_inputs = [(item.ticker, item.amount or 0.0) for item in payload.portfolio]
+        total_value = sum((item.amount or 0) for item in items)
+        normalized_inputs = [(item.ticker, item.amount or 0.0) for item in items]
     else:
-        normalized_inputs = [(item.ticker, item.weight or 0.0) for item in payload.portfolio]
+        normalized_inputs = [(item.ticker, item.weight or 0.0) for item in items]
         total_value = 100.0
     weights = normalize_portfolio(normalized_inputs)
     return weights, total_value
 
 
-@router.post(
-    "/upload",
-    response_model=models.PortfolioUploadResponse,
-    responses={404: {"model": models.ErrorResponse}},
-)
-def upload_portfolio(
-    payload: models.PortfolioUploadRequest,
-    user=Depends(get_current_user),
-):
-    weights, total_value = _normalize_request(payload)
-    portfolio_store.set_portfolio(user["id"], weights, total_value)
-    holdings = [models.NormalizedHolding(ticker=t, weight=w) for t, w in weights.items()]
-    return models.PortfolioUploadResponse(user_id=user["id"], holdings=holdings, total_value=total_value)
+def _score_response(
+    weights: Dict[str, float],
+    distribution: Dict[str, float] | None = None,
+) -> models.ScoreResponse:
+    return _score_model(pulse_score(weights, distribution))
 
 
-@router.get(
-    "/score",
-    response_model=models.ScoreResponse,
-    responses={404: {"model": models.ErrorResponse}},
-)
-def get_score(user=Depends(get_current_user)):
-    try:
-        weights = portfolio_store.get_portfolio(user["id"])
-    except KeyError as exc:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Portfolio not found.") from exc
-    total, breakdown, expected_return, suggestions, grade, distribution = pulse_score(weights)
-    chart = [models.DiversificationSlice(label=k, weight=round(v, 4)) for k, v in distribution.items()]
+def _score_model(scored: tuple) -> models.ScoreResponse:
+    total, breakdown, expected_return, suggestions, grade, distribution = scored
+    chart = [models.DiversificationSlice(label=k, weight=round_score(v, 4)) for k, v in distribution.items()]
     return models.ScoreResponse(
         pulse_score=total,
         grade=grade,
@@ -89,25 +87,16 @@ def get_score(user=Depends(get_current_user)):
     )
 
 
-@router.get(
-    "/model-comparison",
-    response_model=models.ModelComparisonResponse,
-    responses={404: {"model": models.ErrorResponse}},
-)
-def compare_models(user=Depends(get_current_user)):
-    try:
-        weights = portfolio_store.get_portfolio(user["id"])
-    except KeyError as exc:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Portfolio not found.") from exc
+def _comparison_response(weights: Dict[str, float], tracking: Dict[str, float]) -> models.ModelComparisonResponse:
     perf = expected_performance(weights)
-    tracking = model_tracking_error(weights)
+    precomputed = model_metrics.get()
     model_performances = []
-    for key, model_weights in MODEL_PORTFOLIOS.items():
-        metrics = expected_performance(model_weights)
+    for key in model_registry.keys:
+        metrics = precomputed[key]
         model_performances.append(
             models.ModelPerformance(
                 model_key=key,
-                model_name=MODEL_NAMES.get(key, key.title()),
+                model_name=model_registry.names[key],
                 expected_return=round(metrics["expected_return"], 4),
                 volatility=round(metrics["volatility"], 4),
                 tracking_error=tracking[key],
@@ -119,22 +108,503 @@ def compare_models(user=Depends(get_current_user)):
     )
 
 
-@router.get(
-    "/rebalance-suggestions",
-    response_model=models.RebalanceSuggestionResponse,
-    responses={404: {"model": models.ErrorResponse}},
-)
-def rebalance_suggestions(user=Depends(get_current_user)):
-    try:
-        weights = portfolio_store.get_portfolio(user["id"])
-    except KeyError as exc:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Portfolio not found.") from exc
-    tracking = model_tracking_error(weights)
-    model_key = select_target_model(tracking)
-    plan = generate_rebalance_plan(weights, model_key, portfolio_store.get_total_value(user["id"]))
+def _rebalance_response(
+    weights: Dict[str, float],
+    total_value: float,
+    alternatives: int = DEFAULT_ALTERNATIVES,
+    tracking: Dict[str, float] | None = None,
+) -> models.RebalanceSuggestionResponse:
+    ranked = rank_target_models(weights, 1 + alternatives, tracking)
+    model_key = ranked[0][0]
+    plan = generate_rebalance_plan(weights, model_key, total_value)
     adjustments = [models.RebalanceAdjustment(**adj) for adj in plan["adjustments"]]
     return models.RebalanceSuggestionResponse(
-        target_model=MODEL_NAMES.get(plan["target_model"], plan["target_model"].title()),
+        target_model=model_registry.names[plan["target_model"]],
         target_weights=plan["target_weights"],
         adjustments=adjustments,
+        alternatives=[
+            models.ModelAlternative(model_key=key, model_name=model_registry.names[key], tracking_error=error)
+            for key, error in ranked[1:]
+        ],
+    )
+
+
+def _etag(request: Request, weights: Dict[str, float], total_value: float) -> str:
+    # Every response reads the user's and the models' prices, directly or
+    # through the risk model and the precomputed model metrics; keying on
+    # their content lets any worker with the same data validate the tag.
+    fingerprint = portfolio_fingerprint(weights, total_value)
+    tickers = set(weights).union(model_registry.tickers)
+    # A 304 serves these prices too; keep them refreshed.
+    touch_histories(tickers)
+    prices = price_data_digest(tickers)
+    derived = f"{risk_engine.data_digest(tickers)}|{model_metrics.digest}"
+    tag = f"{prices}|{derived}|{request.url.path}|{request.url.query}|{fingerprint}"
+    return '"' + hashlib.sha1(tag.encode()).hexdigest() + '"'
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+async def _cached_json(
+    request: Request,
+    user_id: str,
+    weights: Dict[str, float],
+    total_value: float,
+    build: Callable[[], BaseModel | dict],
+    prepare: Callable[[], Awaitable[None]] | None = None,
+) -> Response:
+    """Serve ``build()`` as JSON with an ETag tied to the portfolio and price data.
+
+    A matching ``If-None-Match`` gets a bare 304 before ``prepare`` (the
+    request's price prefetch) runs, so polls of unchanged data cost no
+    upstream call. Otherwise the serialized body from the previous identical
+    request is reused while its tag still holds. The tag is computed after
+    ``prepare`` and before ``build`` runs, so a price refresh during the
+    build only makes the next request recompute. Degraded responses are
+    neither tagged nor cached. ``build`` runs on a worker thread.
+    """
+    if is_degraded():
+        if prepare is not None:
+            await prepare()
+        body = await run_in_threadpool(_serialize, build)
+        return Response(content=body, media_type="application/json", headers={"Cache-Control": "no-store"})
+    if_none_match = request.headers.get("if-none-match")
+    etag = _etag(request, weights, total_value)
+    if prepare is not None and not _etag_matches(if_none_match, etag):
+        await prepare()
+        etag = _etag(request, weights, total_value)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    key = (user_id, request.url.path, request.url.query)
+    cached = response_cache.get(key)
+    if cached is not None and cached[0] == etag:
+        body = cached[1]
+    else:
+        body = await run_in_threadpool(_serialize, build)
+        response_cache.put(key, (etag, body))
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _serialize(build: Callable[[], BaseModel | dict]) -> bytes:
+    body = build()
+    return body.json().encode() if isinstance(body, BaseModel) else json.dumps(body).encode()
+
+
+async def _prefetch_prices(tickers: Iterable[str]) -> None:
+    """Load the prices the risk model will need without holding a thread."""
+    await prefetch_histories(risk_engine.tickers_to_load(tickers))
+
+
+async def _prefetch_metrics(tickers: Iterable[str]) -> None:
+    """Load the prices behind the historical metrics the scorers read.
+
+    Covers the scored tickers and the model tickers the reference profile
+    uses. Without it, whether a score came from historical metrics or the
+    asset-mix heuristics would depend on which prices other requests had
+    already loaded into this worker.
+    """
+    wanted = {ticker.upper() for ticker in tickers}.union(model_registry.tickers)
+    # Metrics outlive the cached histories they came from; mark those in use.
+    touch_histories(wanted)
+    await prefetch_histories(ticker_metrics.missing(sorted(wanted)))
+
+
+def _load_portfolio(user_id: str) -> tuple[Dict[str, float], float]:
+    try:
+        return portfolio_store.get_record(user_id)
+    except KeyError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Portfolio not found.") from exc
+
+
+@router.post(
+    "/upload",
+    response_model=models.PortfolioUploadResponse,
+    responses={404: {"model": models.ErrorResponse}},
+)
+async def upload_portfolio(
+    payload: models.PortfolioUploadRequest,
+    user=Depends(get_current_user),
+):
+    weights, total_value = _normalize_request(payload)
+    await run_in_threadpool(portfolio_store.set_portfolio, user["id"], weights, total_value)
+    holdings = [models.NormalizedHolding(ticker=t, weight=w) for t, w in weights.items()]
+    return models.PortfolioUploadResponse(user_id=user["id"], holdings=holdings, total_value=total_value)
+
+
+@router.post(
+    "/upload-csv",
+    response_model=models.CsvUploadResponse,
+    responses={
+        400: {"model": models.ErrorResponse},
+        413: {"model": models.ErrorResponse},
+        422: {"model": models.ErrorResponse},
+    },
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"text/csv": {"schema": {"type": "string"}}},
+        }
+    },
+)
+async def upload_portfolio_csv(request: Request, user=Depends(get_current_user)):
+    """Upload a broker positions/lots CSV export as the raw request body.
+
+    The body is parsed as it streams in and lots are summed per ticker, so
+    exports with tens of thousands of rows never sit in memory as a whole.
+    Parsing runs on worker threads, one chunk at a time. A malformed body
+    (e.g. an unbalanced quote swallowing the rest of the file) is a 400 that
+    names the offending line.
+    """
+    aggregator = LotAggregator()
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > CSV_UPLOAD_MAX_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"CSV upload exceeds {CSV_UPLOAD_MAX_BYTES} bytes.",
+                )
+            await run_in_threadpool(aggregator.feed, chunk)
+        totals = await run_in_threadpool(aggregator.finish)
+        weights = normalize_portfolio(totals.items())
+    except CsvFormatError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+    total_value = 100.0 if aggregator.uses_weights else sum(totals.values())
+    await run_in_threadpool(portfolio_store.set_portfolio, user["id"], weights, total_value)
+    return models.CsvUploadResponse(
+        user_id=user["id"],
+        holdings=[models.NormalizedHolding(ticker=t, weight=w) for t, w in weights.items()],
+        total_value=total_value,
+        lots=aggregator.lots,
+        skipped_rows=aggregator.skipped,
     )
+
+
+@router.patch(
+    "/holdings",
+    response_model=models.HoldingsPatchResponse,
+    responses={404: {"model": models.ErrorResponse}, 422: {"model": models.ErrorResponse}},
+)
+async def patch_holdings(
+    payload: models.HoldingsPatchRequest,
+    user=Depends(get_current_user),
+):
+    """Add, resize or remove individual positions without re-uploading the portfolio.
+
+    The user's :class:`HoldingsState` is kept between edits, so the new score
+    and tracking errors cost O(changed holdings); it is rebuilt from the store
+    only when the stored portfolio was replaced by another request or worker.
+    """
+    weights, _ = await run_in_threadpool(_load_portfolio, user["id"])
+    await _prefetch_metrics([*weights, *(change.ticker for change in payload.changes)])
+    return await run_in_threadpool(_apply_holding_changes, user["id"], payload.changes)
+
+
+def _apply_holding_changes(user_id: str, changes: List[models.HoldingChange]) -> models.HoldingsPatchResponse:
+    edits = [(change.ticker, change.amount, change.delta) for change in changes]
+    edited: Dict[str, tuple] = {}
+
+    def update(weights: Dict[str, float], total_value: float) -> tuple[Dict[str, float], float]:
+        # Runs inside the store transaction, so this is the latest portfolio.
+        state = holdings_states.get(user_id)
+        if state is None or not state.matches(weights, total_value):
+            state = HoldingsState.from_weights(weights, total_value)
+        resolved = state.resolve(edits)
+        edited["state"] = (state, resolved)
+        return state.weights_after(resolved)
+
+    with _holdings_locks[hash(user_id) % len(_holdings_locks)]:
+        try:
+            stored, total = portfolio_store.update_portfolio(user_id, update)
+        except KeyError as exc:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Portfolio not found.") from exc
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+        # The cached state only changes once the write has committed.
+        state, resolved = edited["state"]
+        state.commit(resolved)
+        state.stored_weights, state.stored_total = stored, total
+        holdings_states.put(user_id, state)
+        return models.HoldingsPatchResponse(
+            user_id=user_id,
+            total_value=total,
+            holdings_count=len(state.amounts),
+            score=_score_model(state.score()),
+            tracking_error=state.tracking_errors(),
+        )
+
+
+@router.get(
+    "/score",
+    response_model=models.ScoreResponse,
+    responses={304: {"description": "Not modified."}, 404: {"model": models.ErrorResponse}},
+)
+async def get_score(request: Request, user=Depends(get_current_user)):
+    weights, total_value = await run_in_threadpool(_load_portfolio, user["id"])
+    return await _cached_json(
+        request,
+        user["id"],
+        weights,
+        total_value,
+        lambda: _score_response(weights),
+        prepare=lambda: _prefetch_metrics(weights),
+    )
+
+
+@router.post(
+    "/score-batch",
+    response_model=models.BatchScoreResponse,
+    responses={422: {"model": models.ErrorResponse}},
+)
+async def score_batch(
+    payload: models.BatchScoreRequest,
+    user=Depends(get_current_user),
+):
+    await _prefetch_metrics(item.ticker for entry in payload.portfolios for item in entry.portfolio)
+    return await run_in_threadpool(_score_batch, payload)
+
+
+def _score_batch(payload: models.BatchScoreRequest) -> models.BatchScoreResponse:
+    portfolios = []
+    for entry in payload.portfolios:
+        try:
+            portfolios.append(_normalize_items(entry.portfolio)[0])
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Portfolio {entry.id}: {exc}",
+            ) from exc
+    scores = score_portfolios(portfolios)
+    results = []
+    for row, (entry, grade) in enumerate(zip(payload.portfolios, scores.grades())):
+        results.append(
+            models.BatchScoreResult(
+                id=entry.id,
+                pulse_score=scores.total[row],
+                grade=grade,
+                breakdown=models.ScoreBreakdown(
+                    diversification=scores.diversification[row],
+                    resilience=scores.resilience[row],
+                    return_efficiency=scores.return_efficiency[row],
+                    risk_balance=scores.risk_balance[row],
+                ),
+                expected_return=scores.expected_return[row],
+                tracking_error=dict(zip(scores.model_keys, scores.tracking[row].tolist())),
+            )
+        )
+    return models.BatchScoreResponse(results=results)
+
+
+@router.get(
+    "/model-comparison",
+    response_model=models.ModelComparisonResponse,
+    responses={304: {"description": "Not modified."}, 404: {"model": models.ErrorResponse}},
+)
+async def compare_models(request: Request, user=Depends(get_current_user)):
+    weights, total_value = await run_in_threadpool(_load_portfolio, user["id"])
+    return await _cached_json(
+        request,
+        user["id"],
+        weights,
+        total_value,
+        lambda: _comparison_response(weights, registry_tracking_errors(weights)),
+        # Model tickers too, in case the model metrics are not computed yet.
+        prepare=lambda: _prefetch_prices(set(weights).union(model_registry.tickers)),
+    )
+
+
+@router.get(
+    "/rebalance-suggestions",
+    response_model=models.RebalanceSuggestionResponse,
+    responses={304: {"description": "Not modified."}, 404: {"model": models.ErrorResponse}},
+)
+async def rebalance_suggestions(
+    request: Request,
+    alternatives: int = Query(DEFAULT_ALTERNATIVES, ge=0, le=20, description="Runner-up models to include."),
+    user=Depends(get_current_user),
+):
+    weights, total_value = await run_in_threadpool(_load_portfolio, user["id"])
+    return await _cached_json(
+        request,
+        user["id"],
+        weights,
+        total_value,
+        lambda: _rebalance_response(weights, total_value, alternatives),
+    )
+
+
+@router.get(
+    "/summary",
+    response_model=models.PortfolioSummaryResponse,
+    responses={304: {"description": "Not modified."}, 404: {"model": models.ErrorResponse}},
+)
+async def portfolio_summary(request: Request, user=Depends(get_current_user)):
+    weights, total_value = await run_in_threadpool(_load_portfolio, user["id"])
+
+    async def prepare() -> None:
+        await _prefetch_metrics(weights)
+        await _prefetch_prices(weights)
+
+    def build() -> models.PortfolioSummaryResponse:
+        distribution = build_asset_class_distribution(weights)
+        tracking = registry_tracking_errors(weights)
+        return models.PortfolioSummaryResponse(
+            score=_score_response(weights, distribution),
+            model_comparison=_comparison_response(weights, tracking),
+            rebalance=_rebalance_response(weights, total_value, tracking=tracking),
+        )
+
+    return await _cached_json(request, user["id"], weights, total_value, build, prepare)
+
+
+@router.get(
+    "/backtest",
+    response_model=models.BacktestResponse,
+    responses={304: {"description": "Not modified."}, 404: {"model": models.ErrorResponse}},
+)
+async def backtest_curves(
+    request: Request,
+    points: int = Query(250, ge=2, le=5000, description="Maximum points per curve."),
+    user=Depends(get_current_user),
+):
+    weights, total_value = await run_in_threadpool(_load_portfolio, user["id"])
+    tickers = set(weights).union(model_registry.tickers)
+    return await _cached_json(
+        request,
+        user["id"],
+        weights,
+        total_value,
+        lambda: _backtest_response(weights, tickers, points),
+        prepare=lambda: _prefetch_prices(tickers),
+    )
+
+
+def _backtest(weights: Dict[str, float], tickers: Iterable[str]) -> BacktestResult:
+    """Backtest the user and model portfolios, reusing results while the risk model is unchanged."""
+    model = risk_engine.model_for(tickers)
+    key = (model.version, portfolio_fingerprint(weights, 0.0))
+    result = backtest_cache.get(key) if model.version >= 0 else None
+    if result is None:
+        result = run_backtests({"user": weights, **model_registry.portfolios()}, model.matrix)
+        if model.version >= 0:
+            backtest_cache.put(key, result)
+    return result
+
+
+def _backtest_response(weights: Dict[str, float], tickers: Iterable[str], points: int) -> dict:
+    """:class:`models.BacktestResponse` as a plain dict.
+
+    Responses carry thousands of points; building and then serializing a
+    pydantic model per point cost more than the backtest itself.
+    """
+    result = _backtest(weights, tickers)
+    sampled = downsample(result, points)
+    dates = [str(date) for date in sampled.dates]
+    curves = []
+    for key in result.keys:
+        full_curve = result.curve(key)
+        curves.append(
+            {
+                "key": key,
+                "name": "Your Portfolio" if key == "user" else model_registry.names[key],
+                "cagr": round(curve_cagr(result.dates, full_curve), 4),
+                "max_drawdown": round(max_drawdown(full_curve), 4),
+                "points": [
+                    {"date": date, "value": round(value, 4)} for date, value in zip(dates, sampled.curve(key).tolist())
+                ],
+            }
+        )
+    return {"rebalance_frequency": GLOBAL_CONFIG.rebalance_frequency, "curves": curves}
+
+
+@router.get(
+    "/score-history",
+    response_model=models.ScoreHistoryResponse,
+    responses={304: {"description": "Not modified."}, 404: {"model": models.ErrorResponse}},
+)
+async def score_history(request: Request, user=Depends(get_current_user)):
+    """Pulse score and tracking error each quarter as today's holdings drifted under buy-and-hold."""
+    weights, total_value = await run_in_threadpool(_load_portfolio, user["id"])
+
+    def build() -> models.ScoreHistoryResponse:
+        matrix = risk_engine.model_for(weights).matrix
+        dates, tickers, rows = drifted_weights(weights, matrix, "quarterly")
+        scores = score_weight_rows(tickers, rows, _NO_METRICS)
+        points = [
+            models.ScoreHistoryPoint(
+                date=str(date),
+                pulse_score=scores.total[i],
+                breakdown=models.ScoreBreakdown(
+                    diversification=scores.diversification[i],
+                    resilience=scores.resilience[i],
+                    return_efficiency=scores.return_efficiency[i],
+                    risk_balance=scores.risk_balance[i],
+                ),
+                tracking_error=dict(zip(scores.model_keys, scores.tracking[i].tolist())),
+            )
+            for i, date in enumerate(dates)
+        ]
+        return models.ScoreHistoryResponse(frequency="quarterly", points=points)
+
+    return await _cached_json(request, user["id"], weights, total_value, build, lambda: _prefetch_prices(weights))
+
+
+def _percentiles(values: Dict[int, float]) -> models.Percentiles:
+    return models.Percentiles(**{f"p{p}": round(v, 4) for p, v in values.items()})
+
+
+@router.get(
+    "/simulation",
+    response_model=models.SimulationResponse,
+    responses={
+        304: {"description": "Not modified."},
+        404: {"model": models.ErrorResponse},
+        422: {"model": models.ErrorResponse},
+    },
+)
+async def drawdown_simulation(
+    request: Request,
+    paths: int = Query(10_000, ge=100, le=200_000, description="Bootstrapped paths per portfolio."),
+    horizon_days: int = Query(252, ge=5, le=2520, description="Trading days simulated per path."),
+    block_days: int = Query(20, ge=1, le=250, description="Consecutive historical days per bootstrap block."),
+    seed: int = Query(0, ge=0, description="Seed; the same inputs and seed give the same result."),
+    user=Depends(get_current_user),
+):
+    weights, total_value = await run_in_threadpool(_load_portfolio, user["id"])
+
+    def build() -> models.SimulationResponse:
+        try:
+            portfolios = {"user": weights, **model_registry.portfolios()}
+            result = run_simulation(portfolios, paths, horizon_days, block_days, seed)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+        return models.SimulationResponse(
+            paths=paths,
+            horizon_days=horizon_days,
+            block_days=block_days,
+            seed=seed,
+            history_days=result.history_days,
+            outcomes=[
+                models.SimulationOutcome(
+                    key=key,
+                    name="Your Portfolio" if key == "user" else model_registry.names[key],
+                    max_drawdown=_percentiles(result.max_drawdown[key]),
+                    terminal_value=_percentiles(result.terminal_value[key]),
+                )
+                for key in result.keys
+            ],
+        )
+
+    async def prepare() -> None:
+        await _prefetch_prices(set(weights).union(model_registry.tickers))
+
+    return await _cached_json(request, user["id"], weights, total_value, build, prepare)
@@ -3,13 +3,21 @@ from __future__ import annotations
 
 from typing import Dict, List, Tuple
 
-from ..config import ASSET_CLASS_MAP, EXPECTED_RETURN_BY_ASSET, MODEL_PORTFOLIOS
-from ..utils.math_ops import clamp
+import numpy as np
+
+from ..config import ASSET_CLASS_MAP, EXPECTED_RETURN_BY_ASSET
+from ..services.model_registry import model_registry
+from ..services.ticker_metrics import TickerMetricsTable, ticker_metrics
+from ..utils.math_ops import NOISE_DECIMALS, clamp, round_score
+from ..utils.metrics import timed
 
 MAX_DIVERSIFICATION_SCORE = 30
 MAX_RESILIENCE_SCORE = 30
 MAX_RETURN_EFFICIENCY_SCORE = 20
 MAX_RISK_BALANCE_SCORE = 20
+BOND_TICKERS = {"TLT", "IEF", "BND", "TIP"}
+GOLD_TICKERS = {"IAU", "GLD"}
+COMMODITY_TICKERS = {"DBC", "GSG"}
 
 
 def build_asset_class_distribution(weights: Dict[str, float]) -> Dict[str, float]:
@@ -23,26 +31,60 @@ def build_asset_class_distribution(weights: Dict[str, float]) -> Dict[str, float
 def diversification_score(distribution: Dict[str, float]) -> float:
     evenness = sum(min(weight, 0.2) for weight in distribution.values())
     normalized = min(evenness / 1.0, 1.0)
-    return round(normalized * MAX_DIVERSIFICATION_SCORE, 2)
+    return round_score(normalized * MAX_DIVERSIFICATION_SCORE, 2)
 
 
-def resilience_score(weights: Dict[str, float]) -> float:
-    bonds = sum(weight for ticker, weight in weights.items() if ticker in {"TLT", "IEF", "BND", "TIP"})
-    gold = sum(weight for ticker, weight in weights.items() if ticker in {"IAU", "GLD"})
-    commodities = sum(weight for ticker, weight in weights.items() if ticker in {"DBC", "GSG"})
-    buffer = bonds + 0.5 * (gold + commodities)
-    normalized = clamp(buffer / 0.6, 0.0, 1.0)
-    return round(normalized * MAX_RESILIENCE_SCORE, 2)
+def metric_ratio(reference: float, value: float) -> float:
+    if value <= 0:
+        return 1.0
+    return clamp(reference / value, 0.0, 1.0)
+
 
+def resilience_score(weights: Dict[str, float], table: TickerMetricsTable = ticker_metrics) -> float:
+    """Drawdown resilience from historical metrics, or asset-mix heuristics without them.
 
-def return_efficiency_score(distribution: Dict[str, float]) -> Tuple[float, float]:
-    expected_return = 0.0
-    for asset_class, weight in distribution.items():
-        expected = EXPECTED_RETURN_BY_ASSET.get(asset_class, EXPECTED_RETURN_BY_ASSET["Other"])
-        expected_return += weight * expected
+    With metrics for every holding and every model ticker, half the score
+    comes from max drawdown and half from volatility, each as the ratio of the
+    model average to the portfolio's weighted value (full marks at or below the
+    models).
+    """
+    bonds = sum(weight for ticker, weight in weights.items() if ticker in BOND_TICKERS)
+    gold = sum(weight for ticker, weight in weights.items() if ticker in GOLD_TICKERS)
+    commodities = sum(weight for ticker, weight in weights.items() if ticker in COMMODITY_TICKERS)
+    return resilience_from(table.profile(weights), table.model_reference(), bonds + 0.5 * (gold + commodities))
+
+
+def resilience_from(profile: np.ndarray | None, reference: np.ndarray | None, buffer: float) -> float:
+    """:func:`resilience_score` from a metric profile and the bond/gold/commodity buffer weight."""
+    if profile is not None and reference is not None:
+        drawdown = metric_ratio(-reference[1], -profile[1])
+        volatility = metric_ratio(reference[2], profile[2])
+        return round_score((0.5 * drawdown + 0.5 * volatility) * MAX_RESILIENCE_SCORE, 2)
+    normalized = clamp(buffer / 0.6, 0.0, 1.0)
+    return round_score(normalized * MAX_RESILIENCE_SCORE, 2)
+
+
+def return_efficiency_score(
+    distribution: Dict[str, float],
+    weights: Dict[str, float] | None = None,
+    table: TickerMetricsTable = ticker_metrics,
+) -> Tuple[float, float]:
+    """Score the weighted trailing 5-year CAGR, or asset-class return assumptions without it."""
+    profile = table.profile(weights) if weights is not None else None
+    return return_efficiency_from(distribution, profile)
+
+
+def return_efficiency_from(distribution: Dict[str, float], profile: np.ndarray | None) -> Tuple[float, float]:
+    if profile is not None:
+        expected_return = float(profile[0])
+    else:
+        expected_return = 0.0
+        for asset_class, weight in distribution.items():
+            expected = EXPECTED_RETURN_BY_ASSET.get(asset_class, EXPECTED_RETURN_BY_ASSET["Other"])
+            expected_return += weight * expected
     normalized = clamp((expected_return - 0.02) / 0.06, 0.0, 1.0)
-    score = round(normalized * MAX_RETURN_EFFICIENCY_SCORE, 2)
-    return score, round(expected_return, 4)
+    score = round_score(normalized * MAX_RETURN_EFFICIENCY_SCORE, 2)
+    return score, round_score(expected_return, 4)
 
 
 def risk_balance_score(distribution: Dict[str, float]) -> float:
@@ -56,18 +98,38 @@ def risk_balance_score(distribution: Dict[str, float]) -> float:
     diversifiers = distribution.get("Gold", 0.0) + distribution.get("Commodities", 0.0) + distribution.get("Real Estate", 0.0)
     balance_gap = abs(equities - 0.45) + abs(defensive - 0.35) + abs(diversifiers - 0.20)
     normalized = clamp(1.0 - balance_gap, 0.0, 1.0)
-    return round(normalized * MAX_RISK_BALANCE_SCORE, 2)
+    return round_score(normalized * MAX_RISK_BALANCE_SCORE, 2)
 
 
-def pulse_score(weights: Dict[str, float]) -> Tuple[float, Dict[str, float], float, List[str]]:
-    distribution = build_asset_class_distribution(weights)
+@timed("pulse_score")
+def pulse_score(
+    weights: Dict[str, float],
+    distribution: Dict[str, float] | None = None,
+) -> Tuple[float, Dict[str, float], float, List[str]]:
+    if distribution is None:
+        distribution = build_asset_class_distribution(weights)
+    largest = max(weights.items(), key=lambda item: item[1]) if weights else (None, 0)
+    return assemble_score(
+        distribution,
+        resilience_score(weights),
+        return_efficiency_score(distribution, weights),
+        largest,
+    )
+
+
+def assemble_score(
+    distribution: Dict[str, float],
+    resilience: float,
+    return_efficiency: Tuple[float, float],
+    largest: Tuple[str | None, float],
+) -> Tuple[float, Dict[str, float], float, List[str], str, Dict[str, float]]:
+    """Combine the components into :func:`pulse_score`'s result tuple."""
     diversification = diversification_score(distribution)
-    resilience = resilience_score(weights)
-    return_efficiency, expected_return = return_efficiency_score(distribution)
+    return_efficiency, expected_return = return_efficiency
     risk_balance = risk_balance_score(distribution)
-    total = round(diversification + resilience + return_efficiency + risk_balance, 2)
+    total = round_score(diversification + resilience + return_efficiency + risk_balance, 2)
     grade = "🟢" if total >= 80 else ("🟡" if total >= 60 else "🔴")
-    suggestions = generate_suggestions(weights, distribution)
+    suggestions = suggestions_for(largest, distribution)
     breakdown = {
         "diversification": diversification,
         "resilience": resilience,
@@ -77,14 +139,17 @@ def pulse_score(weights: Dict[str, float]) -> Tuple[float, Dict[str, float], flo
     return total, breakdown, expected_return, suggestions, grade, distribution
 
 
-def generate_suggestions(weights: Dict[str, float], distribution: Dict[str, float]) -> List[str]:
+def suggestions_for(largest: Tuple[str | None, float], distribution: Dict[str, float]) -> List[str]:
+    # Thresholds compare noise-free sums, so weights summed in another order
+    # (incremental scoring) trigger the same ideas.
     ideas: List[str] = []
-    largest = max(weights.items(), key=lambda item: item[1]) if weights else (None, 0)
-    if largest[0] and largest[1] > 0.35:
+    if largest[0] and round_score(largest[1], NOISE_DECIMALS) > 0.35:
         ideas.append(f"Reduce concentration in {largest[0]} to below 30%.")
-    if distribution.get("Long Bonds", 0.0) + distribution.get("Intermediate Bonds", 0.0) < 0.25:
+    bonds = distribution.get("Long Bonds", 0.0) + distribution.get("Intermediate Bonds", 0.0)
+    if round_score(bonds, NOISE_DECIMALS) < 0.25:
         ideas.append("Add more bonds to improve drawdown resilience.")
-    if distribution.get("Gold", 0.0) + distribution.get("Commodities", 0.0) < 0.1:
+    hedges = distribution.get("Gold", 0.0) + distribution.get("Commodities", 0.0)
+    if round_score(hedges, NOISE_DECIMALS) < 0.1:
         ideas.append("Introduce gold or commodities as an inflation hedge.")
     if not ideas:
         ideas.append("Portfolio is balanced relative to the model set. Maintain current allocations.")
@@ -93,9 +158,9 @@ def generate_suggestions(weights: Dict[str, float], distribution: Dict[str, floa
 
 def model_tracking_error(user_weights: Dict[str, float]) -> Dict[str, float]:
     tracking: Dict[str, float] = {}
-    for model_key, model_weights in MODEL_PORTFOLIOS.items():
+    for model_key, model_weights in model_registry.portfolios().items():
         diff = 0.0
         for ticker in set(user_weights) | set(model_weights):
             diff += abs(user_weights.get(ticker, 0.0) - model_weights.get(ticker, 0.0))
-        tracking[model_key] = round(diff / 2, 4)
+        tracking[model_key] = round_score(diff / 2, 4)
     return tracking
@@ -1,10 +1,21 @@
 """FastAPI entrypoint for Portfolio Pulse."""
 from __future__ import annotations
 
+import threading
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from .api.portfolio import router as portfolio_router
+from .services.data_loader import save_price_cache_snapshot, warm_price_cache
+from .services.model_metrics import model_metrics
+from .services.price_refresh import price_refresher
+from .services.simulation import shutdown_pool
+from .services.yahoo_client import yahoo_client
+from .utils import metrics
+from .utils.admission import AdmissionMiddleware
+from .utils.auth import get_supabase_client
 
 app = FastAPI(
     title="Portfolio Pulse API",
@@ -15,6 +26,24 @@ app = FastAPI(
     ),
 )
 
+# Request path -> admission class; paths not listed (health, metrics, docs)
+# are never queued or shed. Added first so refusals still get CORS headers.
+ADMISSION_ROUTES = {
+    "/portfolio/upload": "interactive",
+    "/portfolio/upload-csv": "interactive",
+    "/portfolio/holdings": "interactive",
+    "/portfolio/score": "interactive",
+    "/portfolio/score-batch": "analytics",
+    "/portfolio/model-comparison": "analytics",
+    "/portfolio/rebalance-suggestions": "analytics",
+    "/portfolio/summary": "analytics",
+    "/portfolio/backtest": "analytics",
+    "/portfolio/score-history": "analytics",
+    "/portfolio/simulation": "simulation",
+}
+
+app.add_middleware(AdmissionMiddleware, routes=ADMISSION_ROUTES)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -23,9 +52,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(metrics.MetricsMiddleware)
+
 app.include_router(portfolio_router)
 
 
+@app.on_event("startup")
+def start_background_services() -> None:
+    # Model metrics come from their snapshot synchronously; price histories are
+    # read from disk in the background so the worker can answer immediately.
+    model_metrics.start()
+    price_refresher.start()
+    threading.Thread(target=warm_price_cache, name="price-cache-warmup", daemon=True).start()
+
+
+@app.on_event("shutdown")
+def stop_background_services() -> None:
+    model_metrics.stop()
+    price_refresher.stop()
+    shutdown_pool()
+    try:
+        save_price_cache_snapshot()
+    except OSError:
+        pass
+
+
+@app.on_event("shutdown")
+async def close_upstream_clients() -> None:
+    await yahoo_client.pool.aclose()
+    client = get_supabase_client()
+    if client is not None:
+        await client.aclose()
+
+
 @app.get("/health", tags=["system"])
 def health_check():
     return {"status": "ok"}
+
+
+@app.get("/metrics", tags=["system"], response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
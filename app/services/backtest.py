@@ -0,0 +1,154 @@
+"""Vectorized calendar-rebalanced backtests over the aligned price matrix."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+
+from ..config import GLOBAL_CONFIG, GlobalConfig
+from .data_loader import PriceMatrix, forward_fill
+
+MONTHS_PER_PERIOD = {"monthly": 1, "quarterly": 3, "annual": 12}
+
+
+@dataclass(frozen=True)
+class BacktestResult:
+    """Equity curves on a shared date axis, one column per portfolio."""
+
+    keys: List[str]
+    dates: np.ndarray
+    values: np.ndarray
+
+    def curve(self, key: str) -> np.ndarray:
+        return self.values[:, self.keys.index(key)]
+
+
+def rebalance_starts(dates: np.ndarray, frequency: str) -> np.ndarray:
+    """Row indices that open a new rebalance period (always includes row 0)."""
+    period = dates.astype("datetime64[M]").astype("int64") // MONTHS_PER_PERIOD[frequency]
+    changes = np.flatnonzero(period[1:] != period[:-1]) + 1
+    return np.concatenate(([0], changes))
+
+
+def run_backtests(
+    portfolios: Dict[str, Dict[str, float]],
+    matrix: PriceMatrix,
+    config: GlobalConfig = GLOBAL_CONFIG,
+) -> BacktestResult:
+    """Simulate each weight dict with calendar rebalancing, fees and trade costs.
+
+    Holdings without price data are dropped and the remaining weights
+    renormalized; portfolios with no priced holdings are left out. All
+    portfolios start on the first date every used ticker has a price, so the
+    curves are directly comparable. The curves have a point on each date
+    some used ticker traded, holdings without a bar that day keeping their
+    last price. Within a rebalance period
+    each curve compounds as ``V_start * (P_t / P_start) @ w``; the period
+    multipliers are chained with a cumulative product, so there is no per-day
+    Python loop.
+    """
+    index = matrix.index
+    columns: Dict[str, np.ndarray] = {}
+    for key, holdings in portfolios.items():
+        column = np.zeros(len(matrix.tickers))
+        for ticker, weight in holdings.items():
+            row = index.get(ticker.upper())
+            if row is not None:
+                column[row] += weight
+        if column.sum() > 0:
+            columns[key] = column / column.sum()
+    keys = list(columns)
+    if not keys:
+        return BacktestResult(keys, matrix.dates[:0], np.empty((0, 0)))
+    weights = np.column_stack([columns[key] for key in keys])
+    used = weights.any(axis=1)
+    prices, dates = _traded_prices(matrix, used)
+    weights = weights[used]
+    complete = ~np.isnan(prices).any(axis=1)
+    if not complete.any():
+        return BacktestResult(keys, matrix.dates[:0], np.empty((0, len(keys))))
+    first = int(complete.argmax())
+    prices, dates = prices[first:], dates[first:]
+
+    starts = rebalance_starts(dates, config.rebalance_frequency)
+    opens = np.zeros(len(dates), dtype=bool)
+    opens[starts] = True
+    segment = np.cumsum(opens) - 1
+    # Growth of each portfolio since the start of its current period.
+    growth = (prices / prices[starts][segment]) @ weights
+    # Value carried into each period: the previous period's growth up to the
+    # rebalance day, less the per-rebalance trade cost.
+    period_multiplier = (prices[starts[1:]] / prices[starts[:-1]]) @ weights
+    period_multiplier *= 1 - config.trade_cost_bp_per_rebalance / 10_000
+    period_start_value = np.vstack([np.ones((1, len(keys))), np.cumprod(period_multiplier, axis=0)])
+    values = config.starting_value * period_start_value[segment] * growth
+    elapsed_years = (dates - dates[0]).astype("int64") / 365
+    values *= ((1 - config.expense_ratio_bps / 10_000) ** elapsed_years)[:, None]
+    return BacktestResult(keys, dates, values)
+
+
+def drifted_weights(
+    holdings: Dict[str, float],
+    matrix: PriceMatrix,
+    frequency: str = GLOBAL_CONFIG.rebalance_frequency,
+) -> tuple[np.ndarray, List[str], np.ndarray]:
+    """Buy-and-hold weights of ``holdings`` on the first trading day of every period.
+
+    The holdings are bought at their weights on the first date every priced
+    holding has a price and then left to drift with prices; tickers without
+    price data keep a constant value. Returns ``(dates, tickers, weights)``
+    with one weights row per period start, summing to 1.
+    """
+    tickers = list(holdings)
+    amounts = np.array([holdings[ticker] for ticker in tickers], dtype="f8")
+    index = matrix.index
+    columns = [index.get(ticker.upper()) for ticker in tickers]
+    priced = [i for i, column in enumerate(columns) if column is not None]
+    if not priced or not len(matrix.dates):
+        return matrix.dates[:0], tickers, np.empty((0, len(tickers)))
+    prices, dates = _traded_prices(matrix, [columns[i] for i in priced])
+    complete = ~np.isnan(prices).any(axis=1)
+    if not complete.any():
+        return matrix.dates[:0], tickers, np.empty((0, len(tickers)))
+    first = int(complete.argmax())
+    dates, prices = dates[first:], prices[first:]
+    rows = rebalance_starts(dates, frequency)
+    values = np.tile(amounts, (len(rows), 1))
+    values[:, priced] *= prices[rows] / prices[0]
+    return dates[rows], tickers, values / values.sum(axis=1, keepdims=True)
+
+
+def _traded_prices(matrix: PriceMatrix, columns) -> tuple[np.ndarray, np.ndarray]:
+    """Forward-filled prices of ``columns`` on the dates at least one of them traded.
+
+    Dates only other tickers in the matrix traded are dropped, so they do not
+    add flat days to these curves.
+    """
+    prices = matrix.prices[:, columns]
+    traded = ~np.isnan(prices).all(axis=1)
+    return forward_fill(prices)[traded], matrix.dates[traded]
+
+
+def downsample(result: BacktestResult, points: int) -> BacktestResult:
+    """Keep ``points`` evenly spaced rows, always including the last one."""
+    if len(result.dates) <= points:
+        return result
+    rows = np.unique(np.linspace(0, len(result.dates) - 1, points).round().astype(int))
+    return BacktestResult(result.keys, result.dates[rows], result.values[rows])
+
+
+def curve_cagr(dates: np.ndarray, values: np.ndarray) -> float:
+    if len(values) < 2 or not np.isfinite(values[[0, -1]]).all():
+        return 0.0
+    years = (dates[-1] - dates[0]).astype("int64") / 365
+    if years <= 0:
+        return 0.0
+    return float((values[-1] / values[0]) ** (1 / years) - 1)
+
+
+def max_drawdown(values: np.ndarray) -> float:
+    if len(values) == 0 or not np.isfinite(values).all():
+        return 0.0
+    peaks = np.maximum.accumulate(values)
+    return float((values / peaks - 1).min())
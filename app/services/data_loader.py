@@ -1,54 +1,449 @@
-"""Market data helpers using yfinance as the backend."""
+"""Market data helpers.
+
+Requests load prices through the async chart client (:func:`prefetch_histories`);
+background jobs and direct callers use the blocking yfinance downloads.
+"""
 from __future__ import annotations
 
+import asyncio
 import datetime as dt
-from functools import lru_cache
-from typing import Dict, List
+import hashlib
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterable, List, Tuple
+from zoneinfo import ZoneInfo
 
-import pandas as pd
-import yfinance as yf
+import anyio
+import numpy as np
 
 from ..config import GLOBAL_CONFIG
+from ..utils.admission import is_degraded
+from ..utils.cache import LRUCache, SingleFlightCache
+from ..utils.metrics import Gauge, price_cache_events, registry, timed, track_upstream
+from .price_store import PriceStore
+from .shared_matrix import SharedMatrixStore
+from .ticker_metrics import ticker_metrics
+from .yahoo_client import yahoo_client
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+# pandas and yfinance are imported on first use so that importing the app (and
+# serving routes that never touch price data) stays fast.
+
+
+@track_upstream("yfinance")
+def download_adj_close(ticker: str, start: dt.date, end: dt.date) -> pd.Series:
+    """Download adjusted closes from yfinance for ``[start, end)``."""
+    import pandas as pd
+    import yfinance as yf
 
-@lru_cache(maxsize=32)
-def fetch_price_history(ticker: str, lookback_years: int | None = None) -> pd.Series:
-    """Fetch adjusted close price history for the requested ticker."""
-    years = lookback_years or GLOBAL_CONFIG.lookback_years
-    end = dt.datetime.utcnow()
-    start = end - dt.timedelta(days=365 * years)
     data = yf.download(ticker, start=start, end=end, interval=GLOBAL_CONFIG.data_interval, progress=False)
     if data.empty:
-        raise ValueError(f"No price history for {ticker}.")
-    return data["Adj Close"].dropna()
+        return pd.Series(dtype="float64")
+    closes = data["Adj Close"]
+    if isinstance(closes, pd.DataFrame):
+        closes = closes.iloc[:, 0]
+    return closes.dropna()
+
+
+@track_upstream("yfinance")
+def download_adj_closes(tickers: List[str], start: dt.date, end: dt.date) -> Dict[str, pd.Series]:
+    """Download adjusted closes for several tickers with one bulk yfinance call."""
+    import pandas as pd
+    import yfinance as yf
+
+    data = yf.download(
+        tickers,
+        start=start,
+        end=end,
+        interval=GLOBAL_CONFIG.data_interval,
+        progress=False,
+        threads=True,
+    )
+    if data.empty:
+        return {}
+    closes = data["Adj Close"]
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(tickers[0])
+    results: Dict[str, pd.Series] = {}
+    for ticker in tickers:
+        if ticker in closes.columns:
+            series = closes[ticker].dropna()
+            if not series.empty:
+                results[ticker] = series
+    return results
+
+
+PRICE_STORE_DIR = os.getenv("PRICE_STORE_DIR", ".price_store")
+SNAPSHOT_DIR = os.path.join(PRICE_STORE_DIR, "snapshots")
+PRICE_CACHE_SNAPSHOT = os.getenv("PRICE_CACHE_SNAPSHOT", os.path.join(SNAPSHOT_DIR, "price_cache.json"))
+
+price_store = PriceStore(
+    PRICE_STORE_DIR,
+    download_adj_close,
+    download_adj_closes,
+)
+
+# Aligned matrices published for every worker on this host to memory-map.
+shared_matrix = SharedMatrixStore(os.getenv("SHARED_MATRIX_DIR", os.path.join(PRICE_STORE_DIR, "shared")))
+
+PRICE_CACHE_SIZE = int(os.getenv("PRICE_CACHE_SIZE", "512"))
+# Cached histories expire this long after each US market close, once Yahoo has
+# published the day's adjusted close.
+PRICE_CLOSE_DELAY_MINUTES = int(os.getenv("PRICE_CLOSE_DELAY_MINUTES", "30"))
+# Expired histories are served as-is for this long while they are refreshed in
+# the background; beyond it a request reloads synchronously.
+PRICE_MAX_STALE_SECONDS = float(os.getenv("PRICE_MAX_STALE_SECONDS", str(3 * 24 * 3600)))
+# A ticker whose load came back without data (delisted, mistyped or a failed
+# download) is not requested again for this long.
+PRICE_MISS_TTL_SECONDS = float(os.getenv("PRICE_MISS_TTL_SECONDS", "300"))
+MARKET_TIMEZONE = ZoneInfo("America/New_York")
+MARKET_CLOSE = dt.time(16, 0)
+_price_version = 0
+_price_version_lock = threading.Lock()
+# Digest of the series last inserted per cache key, so re-inserting the same
+# closes (a refresh before Yahoo publishes the new bar) keeps the version.
+_price_digests: Dict[Tuple[str, int], bytes] = {}
+# Async downloads in progress, shared by requests missing the same key. Only
+# touched from the event loop.
+_async_flights: Dict[Tuple[str, int], "asyncio.Future[None]"] = {}
+# (ticker, lookback) -> when a load of it last came back without data.
+_misses: LRUCache[float] = LRUCache(maxsize=int(os.getenv("PRICE_MISS_CACHE_SIZE", "4096")))
+# Tickers a request has prefetched, once it has; see prefetch_histories.
+_prefetched: ContextVar[FrozenSet[str] | None] = ContextVar("pulse_prefetched_tickers", default=None)
+
+
+def _history_window(years: int) -> Tuple[dt.date, dt.date]:
+    # Ends after the last completed session: today's bar is intraday until
+    # the close and must not be stored (or marked checked) as final.
+    end = last_market_close(dt.datetime.now(dt.timezone.utc)).date() + dt.timedelta(days=1)
+    return end - dt.timedelta(days=365 * years + 1), end
+
+
+def next_market_close(after: dt.datetime) -> dt.datetime:
+    """First weekday US market close (plus the publish delay) strictly after ``after``.
+
+    Exchange holidays are not modelled; on those days a refresh simply finds
+    no new bars.
+    """
+    local = after.astimezone(MARKET_TIMEZONE)
+    day = local.date()
+    while True:
+        close = dt.datetime.combine(day, MARKET_CLOSE, MARKET_TIMEZONE) + dt.timedelta(
+            minutes=PRICE_CLOSE_DELAY_MINUTES
+        )
+        if day.weekday() < 5 and close > local:
+            return close
+        day += dt.timedelta(days=1)
+
 
+def last_market_close(before: dt.datetime) -> dt.datetime:
+    """Latest weekday US market close (plus the publish delay) at or before ``before``."""
+    local = before.astimezone(MARKET_TIMEZONE)
+    day = local.date()
+    while True:
+        close = dt.datetime.combine(day, MARKET_CLOSE, MARKET_TIMEZONE) + dt.timedelta(
+            minutes=PRICE_CLOSE_DELAY_MINUTES
+        )
+        if day.weekday() < 5 and close <= local:
+            return close
+        day -= dt.timedelta(days=1)
 
-def annualized_return(series: pd.Series) -> float:
-    start_price, end_price = series.iloc[0], series.iloc[-1]
-    years = (series.index[-1] - series.index[0]).days / 365
-    if years <= 0:
-        return 0.0
-    return (end_price / start_price) ** (1 / years) - 1
 
+def _history_expiry(key: Tuple[str, int], series: pd.Series) -> float:
+    return next_market_close(dt.datetime.now(dt.timezone.utc)).timestamp()
 
-def annualized_volatility(series: pd.Series) -> float:
-    returns = series.pct_change().dropna()
-    return returns.std() * (252 ** 0.5)
 
+def _series_digest(series: pd.Series) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(series.index.values).tobytes())
+    digest.update(np.ascontiguousarray(series.to_numpy(dtype="f8")).tobytes())
+    return digest.digest()
 
-def expected_performance(weights: Dict[str, float]) -> Dict[str, float]:
-    """Compute expected return and volatility using historical data where possible."""
-    rets: List[float] = []
-    vols: List[float] = []
-    for ticker, weight in weights.items():
+
+def _on_cache_insert(key: Tuple[str, int], series: pd.Series) -> None:
+    global _price_version
+    digest = _series_digest(series)
+    with _price_version_lock:
+        if _price_digests.get(key) == digest:
+            return
+        _price_digests[key] = digest
+        _price_version += 1
+    if key[1] == GLOBAL_CONFIG.lookback_years:
+        ticker_metrics.update(key[0], series.index.values, series.values)
+
+
+def _recently_missed(key: Tuple[str, int]) -> bool:
+    missed_at = _misses.get(key)
+    return missed_at is not None and time.time() - missed_at < PRICE_MISS_TTL_SECONDS
+
+
+def recently_missed_tickers(tickers: Iterable[str], lookback_years: int | None = None) -> FrozenSet[str]:
+    """Tickers whose last load came back without data within ``PRICE_MISS_TTL_SECONDS``."""
+    years = lookback_years or GLOBAL_CONFIG.lookback_years
+    return frozenset(ticker for ticker in tickers if _recently_missed((ticker.upper(), years)))
+
+
+def _record_misses(keys: Iterable[Tuple[str, int]], loaded: Iterable[Tuple[str, int]]) -> None:
+    loaded = set(loaded)
+    now = time.time()
+    for key in keys:
+        if key in loaded:
+            _misses.pop(key)
+        else:
+            _misses.put(key, now)
+
+
+def _load_histories(keys: List[Tuple[str, int]]) -> Dict[Tuple[str, int], pd.Series]:
+    # Every key in one call shares the same lookback.
+    start, end = _history_window(keys[0][1])
+    fetched = price_store.get_histories([ticker for ticker, _ in keys], start, end)
+    return {(ticker, keys[0][1]): series for ticker, series in fetched.items()}
+
+
+# Concurrent misses on a ticker share one download instead of each worker
+# thread fetching it (and tripping Yahoo's rate limits) after a restart.
+# Entries expire at the next market close and are refreshed by
+# app.services.price_refresh while requests keep reading the old series.
+price_cache: SingleFlightCache[pd.Series] = SingleFlightCache(
+    PRICE_CACHE_SIZE,
+    on_insert=_on_cache_insert,
+    events=price_cache_events,
+    expires=_history_expiry,
+    max_stale=PRICE_MAX_STALE_SECONDS,
+)
+registry.register(Gauge("pulse_price_cache_entries", "Histories held in the price cache.", price_cache.__len__))
+
+
+@timed("fetch_price_histories")
+def fetch_price_histories(
+    tickers: Iterable[str],
+    lookback_years: int | None = None,
+    cached_only: bool = False,
+) -> Dict[str, pd.Series]:
+    """Fetch price histories for several tickers, downloading all misses in one batch.
+
+    Tickers without data are left out of the result, and are not requested
+    again for ``PRICE_MISS_TTL_SECONDS``. With ``cached_only`` (implied after
+    :func:`prefetch_histories` and in degraded mode) nothing is loaded: only
+    histories already in the cache, however stale, are returned.
+    """
+    years = lookback_years or GLOBAL_CONFIG.lookback_years
+    keys = [(ticker, years) for ticker in dict.fromkeys(t.upper() for t in tickers)]
+    if cached_only or cache_only():
+        found = price_cache.get_many(keys)
+    else:
+        missing = price_cache.missing(keys)
+        skipped = {key for key in missing if _recently_missed(key)}
+        found = price_cache.get_many_or_load([key for key in keys if key not in skipped], _load_histories)
+        _record_misses([key for key in missing if key not in skipped], found)
+        # Recent misses are not retried; serve whatever is still cached for them.
+        found.update({key: series for key in skipped if (series := price_cache.get(key)) is not None})
+    return {ticker: found[(ticker, years)] for ticker, _ in keys if (ticker, years) in found}
+
+
+def touch_histories(tickers: Iterable[str], lookback_years: int | None = None) -> None:
+    """Keep the cached histories of ``tickers`` from being dropped as idle.
+
+    For callers served from data derived from the cache (ticker metrics, the
+    risk model, the shared matrix) rather than from the cache itself.
+    """
+    years = lookback_years or GLOBAL_CONFIG.lookback_years
+    price_cache.touch((ticker.upper(), years) for ticker in tickers)
+
+
+def cache_only() -> bool:
+    """Whether price lookups in this context must not download."""
+    return _prefetched.get() is not None or is_degraded()
+
+
+def prefetched_tickers() -> FrozenSet[str]:
+    """Tickers this request already tried to load, whether or not data came back."""
+    return _prefetched.get() or frozenset()
+
+
+async def prefetch_histories(tickers: Iterable[str], lookback_years: int | None = None) -> None:
+    """Load missing histories into the price cache without blocking a thread.
+
+    Downloads go through the async :data:`yahoo_client`; only the price store's
+    file reads/writes and the cache insert (which updates ticker metrics) are
+    offloaded. Concurrent requests missing the same ticker share one download.
+    Afterwards price lookups in the calling request, including work it hands
+    to the thread pool, only read the cache: tickers that failed to load take
+    the same fallbacks as tickers without data. Tickers that failed within
+    the last ``PRICE_MISS_TTL_SECONDS`` are not requested again.
+    """
+    if is_degraded():
+        return
+    years = lookback_years or GLOBAL_CONFIG.lookback_years
+    wanted = frozenset(t.upper() for t in tickers)
+    keys = [key for key in price_cache.missing((t, years) for t in sorted(wanted)) if not _recently_missed(key)]
+    waiting = [_async_flights[key] for key in keys if key in _async_flights]
+    owned = [key for key in keys if key not in _async_flights]
+    # Counted like SingleFlightCache.get_many_or_load counts its own loads.
+    price_cache.record("miss", len(owned))
+    price_cache.record("coalesced", len(waiting))
+    if owned:
+        flight = asyncio.get_running_loop().create_future()
+        for key in owned:
+            _async_flights[key] = flight
         try:
-            history = fetch_price_history(ticker)
-            rets.append(weight * annualized_return(history))
-            vols.append((weight ** 2) * (annualized_volatility(history) ** 2))
+            start, end = _history_window(years)
+            fetched = await price_store.aget_histories(
+                [ticker for ticker, _ in owned], start, end, yahoo_client.download_many
+            )
+            await anyio.to_thread.run_sync(_cache_histories, fetched, years)
         except Exception:
-            # If data fetch fails, fall back to conservative defaults.
-            rets.append(weight * 0.04)
-            vols.append((weight ** 2) * (0.10 ** 2))
-    expected_return = sum(rets)
-    expected_vol = (sum(vols)) ** 0.5
-    return {"expected_return": expected_return, "volatility": expected_vol}
+            # Counted as upstream errors; the request falls back like any miss.
+            fetched = {}
+        finally:
+            for key in owned:
+                _async_flights.pop(key, None)
+            flight.set_result(None)
+        price_cache.record("load_error", sum(ticker not in fetched for ticker, _ in owned))
+        _record_misses(owned, ((ticker, years) for ticker in fetched))
+    if waiting:
+        await asyncio.wait(set(waiting))
+    _prefetched.set(prefetched_tickers() | wanted)
+
+
+def _cache_histories(fetched: Dict[str, pd.Series], years: int) -> None:
+    for ticker, series in fetched.items():
+        price_cache.put((ticker, years), series)
+
+
+def refresh_expired_histories() -> int:
+    """Reload every expired cached history, one bulk download per lookback.
+
+    Returns the number of histories refreshed.
+    """
+    by_years: Dict[int, List[Tuple[str, int]]] = {}
+    for key in price_cache.expired_keys():
+        by_years.setdefault(key[1], []).append(key)
+    return sum(price_cache.refresh_many(keys, _load_histories) for keys in by_years.values())
+
+
+def save_price_cache_snapshot(path: str = PRICE_CACHE_SNAPSHOT) -> None:
+    """Record which histories are cached so the next process can preload them."""
+    keys = [list(key) for key in price_cache.keys()]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump({"keys": keys}, fh)
+    os.replace(tmp, path)
+
+
+def warm_price_cache(path: str = PRICE_CACHE_SNAPSHOT) -> int:
+    """Preload the histories listed in the snapshot from the on-disk store.
+
+    Only tickers whose stored data is already current are loaded, so warming
+    never touches the network. Returns the number of histories loaded.
+    """
+    try:
+        with open(path) as fh:
+            keys = json.load(fh)["keys"]
+    except (OSError, ValueError, KeyError):
+        return 0
+    loaded = 0
+    for ticker, years in keys[-PRICE_CACHE_SIZE:]:
+        if price_cache.get((ticker, years)) is not None:
+            continue
+        start, end = _history_window(years)
+        series = price_store.load_current(ticker, start, end)
+        if series is not None:
+            price_cache.put((ticker, years), series)
+            loaded += 1
+    return loaded
+
+
+def price_data_digest(tickers: Iterable[str], lookback_years: int | None = None) -> str:
+    """Digest of the cached histories of ``tickers``, tickers not cached included.
+
+    Derived from the closes themselves, so it is the same in every worker
+    holding the same data and only changes when one of those series does.
+    """
+    years = lookback_years or GLOBAL_CONFIG.lookback_years
+    digest = hashlib.blake2b(digest_size=16)
+    with _price_version_lock:
+        for ticker in sorted({t.upper() for t in tickers}):
+            digest.update(ticker.encode() + b"\0")
+            digest.update(_price_digests.get((ticker, years), b""))
+    return digest.hexdigest()
+
+
+def price_digests(tickers: Iterable[str], lookback_years: int | None = None) -> Dict[str, str]:
+    """Digest of each cached history among ``tickers``, as stamped on a :class:`PriceMatrix`."""
+    years = lookback_years or GLOBAL_CONFIG.lookback_years
+    cached = set(price_cache.keys())
+    with _price_version_lock:
+        return {
+            ticker: _price_digests[key].hex()
+            for ticker in tickers
+            if (key := (ticker, years)) in cached and key in _price_digests
+        }
+
+
+def price_data_version() -> int:
+    """Counter that changes whenever changed price data enters the cache.
+
+    Includes the shared matrix generation, so results derived from a matrix
+    another worker published are recomputed too. Both parts only increase.
+    """
+    return _price_version + shared_matrix.generation()
+
+
+@dataclass(frozen=True)
+class PriceMatrix:
+    """Adjusted closes aligned on a shared date axis.
+
+    ``prices`` has one row per date any ticker traded and one column per
+    ticker. Values are ``NaN`` on dates a ticker has no bar, so each column
+    keeps its own trading calendar; use :func:`forward_fill` where holdings
+    must be valued on every date. ``digests`` maps each ticker to the digest
+    of the cached history its column was built from (see
+    :func:`price_digests`), when known.
+    """
+
+    dates: np.ndarray
+    tickers: Tuple[str, ...]
+    prices: np.ndarray
+    digests: Dict[str, str] = field(default_factory=dict, compare=False)
+
+    @property
+    def index(self) -> Dict[str, int]:
+        return {ticker: i for i, ticker in enumerate(self.tickers)}
+
+
+def load_price_matrix(
+    tickers: Iterable[str],
+    lookback_years: int | None = None,
+    cached_only: bool = False,
+) -> PriceMatrix:
+    """Align the price histories of ``tickers`` into a :class:`PriceMatrix`.
+
+    Tickers without data are left out of the matrix.
+    """
+    histories = fetch_price_histories(tickers, lookback_years, cached_only)
+    if not histories:
+        return PriceMatrix(np.empty(0, dtype="datetime64[D]"), (), np.empty((0, 0)))
+    import pandas as pd
+
+    frame = pd.DataFrame(histories).sort_index()
+    return PriceMatrix(
+        dates=frame.index.values.astype("datetime64[D]"),
+        tickers=tuple(frame.columns),
+        prices=frame.to_numpy(dtype="f8"),
+        digests={ticker: _series_digest(series).hex() for ticker, series in histories.items()},
+    )
+
+
+def forward_fill(prices: np.ndarray) -> np.ndarray:
+    """Carry each column's last price forward over dates without a bar."""
+    rows = np.where(~np.isnan(prices), np.arange(len(prices))[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return prices[rows, np.arange(prices.shape[1])]
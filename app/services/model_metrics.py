@@ -0,0 +1,146 @@
+"""Precomputed expected performance for the model portfolios."""
+from __future__ import annotations
+
+import contextvars
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from ..utils.admission import is_degraded
+from .data_loader import SNAPSHOT_DIR, price_data_version, price_digests
+from .model_registry import model_registry
+from .risk import expected_performance
+
+
+def _models_fingerprint() -> str:
+    models = {key: model_registry.weights(key) for key in model_registry.keys}
+    payload = json.dumps(models, sort_keys=True).encode()
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _model_performance() -> Dict[str, Dict[str, float]]:
+    return {key: expected_performance(model_registry.weights(key)) for key in model_registry.keys}
+
+
+def _fully_priced() -> bool:
+    """Whether every model ticker has a cached history, so no model fell back to defaults."""
+    return set(price_digests(model_registry.tickers)) >= set(model_registry.tickers)
+
+
+class ModelMetricsCache:
+    """Holds ``expected_performance`` for every registered model portfolio.
+
+    Metrics are loaded from a JSON snapshot at startup when it matches the
+    registered model weights, and recomputed by a background thread whenever
+    the price data version changes. Only metrics computed with prices for
+    every model ticker are snapshotted; ones that fell back to defaults are
+    served but recomputed on the next refresh. ``digest`` identifies the metrics being
+    served (empty before the first load), so responses built from them can
+    be tagged; it is the same in every worker holding the same metrics.
+    """
+
+    def __init__(self, snapshot_path: str | os.PathLike, refresh_seconds: float) -> None:
+        self.snapshot_path = Path(snapshot_path)
+        self.refresh_seconds = refresh_seconds
+        self._metrics: Optional[Dict[str, Dict[str, float]]] = None
+        self._version: Optional[int] = None
+        self.digest = ""
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def get(self) -> Dict[str, Dict[str, float]]:
+        metrics = self._metrics
+        if metrics is None and is_degraded():
+            # Defaults from whatever prices are cached; not stored.
+            return _model_performance()
+        if metrics is None:
+            with self._lock:
+                if self._metrics is None:
+                    self._compute()
+                metrics = self._metrics
+        return metrics
+
+    def refresh(self, force: bool = False) -> bool:
+        """Recompute metrics if prices changed since the last run."""
+        with self._lock:
+            if not force and self._metrics is not None and self._version == price_data_version():
+                return False
+            self._compute()
+            return True
+
+    def _compute(self) -> None:
+        # Outside the calling request's context: after a prefetch its price
+        # lookups are cache-only, and defaults for model tickers it never
+        # loaded must not be stored (or snapshotted) as the models' metrics.
+        metrics = contextvars.Context().run(_model_performance)
+        if not _fully_priced():
+            # Some downloads failed: keep the defaults out of the snapshot and
+            # retry on the next refresh tick.
+            self._set(metrics, None)
+            return
+        self._set(metrics, price_data_version())
+        try:
+            self._write_snapshot(metrics)
+        except OSError:
+            pass
+
+    def load_snapshot(self) -> bool:
+        try:
+            payload = json.loads(self.snapshot_path.read_text())
+        except (OSError, ValueError):
+            return False
+        if payload.get("models_fingerprint") != _models_fingerprint():
+            return False
+        with self._lock:
+            # Unknown price version: the first scheduled refresh recomputes.
+            self._set(payload["metrics"], None)
+        return True
+
+    def _set(self, metrics: Dict[str, Dict[str, float]], version: Optional[int]) -> None:
+        self.digest = hashlib.sha256(json.dumps(metrics, sort_keys=True).encode()).hexdigest()
+        self._metrics = metrics
+        self._version = version
+
+    def _write_snapshot(self, metrics: Dict[str, Dict[str, float]]) -> None:
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"models_fingerprint": _models_fingerprint(), "computed_at": time.time(), "metrics": metrics}
+        fd, tmp = tempfile.mkstemp(dir=self.snapshot_path.parent, prefix=".model_metrics.")
+        with os.fdopen(fd, "w") as fh:
+            json.dump(payload, fh)
+        os.replace(tmp, self.snapshot_path)
+
+    def start(self) -> None:
+        """Load the snapshot and start the background refresh loop."""
+        self.load_snapshot()
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="model-metrics-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                # Keep serving the previous metrics; try again next tick.
+                pass
+            self._stop.wait(self.refresh_seconds)
+
+
+model_metrics = ModelMetricsCache(
+    os.getenv("MODEL_METRICS_SNAPSHOT", os.path.join(SNAPSHOT_DIR, "model_metrics.json")),
+    float(os.getenv("MODEL_METRICS_REFRESH_SECONDS", "900")),
+)
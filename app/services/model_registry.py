@@ -0,0 +1,99 @@
+"""Registry of model portfolios stored as a dense weight matrix."""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from ..config import MODEL_NAMES, MODEL_PORTFOLIOS
+from ..utils.math_ops import round_scores
+
+
+class ModelRegistry:
+    """Model portfolios as a ``(models, tickers)`` matrix with nearest-model search.
+
+    Tracking error is half the L1 distance between weight vectors. For a user
+    portfolio ``u`` with support ``S`` it is computed as
+    ``|m|₁ + |u|₁ - Σ_{i∈S} (m_i + u_i - |m_i - u_i|)``, so each query only
+    touches the columns the user actually holds, however many tickers the
+    registered models span.
+    """
+
+    def __init__(self, models: Dict[str, Dict[str, float]], names: Dict[str, str] | None = None) -> None:
+        self.keys: List[str] = list(models)
+        self.names: Dict[str, str] = {key: (names or {}).get(key, key.replace("_", " ").title()) for key in self.keys}
+        self.tickers: List[str] = sorted({ticker for weights in models.values() for ticker in weights})
+        self.columns: Dict[str, int] = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.matrix = np.zeros((len(self.keys), len(self.tickers)))
+        for row, key in enumerate(self.keys):
+            for ticker, weight in models[key].items():
+                self.matrix[row, self.columns[ticker]] = weight
+        self.row_totals = self.matrix.sum(axis=1)
+        self._models = {key: dict(models[key]) for key in self.keys}
+
+    @classmethod
+    def load(cls, directory: str | os.PathLike | None = None) -> "ModelRegistry":
+        """Build the registry from the configured models plus any JSON files in ``directory``.
+
+        Each file holds ``{"name": ..., "weights": {ticker: weight}}``; the key
+        is the ``key`` field or the file stem. Weights are normalized to 1.
+        """
+        models = dict(MODEL_PORTFOLIOS)
+        names = dict(MODEL_NAMES)
+        if directory:
+            for path in sorted(Path(directory).glob("*.json")):
+                payload = json.loads(path.read_text())
+                key = payload.get("key", path.stem)
+                weights = {ticker.upper(): float(weight) for ticker, weight in payload["weights"].items()}
+                total = sum(weights.values())
+                if total <= 0:
+                    raise ValueError(f"Model {key} in {path} has no positive weights.")
+                models[key] = {ticker: weight / total for ticker, weight in weights.items()}
+                names[key] = payload.get("name", names.get(key, key.replace("_", " ").title()))
+        return cls(models, names)
+
+    def weights(self, key: str) -> Dict[str, float]:
+        return self._models[key]
+
+    def portfolios(self) -> Dict[str, Dict[str, float]]:
+        """Every registered model's weights by key, in registry order."""
+        return dict(self._models)
+
+    def tracking_errors(self, user_weights: Dict[str, float]) -> np.ndarray:
+        """Tracking error against every model, in registry order, rounded like ``model_tracking_error``."""
+        columns: List[int] = []
+        held: List[float] = []
+        for ticker, weight in user_weights.items():
+            column = self.columns.get(ticker)
+            if column is not None:
+                columns.append(column)
+                held.append(weight)
+        user_total = sum(user_weights.values())
+        overlap = self.matrix[:, columns]
+        held_vector = np.asarray(held)
+        shared = (overlap + held_vector - np.abs(overlap - held_vector)).sum(axis=1)
+        return round_scores((self.row_totals + user_total - shared) / 2, 4)
+
+    def nearest(self, user_weights: Dict[str, float], k: int = 1) -> List[Tuple[str, float]]:
+        """Return the ``k`` closest models as ``(key, tracking_error)``, ties in registry order."""
+        return self.rank(self.tracking_errors(user_weights), k)
+
+    def rank(self, errors: np.ndarray, k: int = 1) -> List[Tuple[str, float]]:
+        """:meth:`nearest` from tracking errors already computed, in registry order."""
+        errors = np.asarray(errors, dtype="f8")
+        k = min(k, len(errors))
+        if k < len(errors):
+            # Keep every model tied with the k-th smallest so the stable sort
+            # below still breaks ties by registry order.
+            cutoff = np.partition(errors, k - 1)[k - 1]
+            candidates = np.flatnonzero(errors <= cutoff)
+        else:
+            candidates = np.arange(len(errors))
+        order = candidates[np.argsort(errors[candidates], kind="stable")][:k]
+        return [(self.keys[row], float(errors[row])) for row in order]
+
+
+model_registry = ModelRegistry.load(os.getenv("MODEL_DIR"))
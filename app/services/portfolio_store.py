@@ -0,0 +1,182 @@
+"""Portfolio storage backends keyed by user id."""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, Tuple
+
+DEFAULT_TOTAL_VALUE = 100.0
+
+# (user_id, weights, total_value)
+PortfolioRecord = Tuple[str, Dict[str, float], float]
+# (weights, total_value) -> (new weights, new total_value)
+PortfolioUpdate = Callable[[Dict[str, float], float], Tuple[Dict[str, float], float]]
+
+
+class PortfolioStore(ABC):
+    """Interface shared by the portfolio storage backends."""
+
+    @abstractmethod
+    def set_portfolios(self, records: Iterable[PortfolioRecord]) -> None:
+        """Store several portfolios in one batch."""
+
+    @abstractmethod
+    def get_portfolio(self, user_id: str) -> Dict[str, float]:
+        """Return the stored weights or raise ``KeyError``."""
+
+    @abstractmethod
+    def get_total_value(self, user_id: str) -> float:
+        """Return the stored total value, defaulting to ``DEFAULT_TOTAL_VALUE``."""
+
+    @abstractmethod
+    def get_record(self, user_id: str) -> Tuple[Dict[str, float], float]:
+        """Return weights and total value read together, or raise ``KeyError``."""
+
+    @abstractmethod
+    def update_portfolio(self, user_id: str, update: PortfolioUpdate) -> Tuple[Dict[str, float], float]:
+        """Atomically replace a stored portfolio with ``update(weights, total_value)``.
+
+        No other write to the portfolio can land between the read and the
+        write. Raises ``KeyError`` if there is no portfolio; exceptions from
+        ``update`` leave the store unchanged. Returns what was written.
+        """
+
+    def set_portfolio(self, user_id: str, weights: Dict[str, float], total_value: float) -> None:
+        self.set_portfolios([(user_id, weights, total_value)])
+
+
+class InMemoryPortfolioStore(PortfolioStore):
+    """Process-local portfolio store. State is lost on restart and not shared across workers."""
+
+    def __init__(self) -> None:
+        self._store: Dict[str, Dict[str, float]] = {}
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def set_portfolios(self, records: Iterable[PortfolioRecord]) -> None:
+        with self._lock:
+            for user_id, weights, total_value in records:
+                self._store[user_id] = weights
+                self._values[user_id] = total_value
+
+    def get_portfolio(self, user_id: str) -> Dict[str, float]:
+        if user_id not in self._store:
+            raise KeyError("Portfolio not found")
+        return self._store[user_id]
+
+    def get_total_value(self, user_id: str) -> float:
+        return self._values.get(user_id, DEFAULT_TOTAL_VALUE)
+
+    def get_record(self, user_id: str) -> Tuple[Dict[str, float], float]:
+        with self._lock:
+            return self.get_portfolio(user_id), self.get_total_value(user_id)
+
+    def update_portfolio(self, user_id: str, update: PortfolioUpdate) -> Tuple[Dict[str, float], float]:
+        with self._lock:
+            weights, total_value = update(self.get_portfolio(user_id), self.get_total_value(user_id))
+            self._store[user_id] = weights
+            self._values[user_id] = total_value
+        return weights, total_value
+
+
+class SQLitePortfolioStore(PortfolioStore):
+    """SQLite-backed store in WAL mode so several worker processes can share it.
+
+    Each thread keeps its own connection. Writers batch all records into a
+    single transaction and readers look portfolios up by primary key.
+    Read-modify-write updates run inside one ``BEGIN IMMEDIATE`` transaction,
+    which holds the database write lock, so concurrent workers cannot lose
+    each other's edits.
+    """
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.path = str(path)
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS portfolios (
+                    user_id TEXT PRIMARY KEY,
+                    weights TEXT NOT NULL,
+                    total_value REAL NOT NULL
+                )
+                """
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def set_portfolios(self, records: Iterable[PortfolioRecord]) -> None:
+        rows = [(user_id, json.dumps(weights), total_value) for user_id, weights, total_value in records]
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                """
+                INSERT INTO portfolios (user_id, weights, total_value) VALUES (?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET weights = excluded.weights, total_value = excluded.total_value
+                """,
+                rows,
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _row(self, user_id: str) -> tuple | None:
+        return self._connection().execute(
+            "SELECT weights, total_value FROM portfolios WHERE user_id = ?", (user_id,)
+        ).fetchone()
+
+    def get_portfolio(self, user_id: str) -> Dict[str, float]:
+        row = self._row(user_id)
+        if row is None:
+            raise KeyError("Portfolio not found")
+        return json.loads(row[0])
+
+    def get_total_value(self, user_id: str) -> float:
+        row = self._row(user_id)
+        return row[1] if row is not None else DEFAULT_TOTAL_VALUE
+
+    def get_record(self, user_id: str) -> Tuple[Dict[str, float], float]:
+        row = self._row(user_id)
+        if row is None:
+            raise KeyError("Portfolio not found")
+        return json.loads(row[0]), row[1]
+
+    def update_portfolio(self, user_id: str, update: PortfolioUpdate) -> Tuple[Dict[str, float], float]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._row(user_id)
+            if row is None:
+                raise KeyError("Portfolio not found")
+            weights, total_value = update(json.loads(row[0]), row[1])
+            conn.execute(
+                "UPDATE portfolios SET weights = ?, total_value = ? WHERE user_id = ?",
+                (json.dumps(weights), total_value, user_id),
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return weights, total_value
+
+
+def build_portfolio_store() -> PortfolioStore:
+    """Pick the backend from ``PORTFOLIO_STORE`` (``memory`` or ``sqlite``)."""
+    backend = os.getenv("PORTFOLIO_STORE", "memory").lower()
+    if backend == "sqlite":
+        return SQLitePortfolioStore(os.getenv("PORTFOLIO_DB_PATH", "portfolios.db"))
+    if backend == "memory":
+        return InMemoryPortfolioStore()
+    raise ValueError(f"Unknown PORTFOLIO_STORE backend: {backend}")
@@ -0,0 +1,54 @@
+"""Background refresh of expired price histories."""
+from __future__ import annotations
+
+import os
+import threading
+from typing import Optional
+
+from .data_loader import price_cache, refresh_expired_histories
+
+
+class PriceRefresher:
+    """Periodically drops idle histories and bulk-refreshes expired ones.
+
+    Requests keep reading the previous series while a refresh runs, so
+    latency stays flat across market closes; nothing is downloaded for
+    tickers no one has requested within ``idle_seconds``.
+    """
+
+    def __init__(self, interval_seconds: float, idle_seconds: float) -> None:
+        self.interval_seconds = interval_seconds
+        self.idle_seconds = idle_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> int:
+        price_cache.drop_idle(self.idle_seconds)
+        return refresh_expired_histories()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="price-cache-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.run_once()
+            except Exception:
+                # Stale histories keep being served; try again next tick.
+                pass
+
+
+price_refresher = PriceRefresher(
+    float(os.getenv("PRICE_REFRESH_INTERVAL_SECONDS", "60")),
+    float(os.getenv("PRICE_IDLE_SECONDS", str(24 * 3600))),
+)
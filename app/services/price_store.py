@@ -0,0 +1,296 @@
+"""On-disk adjusted close store with incremental daily appends."""
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Iterable, List, Optional
+from urllib.parse import quote
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+PRICE_DTYPE = np.dtype([("date", "datetime64[D]"), ("close", "f8")])
+
+# (ticker, start, end) -> adjusted closes indexed by date, ``end`` exclusive.
+Downloader = Callable[[str, dt.date, dt.date], "pd.Series"]
+# (tickers, start, end) -> adjusted closes per ticker, ``end`` exclusive.
+BatchDownloader = Callable[[List[str], dt.date, dt.date], Dict[str, "pd.Series"]]
+AsyncBatchDownloader = Callable[[List[str], dt.date, dt.date], Awaitable[Dict[str, "pd.Series"]]]
+
+# Stored bars downloaded again with every update. Yahoo back-adjusts every
+# older close after a dividend or split; comparing these bars shows by how much.
+OVERLAP_BARS = 5
+# Relative spread of overlap ratios still treated as a single rescale
+# (adjusted closes are published rounded).
+REBASE_TOLERANCE = 1e-4
+
+
+class PriceStore:
+    """Per-ticker columnar price files.
+
+    Each ticker is stored as a ``.npy`` structured array of ``(date, close)``
+    rows that can be memory-mapped, plus a small JSON sidecar recording the
+    first requested date and the last completed session the upstream was
+    checked for. Later reads download only the last ``OVERLAP_BARS`` stored
+    bars and anything after them. When the overlap shows Yahoo re-based its
+    adjusted closes, the stored history is rescaled to match, or downloaded
+    again when one factor does not explain the difference.
+
+    ``end`` is exclusive everywhere and must be the day after the last
+    completed session: later bars may still be intraday prices, so they are
+    neither requested nor stored, and that session is what gets marked as
+    checked.
+    """
+
+    def __init__(
+        self,
+        root: str | os.PathLike,
+        downloader: Downloader,
+        batch_downloader: Optional[BatchDownloader] = None,
+    ) -> None:
+        self.root = Path(root)
+        self.downloader = downloader
+        self.batch_downloader = batch_downloader or self._download_each
+
+    def _paths(self, ticker: str) -> tuple[Path, Path]:
+        name = quote(ticker.upper(), safe="")
+        return self.root / f"{name}.npy", self.root / f"{name}.json"
+
+    def _read_meta(self, ticker: str) -> Optional[dict]:
+        _, meta_path = self._paths(ticker)
+        try:
+            return json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def load(self, ticker: str) -> Optional[pd.Series]:
+        """Return the stored closes for ``ticker`` or ``None`` when absent."""
+        import pandas as pd
+
+        data_path, _ = self._paths(ticker)
+        try:
+            rows = np.load(data_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        index = pd.DatetimeIndex(np.asarray(rows["date"]).astype("datetime64[ns]"))
+        return pd.Series(np.asarray(rows["close"]), index=index, name=ticker.upper())
+
+    def write(self, ticker: str, series: pd.Series, first_requested: dt.date, checked_through: dt.date) -> None:
+        """Atomically replace the stored closes and sidecar for ``ticker``."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        data_path, meta_path = self._paths(ticker)
+        series = series.dropna().sort_index()
+        series = series[~series.index.duplicated(keep="last")]
+        rows = np.empty(len(series), dtype=PRICE_DTYPE)
+        rows["date"] = series.index.values.astype("datetime64[D]")
+        rows["close"] = series.values.astype("f8")
+        self._atomic_write(data_path, lambda fh: np.save(fh, rows))
+        meta = {"first_requested": first_requested.isoformat(), "checked_through": checked_through.isoformat()}
+        self._atomic_write(meta_path, lambda fh: fh.write(json.dumps(meta).encode()))
+
+    def _atomic_write(self, path: Path, writer: Callable) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                writer(fh)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def _plan(self, ticker: str, start: dt.date, today: dt.date) -> tuple[Optional[pd.Series], Optional[dt.date], dt.date]:
+        """Return ``(stored, fetch_from, first_requested)`` for ``ticker``.
+
+        ``today`` is the last completed session. ``fetch_from`` is ``None``
+        when the stored data is already checked through it.
+        """
+        stored = self.load(ticker)
+        meta = self._read_meta(ticker)
+        if stored is None or stored.empty or meta is None or dt.date.fromisoformat(meta["first_requested"]) > start:
+            return None, start, start
+        checked_through = dt.date.fromisoformat(meta["checked_through"])
+        first_requested = dt.date.fromisoformat(meta["first_requested"])
+        if checked_through < today:
+            overlap_from = stored.index[max(0, len(stored) - OVERLAP_BARS)].date()
+            return stored, overlap_from, first_requested
+        return stored, None, first_requested
+
+    @staticmethod
+    def _splice(stored: pd.Series, fresh: pd.Series) -> Optional[pd.Series]:
+        """``stored`` continued by ``fresh``, rescaled to ``fresh``'s adjustment basis.
+
+        Returns ``None`` when the overlapping bars do not differ by a single
+        factor (or do not overlap at all), so the history must be downloaded
+        again.
+        """
+        import pandas as pd
+
+        if fresh.empty:
+            return stored
+        overlap = stored.index.intersection(fresh.index)
+        if overlap.empty:
+            return None
+        ratios = fresh[overlap].to_numpy() / stored[overlap].to_numpy()
+        scale = float(np.median(ratios))
+        if not np.isfinite(ratios).all() or ratios.max() - ratios.min() > REBASE_TOLERANCE * scale:
+            return None
+        older = stored[stored.index < fresh.index[0]]
+        if abs(scale - 1) > REBASE_TOLERANCE:
+            older = older * scale
+        return pd.concat([older, fresh])
+
+    def _merge(
+        self,
+        ticker: str,
+        stored: Optional[pd.Series],
+        fresh: pd.Series,
+        first_requested: dt.date,
+        today: dt.date,
+    ) -> tuple[Optional[pd.Series], bool]:
+        """Write ``fresh`` into the store; returns ``(series, rebase_failed)``.
+
+        On a failed rebase nothing is written and the caller downloads the
+        whole history instead.
+        """
+        if stored is None:
+            if fresh.empty:
+                return None, False
+            self.write(ticker, fresh, first_requested, today)
+            return self.load(ticker), False
+        spliced = self._splice(stored, fresh)
+        if spliced is None:
+            return stored, True
+        self.write(ticker, spliced, first_requested, today)
+        return self.load(ticker), False
+
+    def get_history(self, ticker: str, start: dt.date, end: dt.date) -> pd.Series:
+        """Return closes from ``start`` onwards, downloading only what is missing.
+
+        A full download happens when nothing is stored, the stored range
+        begins after ``start``, or the stored closes cannot be re-based onto
+        the fresh ones; otherwise only the overlap and the days after it are
+        fetched.
+        """
+        import pandas as pd
+
+        today = end - dt.timedelta(days=1)
+        stored, fetch_from, first_requested = self._plan(ticker, start, today)
+        if fetch_from is not None:
+            stored, rebase_failed = self._merge(
+                ticker, stored, self.downloader(ticker, fetch_from, end), first_requested, today
+            )
+            if rebase_failed:
+                stored, _ = self._merge(ticker, None, self.downloader(ticker, first_requested, end), first_requested, today)
+        if stored is None or stored.empty:
+            raise ValueError(f"No price history for {ticker}.")
+        return stored[stored.index >= pd.Timestamp(start)]
+
+    def load_current(self, ticker: str, start: dt.date, end: dt.date) -> Optional[pd.Series]:
+        """Return stored closes from ``start`` only if no download would be needed."""
+        import pandas as pd
+
+        stored, fetch_from, _ = self._plan(ticker, start, end - dt.timedelta(days=1))
+        if stored is None or fetch_from is not None or stored.empty:
+            return None
+        return stored[stored.index >= pd.Timestamp(start)]
+
+    def get_histories(self, tickers: Iterable[str], start: dt.date, end: dt.date) -> Dict[str, pd.Series]:
+        """Batch variant of :meth:`get_history`.
+
+        Tickers that need new data are fetched with one batch downloader
+        call per first missing day, so a newly requested ticker's full
+        history does not make every other ticker re-download it too; tickers
+        whose stored closes cannot be re-based get another call for their
+        full history. Tickers with no data are omitted from the result
+        instead of raising.
+        """
+        plans = self._plan_many(tickers, start, end)
+        results: Dict[str, pd.Series] = {}
+        while plans:
+            fresh: Dict[str, pd.Series] = {}
+            for fetch_from, pending in self._pending(plans).items():
+                fresh.update(self.batch_downloader(pending, fetch_from, end))
+            plans = self._apply(plans, fresh, start, end, results)
+        return results
+
+    async def aget_histories(
+        self,
+        tickers: Iterable[str],
+        start: dt.date,
+        end: dt.date,
+        downloader: AsyncBatchDownloader,
+    ) -> Dict[str, pd.Series]:
+        """:meth:`get_histories` with an async downloader.
+
+        Only file reads and writes run on a worker thread; the event loop is
+        free while the download is in flight.
+        """
+        import anyio
+
+        plans = await anyio.to_thread.run_sync(self._plan_many, tickers, start, end)
+        results: Dict[str, pd.Series] = {}
+        while plans:
+            groups = self._pending(plans)
+            fresh: Dict[str, pd.Series] = {}
+            for fetched in await asyncio.gather(*(downloader(pending, day, end) for day, pending in groups.items())):
+                fresh.update(fetched)
+            plans = await anyio.to_thread.run_sync(self._apply, plans, fresh, start, end, results)
+        return results
+
+    def _plan_many(self, tickers: Iterable[str], start: dt.date, end: dt.date) -> dict:
+        today = end - dt.timedelta(days=1)
+        return {ticker: self._plan(ticker, start, today) for ticker in dict.fromkeys(tickers)}
+
+    @staticmethod
+    def _pending(plans: dict) -> Dict[dt.date, List[str]]:
+        """Tickers to download, grouped by the first day each one is missing."""
+        groups: Dict[dt.date, List[str]] = {}
+        for ticker, (_, fetch_from, _) in plans.items():
+            if fetch_from is not None:
+                groups.setdefault(fetch_from, []).append(ticker)
+        return groups
+
+    def _apply(
+        self,
+        plans: dict,
+        fresh: Dict[str, pd.Series],
+        start: dt.date,
+        end: dt.date,
+        results: Dict[str, pd.Series],
+    ) -> dict:
+        """Store ``fresh`` and add every planned ticker with data to ``results``.
+
+        Returns plans for the tickers whose stored history must be downloaded
+        again in full.
+        """
+        import pandas as pd
+
+        today = end - dt.timedelta(days=1)
+        retry: dict = {}
+        for ticker, (stored, fetch_from, first_requested) in plans.items():
+            if fetch_from is not None and ticker in fresh:
+                # Tickers missing from the batch keep their previous check date.
+                series = fresh[ticker]
+                series = series[series.index >= pd.Timestamp(fetch_from)]
+                stored, rebase_failed = self._merge(ticker, stored, series, first_requested, today)
+                if rebase_failed:
+                    retry[ticker] = (None, first_requested, first_requested)
+            if ticker not in retry and stored is not None and not stored.empty:
+                results[ticker] = stored[stored.index >= pd.Timestamp(start)]
+        return retry
+
+    def _download_each(self, tickers: List[str], start: dt.date, end: dt.date) -> Dict[str, pd.Series]:
+        results: Dict[str, pd.Series] = {}
+        for ticker in tickers:
+            try:
+                results[ticker] = self.downloader(ticker, start, end)
+            except Exception:
+                continue
+        return results
@@ -1,13 +1,29 @@
 """Rebalancing helper utilities."""
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
-from ..config import MODEL_PORTFOLIOS
+from .model_registry import model_registry
 
 
-def select_target_model(tracking_error: Dict[str, float]) -> str:
-    return min(tracking_error, key=tracking_error.get)
+def rank_target_models(
+    user_weights: Dict[str, float],
+    k: int = 1,
+    tracking: Dict[str, float] | None = None,
+) -> List[Tuple[str, float]]:
+    """Closest registered models by tracking error, best first.
+
+    Pass ``tracking`` from :func:`registry_tracking_errors` to rank without
+    computing the tracking errors again.
+    """
+    if tracking is None:
+        return model_registry.nearest(user_weights, k)
+    return model_registry.rank([tracking[key] for key in model_registry.keys], k)
+
+
+def registry_tracking_errors(user_weights: Dict[str, float]) -> Dict[str, float]:
+    """Tracking error against every registered model, in registry order."""
+    return dict(zip(model_registry.keys, model_registry.tracking_errors(user_weights).tolist()))
 
 
 def generate_rebalance_plan(
@@ -15,7 +31,7 @@ def generate_rebalance_plan(
     target_model_key: str,
     portfolio_value: float,
 ) -> Dict[str, List[Dict[str, float]]]:
-    target_weights = MODEL_PORTFOLIOS[target_model_key]
+    target_weights = model_registry.weights(target_model_key)
     adjustments = []
     for ticker in sorted(set(user_weights) | set(target_weights)):
         current = user_weights.get(ticker, 0.0)
@@ -0,0 +1,253 @@
+"""Covariance-based risk engine built on the aligned price matrix."""
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, Tuple
+
+import numpy as np
+
+from ..utils.admission import is_degraded
+from .data_loader import (
+    PRICE_CACHE_SIZE,
+    PriceMatrix,
+    forward_fill,
+    load_price_matrix,
+    next_market_close,
+    price_data_version,
+    price_digests,
+    recently_missed_tickers,
+    shared_matrix,
+    touch_histories,
+)
+from .shared_matrix import SharedMatrix
+
+TRADING_DAYS = 252
+# Conservative assumptions for tickers without usable price history.
+DEFAULT_RETURN = 0.04
+DEFAULT_VOLATILITY = 0.10
+# A cache-only rebuild reads the whole universe from the price cache, so the
+# universe must fit in it.
+MAX_UNIVERSE_SIZE = min(256, PRICE_CACHE_SIZE)
+
+
+@dataclass(frozen=True)
+class RiskModel:
+    """Annualized mean vector and covariance matrix for a ticker universe."""
+
+    version: int
+    requested: FrozenSet[str]
+    matrix: PriceMatrix
+    returns: np.ndarray
+    mean: np.ndarray
+    cov: np.ndarray
+
+    def weight_vector(self, weights: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray]:
+        """Split ``weights`` into a vector over the universe and the unmatched weights."""
+        index = self.matrix.index
+        vector = np.zeros(len(self.matrix.tickers))
+        missing = []
+        for ticker, weight in weights.items():
+            column = index.get(ticker.upper())
+            if column is None:
+                missing.append(weight)
+            else:
+                vector[column] += weight
+        return vector, np.asarray(missing, dtype="f8")
+
+    def portfolio_stats(self, weights: Dict[str, float]) -> Tuple[float, float]:
+        """Return ``(w·μ, sqrt(wᵀΣw))`` with defaults for tickers outside the universe."""
+        vector, missing = self.weight_vector(weights)
+        expected_return = float(vector @ self.mean + DEFAULT_RETURN * missing.sum())
+        variance = float(vector @ self.cov @ vector + (DEFAULT_VOLATILITY ** 2) * (missing ** 2).sum())
+        return expected_return, max(variance, 0.0) ** 0.5
+
+
+def daily_returns(prices: np.ndarray) -> np.ndarray:
+    """Simple returns of each ticker from its previous bar, ``NaN`` on dates it has no bar.
+
+    Returns follow each ticker's own calendar: a date only some tickers traded
+    adds no zero-return day to the others, so one ticker's statistics do not
+    depend on which other tickers share the matrix.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return prices[1:] / forward_fill(prices)[:-1] - 1.0
+
+
+def build_risk_model(
+    matrix: PriceMatrix,
+    requested: Iterable[str],
+    version: int,
+    returns: np.ndarray | None = None,
+) -> RiskModel:
+    import pandas as pd
+
+    prices = matrix.prices
+    if returns is None:
+        returns = daily_returns(prices)
+    n = len(matrix.tickers)
+    mean = np.full(n, DEFAULT_RETURN)
+    cov = np.diag(np.full(n, DEFAULT_VOLATILITY ** 2))
+    if n and len(prices) > 1:
+        valid = ~np.isnan(prices)
+        first = valid.argmax(axis=0)
+        last = len(prices) - 1 - valid[::-1].argmax(axis=0)
+        columns = np.arange(n)
+        days = (matrix.dates[last] - matrix.dates[first]).astype("int64")
+        years = days / 365
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cagr = (prices[last, columns] / prices[first, columns]) ** (1 / np.where(years > 0, years, np.nan)) - 1
+        mean = np.where(np.isfinite(cagr), cagr, np.where(years > 0, DEFAULT_RETURN, 0.0))
+        # Pairwise-complete covariance keeps recently listed tickers from
+        # truncating the history of the rest of the universe, and pairs only
+        # dates both tickers traded.
+        pairwise = pd.DataFrame(returns).cov(min_periods=2).to_numpy() * TRADING_DAYS
+        cov = np.where(np.isfinite(pairwise), pairwise, cov)
+    return RiskModel(
+        version=version,
+        requested=frozenset(requested),
+        matrix=matrix,
+        returns=returns,
+        mean=mean,
+        cov=cov,
+    )
+
+
+class RiskEngine:
+    """Caches one :class:`RiskModel` and rebuilds it when prices or tickers change.
+
+    The aligned matrices come from the host-wide :data:`shared_matrix` when it
+    covers the requested tickers, has not passed its market-close expiry and
+    was built from the same closes this worker has cached, so workers map one
+    copy instead of each aligning their own. Otherwise this worker aligns the
+    matrix from its price cache and publishes it.
+
+    A model only covers tickers it has prices for. Tickers whose load just
+    came back without data count as covered until their miss expires
+    (``PRICE_MISS_TTL_SECONDS``), then are tried again.
+
+    Degraded requests never rebuild: they get the cached model as is, even if
+    stale or missing tickers (which then take the default assumptions).
+    """
+
+    def __init__(self) -> None:
+        self._model: RiskModel | None = None
+        self._lock = threading.Lock()
+
+    def model_for(self, tickers: Iterable[str]) -> RiskModel:
+        wanted = frozenset(t.upper() for t in tickers)
+        model = self._model
+        if model is not None and model.version == price_data_version() and self._covered(wanted, model.requested):
+            return model
+        if is_degraded():
+            return self._cached_model(wanted)
+        with self._lock:
+            model = self._model
+            if model is not None and model.version == price_data_version() and self._covered(wanted, model.requested):
+                return model
+            shared = self._matching_shared()
+            if shared is not None and shared.covers(self._needed(wanted, shared.requested)):
+                matrix = PriceMatrix(shared.dates, shared.tickers, shared.prices, shared.digests)
+                self._model = build_risk_model(matrix, shared.requested, price_data_version(), shared.returns)
+                return self._model
+            matrix = load_price_matrix(sorted(self._universe(wanted, model, shared)))
+            # Only what was actually read is covered: tickers without data,
+            # or missing from the cache in cache-only mode, are left out so a
+            # later request tries them again.
+            requested = frozenset(matrix.tickers)
+            returns = daily_returns(matrix.prices)
+            expires_at = next_market_close(dt.datetime.now(dt.timezone.utc)).timestamp()
+            try:
+                published = shared_matrix.publish(
+                    requested, matrix.dates, matrix.tickers, matrix.prices, returns, expires_at, matrix.digests
+                )
+            except OSError:
+                published = None
+            # Another worker may have published a newer generation for a
+            # different universe or other closes in the meantime; keep our
+            # own matrix then.
+            if published is not None and published.covers(requested) and published.matches(matrix.digests):
+                matrix = PriceMatrix(published.dates, published.tickers, published.prices, published.digests)
+                returns = published.returns
+            self._model = build_risk_model(matrix, requested, price_data_version(), returns)
+            return self._model
+
+    def data_digest(self, tickers: Iterable[str]) -> str:
+        """Digest of the closes the cached model holds for ``tickers``.
+
+        Changes when the model is rebuilt from other data for any of them,
+        and agrees across workers whose models hold the same closes.
+        """
+        model = self._model
+        digests = model.matrix.digests if model is not None else {}
+        digest = hashlib.blake2b(digest_size=16)
+        for ticker in sorted({t.upper() for t in tickers}):
+            digest.update(f"{ticker}\0{digests.get(ticker, '')}\0".encode())
+        return digest.hexdigest()
+
+    def tickers_to_load(self, tickers: Iterable[str]) -> FrozenSet[str]:
+        """Tickers :meth:`model_for` would load prices for; empty if none.
+
+        Lets async callers prefetch exactly those prices before running
+        ``model_for`` on a worker thread. The wanted histories count as in
+        use, so the idle sweep keeps refreshing them while a cached model
+        serves them.
+        """
+        wanted = frozenset(t.upper() for t in tickers)
+        touch_histories(wanted)
+        model = self._model
+        if model is not None and model.version == price_data_version() and self._covered(wanted, model.requested):
+            return frozenset()
+        shared = self._matching_shared()
+        if shared is not None and shared.covers(self._needed(wanted, shared.requested)):
+            return frozenset()
+        return self._universe(wanted, model, shared)
+
+    @staticmethod
+    def _needed(wanted: FrozenSet[str], requested: FrozenSet[str]) -> FrozenSet[str]:
+        # Wanted tickers minus those that just came back without data.
+        missing = wanted - requested
+        return wanted - recently_missed_tickers(missing) if missing else wanted
+
+    @classmethod
+    def _covered(cls, wanted: FrozenSet[str], requested: FrozenSet[str]) -> bool:
+        return cls._needed(wanted, requested) <= requested
+
+    @staticmethod
+    def _matching_shared() -> SharedMatrix | None:
+        """The current shared matrix, unless it holds other closes than this worker's cache."""
+        shared = shared_matrix.current()
+        if shared is None or not shared.matches(price_digests(shared.tickers)):
+            return None
+        return shared
+
+    @staticmethod
+    def _universe(wanted: FrozenSet[str], model: RiskModel | None, shared: SharedMatrix | None) -> FrozenSet[str]:
+        # Grow the cached universe rather than replace it, up to a size cap.
+        known = model.requested if model is not None else frozenset()
+        if shared is not None:
+            known |= shared.requested
+        return known | wanted if len(known | wanted) <= MAX_UNIVERSE_SIZE else wanted
+
+    def _cached_model(self, wanted: FrozenSet[str]) -> RiskModel:
+        """Best model available without downloading or waiting on a rebuild."""
+        model = self._model
+        if model is not None:
+            return model
+        shared = shared_matrix.current()
+        if shared is not None:
+            matrix = PriceMatrix(shared.dates, shared.tickers, shared.prices, shared.digests)
+            return build_risk_model(matrix, shared.requested, price_data_version(), shared.returns)
+        # Not kept: ``requested`` would claim tickers this matrix may lack.
+        return build_risk_model(load_price_matrix(sorted(wanted), cached_only=True), wanted, -1)
+
+
+risk_engine = RiskEngine()
+
+
+def expected_performance(weights: Dict[str, float]) -> Dict[str, float]:
+    """Compute expected return and volatility using historical data where possible."""
+    expected_return, expected_vol = risk_engine.model_for(weights).portfolio_stats(weights)
+    return {"expected_return": expected_return, "volatility": expected_vol}
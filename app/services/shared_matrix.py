@@ -0,0 +1,178 @@
+"""Aligned price and returns matrices shared by every worker through read-only mmaps.
+
+One worker builds the matrix for a ticker universe and publishes it as a set
+of ``.npy`` files in a fresh generation directory, then atomically repoints
+``CURRENT`` at it. Other workers memory-map those files read-only, so the OS
+page cache holds a single copy however many workers attach. Each generation
+records the digest of every column's source series, so a worker holding
+different closes for a ticker can tell and build its own matrix instead.
+"""
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, FrozenSet, Optional, Tuple
+
+import numpy as np
+
+# How often readers look at CURRENT for a newer generation.
+CHECK_INTERVAL_SECONDS = 1.0
+# Superseded generations kept on disk; older ones are deleted. Workers that
+# still map a deleted generation keep reading it until they move on.
+KEEP_GENERATIONS = 3
+
+
+@dataclass(frozen=True)
+class SharedMatrix:
+    generation: int
+    expires_at: float
+    requested: FrozenSet[str]
+    dates: np.ndarray
+    tickers: Tuple[str, ...]
+    prices: np.ndarray
+    returns: np.ndarray
+    digests: Dict[str, str]
+
+    def covers(self, tickers: FrozenSet[str], now: float | None = None) -> bool:
+        return tickers <= self.requested and (now if now is not None else time.time()) < self.expires_at
+
+    def matches(self, digests: Dict[str, str]) -> bool:
+        """Whether every ticker in ``digests`` has a column built from that same series."""
+        return all(self.digests.get(ticker) == digest for ticker, digest in digests.items())
+
+
+class SharedMatrixStore:
+    """Publishes and attaches :class:`SharedMatrix` generations under ``root``.
+
+    ``CURRENT`` is re-read from disk at most every ``check_interval``
+    seconds. ``generation()`` counts the times this process has seen it
+    point somewhere new, so it only ever increases, even when ``root`` is
+    wiped and the on-disk numbering starts over.
+    """
+
+    def __init__(self, root: str | os.PathLike, check_interval: float = CHECK_INTERVAL_SECONDS) -> None:
+        self.root = Path(root)
+        self.check_interval = check_interval
+        self._current: Optional[SharedMatrix] = None
+        self._current_pointer: Optional[Tuple[int, str]] = None
+        self._pointer: Optional[Tuple[int, str]] = None
+        self._generation = 0
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def _read_pointer(self) -> Optional[dict]:
+        try:
+            return json.loads((self.root / "CURRENT").read_text())
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _pointer_key(pointer: Optional[dict]) -> Optional[Tuple[int, str]]:
+        # The directory name tells apart generations numbered alike before
+        # and after a wipe.
+        return (pointer["generation"], pointer["directory"]) if pointer else None
+
+    def _check(self) -> Optional[Tuple[int, str]]:
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            pointer = self._pointer_key(self._read_pointer())
+            if pointer != self._pointer:
+                self._pointer = pointer
+                self._generation += 1
+            self._checked_at = now
+        return self._pointer
+
+    def generation(self) -> int:
+        self._check()
+        return self._generation
+
+    def current(self) -> Optional[SharedMatrix]:
+        """The latest published matrix as read-only NumPy memmaps, or ``None``."""
+        pointer_key = self._check()
+        current = self._current
+        if current is not None and self._current_pointer == pointer_key:
+            return current
+        with self._lock:
+            pointer = self._read_pointer()
+            if pointer is None:
+                return None
+            pointer_key = self._pointer_key(pointer)
+            if self._current is not None and self._current_pointer == pointer_key:
+                return self._current
+            directory = self.root / pointer["directory"]
+            try:
+                self._current = SharedMatrix(
+                    generation=pointer["generation"],
+                    expires_at=pointer["expires_at"],
+                    requested=frozenset(pointer["requested"]),
+                    dates=np.load(directory / "dates.npy", mmap_mode="r"),
+                    tickers=tuple(pointer["tickers"]),
+                    prices=np.load(directory / "prices.npy", mmap_mode="r"),
+                    returns=np.load(directory / "returns.npy", mmap_mode="r"),
+                    digests=pointer.get("digests", {}),
+                )
+            except OSError:
+                # Pruned between reading CURRENT and opening it; the next
+                # lookup sees the newer generation.
+                return None
+            self._current_pointer = pointer_key
+            return self._current
+
+    def publish(
+        self,
+        requested: FrozenSet[str],
+        dates: np.ndarray,
+        tickers: Tuple[str, ...],
+        prices: np.ndarray,
+        returns: np.ndarray,
+        expires_at: float,
+        digests: Dict[str, str],
+    ) -> Optional[SharedMatrix]:
+        """Write a new generation and make it current for every worker.
+
+        ``digests`` identifies the series behind each column. Returns the
+        current matrix afterwards, which may already be a later generation
+        another worker published; check it still covers ``requested`` and
+        :meth:`SharedMatrix.matches` the data.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Publishers are serialized so pruning never removes a generation
+        # another worker is still writing.
+        with open(self.root / "publish.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            directory = Path(tempfile.mkdtemp(dir=self.root, prefix="gen-"))
+            np.save(directory / "dates.npy", np.ascontiguousarray(dates))
+            np.save(directory / "prices.npy", np.ascontiguousarray(prices))
+            np.save(directory / "returns.npy", np.ascontiguousarray(returns))
+            pointer = self._read_pointer()
+            generation = (pointer["generation"] if pointer else 0) + 1
+            payload = {
+                "generation": generation,
+                "directory": directory.name,
+                "expires_at": expires_at,
+                "requested": sorted(requested),
+                "tickers": list(tickers),
+                "digests": digests,
+            }
+            fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".CURRENT.")
+            with os.fdopen(fd, "w") as fh:
+                json.dump(payload, fh)
+            os.replace(tmp, self.root / "CURRENT")
+            self._prune(directory.name)
+        self._checked_at = float("-inf")
+        return self.current()
+
+    def _prune(self, keep: str) -> None:
+        generations = sorted(
+            (path for path in self.root.glob("gen-*") if path.name != keep),
+            key=lambda path: path.stat().st_mtime,
+        )
+        for path in generations[: max(0, len(generations) - (KEEP_GENERATIONS - 1))]:
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,186 @@
+"""Block-bootstrap Monte Carlo of drawdowns and terminal values."""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .risk import risk_engine
+
+PERCENTILES = (5, 50, 95)
+# Paths per seeded chunk. Chunking (and so every random draw) depends only on
+# the requested path count, never on how many processes run the chunks, so a
+# given seed gives the same answer on any machine.
+CHUNK_PATHS = 2048
+# Below this many paths the pool's IPC costs more than it saves.
+PARALLEL_MIN_PATHS = int(os.getenv("SIMULATION_PARALLEL_MIN_PATHS", "20000"))
+SIMULATION_WORKERS = int(os.getenv("SIMULATION_WORKERS", str(os.cpu_count() or 1)))
+# Upper bound on paths x horizon_days per request; CPU time grows with it.
+SIMULATION_MAX_PATH_DAYS = int(os.getenv("SIMULATION_MAX_PATH_DAYS", str(200_000 * 252)))
+
+
+@dataclass(frozen=True)
+class SimulationResult:
+    """Per-portfolio percentiles of max drawdown and terminal growth of 1.
+
+    ``history_days`` is the length of the shortest portfolio's return history.
+    """
+
+    keys: List[str]
+    max_drawdown: Dict[str, Dict[int, float]]
+    terminal_value: Dict[str, Dict[int, float]]
+    history_days: int
+
+
+def portfolio_returns(portfolios: Dict[str, Dict[str, float]]) -> tuple[List[str], List[np.ndarray]]:
+    """Daily returns of constant-weight portfolios over their common history.
+
+    Uses the returns behind the risk model, starting on the first day every
+    held ticker has a return. Each portfolio's series has a day for every
+    date one of its own holdings traded, so tickers only other portfolios
+    hold never add zero-return days to it. Holdings without price data are
+    dropped and the rest renormalized, as in the backtests.
+    """
+    tickers = set().union(*portfolios.values())
+    model = risk_engine.model_for(tickers)
+    index = model.matrix.index
+    columns: Dict[str, np.ndarray] = {}
+    for key, holdings in portfolios.items():
+        column = np.zeros(len(model.matrix.tickers))
+        for ticker, weight in holdings.items():
+            position = index.get(ticker.upper())
+            if position is not None:
+                column[position] += weight
+        if column.sum() > 0:
+            columns[key] = column / column.sum()
+    keys = list(columns)
+    if not keys:
+        return keys, []
+    used = np.column_stack([columns[key] for key in keys]).any(axis=1)
+    observed = ~np.isnan(model.returns[:, used])
+    if not observed.any(axis=0).all():
+        return keys, [np.empty(0) for _ in keys]
+    returns = model.returns[int(observed.argmax(axis=0).max()):]
+    series = []
+    for key in keys:
+        held = columns[key] > 0
+        window = returns[:, held]
+        traded = ~np.isnan(window).all(axis=1)
+        series.append(np.nan_to_num(window[traded]) @ columns[key][held])
+    return keys, series
+
+
+def simulate_chunk(
+    returns: List[np.ndarray],
+    seed: np.random.SeedSequence,
+    paths: int,
+    horizon_days: int,
+    block_days: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Simulate ``paths`` bootstrapped paths for every portfolio series in ``returns``.
+
+    Each path concatenates randomly placed blocks of ``block_days`` consecutive
+    historical days, keeping short-term autocorrelation. All portfolios share
+    the same block draws, each placed at the same relative position in every
+    portfolio's history, so their outcomes are compared on the same
+    scenarios. Returns ``(max_drawdown, terminal_value)``, each
+    ``(paths, portfolios)``.
+
+    Paths are walked one block at a time, carrying each path's value, peak
+    and worst drawdown, so memory is ``paths x block_days`` whatever the
+    horizon.
+    """
+    rng = np.random.default_rng(seed)
+    blocks = -(-horizon_days // block_days)
+    positions = rng.random(size=(paths, blocks))
+    offsets = np.arange(block_days)
+    drawdowns, values = [], []
+    for series in returns:
+        starts = (positions * (len(series) - block_days + 1)).astype(np.intp)
+        value = np.ones(paths)
+        peak = np.ones(paths)
+        drawdown = np.zeros(paths)
+        for block in range(blocks):
+            length = min(block_days, horizon_days - block * block_days)
+            growth = value[:, None] * np.cumprod(1.0 + series[starts[:, block, None] + offsets[:length]], axis=1)
+            peaks = np.maximum(np.maximum.accumulate(growth, axis=1), peak[:, None])
+            drawdown = np.minimum(drawdown, (growth / peaks - 1.0).min(axis=1))
+            value, peak = growth[:, -1], peaks[:, -1]
+        drawdowns.append(drawdown)
+        values.append(value)
+    return np.column_stack(drawdowns), np.column_stack(values)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned, not forked: the server process runs threads whose locks
+            # a forked child could inherit mid-acquire.
+            _pool = ProcessPoolExecutor(SIMULATION_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def run_simulation(
+    portfolios: Dict[str, Dict[str, float]],
+    paths: int = 10_000,
+    horizon_days: int = 252,
+    block_days: int = 20,
+    seed: int = 0,
+) -> SimulationResult:
+    """Bootstrap ``paths`` futures of ``horizon_days`` for each portfolio.
+
+    Paths are simulated in fixed chunks seeded from ``SeedSequence(seed)``;
+    large runs fan the chunks out over a process pool. Raises ``ValueError``
+    when ``paths * horizon_days`` exceeds :data:`SIMULATION_MAX_PATH_DAYS`.
+    """
+    if paths * horizon_days > SIMULATION_MAX_PATH_DAYS:
+        raise ValueError(
+            f"paths x horizon_days may not exceed {SIMULATION_MAX_PATH_DAYS}; request fewer paths or a shorter horizon."
+        )
+    keys, returns = portfolio_returns(portfolios)
+    history_days = min((len(series) for series in returns), default=0)
+    if history_days < block_days:
+        raise ValueError("Not enough overlapping price history to simulate.")
+    returns = [np.ascontiguousarray(series) for series in returns]
+    sizes = [CHUNK_PATHS] * (paths // CHUNK_PATHS) + ([paths % CHUNK_PATHS] if paths % CHUNK_PATHS else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if paths >= PARALLEL_MIN_PATHS and SIMULATION_WORKERS > 1:
+        pool = _get_pool()
+        futures = [
+            pool.submit(simulate_chunk, returns, chunk_seed, size, horizon_days, block_days)
+            for chunk_seed, size in zip(seeds, sizes)
+        ]
+        chunks = [future.result() for future in futures]
+    else:
+        chunks = [
+            simulate_chunk(returns, chunk_seed, size, horizon_days, block_days)
+            for chunk_seed, size in zip(seeds, sizes)
+        ]
+    drawdowns = np.concatenate([chunk[0] for chunk in chunks])
+    terminals = np.concatenate([chunk[1] for chunk in chunks])
+    drawdown_pct = np.percentile(drawdowns, PERCENTILES, axis=0)
+    terminal_pct = np.percentile(terminals, PERCENTILES, axis=0)
+    return SimulationResult(
+        keys=keys,
+        max_drawdown={key: dict(zip(PERCENTILES, drawdown_pct[:, i].tolist())) for i, key in enumerate(keys)},
+        terminal_value={key: dict(zip(PERCENTILES, terminal_pct[:, i].tolist())) for i, key in enumerate(keys)},
+        history_days=history_days,
+    )
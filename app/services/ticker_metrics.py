@@ -0,0 +1,202 @@
+"""Per-ticker historical risk/return metrics kept current as prices arrive."""
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .model_registry import model_registry
+
+WINDOW_DAYS = 5 * 365
+TRADING_DAYS = 252
+METRIC_FIELDS = ("cagr_5y", "max_drawdown", "volatility", "downside_deviation")
+
+
+class _RollingState:
+    """Running sums over the trailing window plus full-history drawdown.
+
+    Built once with vectorized NumPy from a full series; later bars are
+    folded in one at a time, dropping bars that fall out of the window, so an
+    update costs O(new bars) rather than O(history). The series may also lose
+    bars at the front (the lookback window moves every day) as long as the
+    running peak and the max drawdown's peak are still in it.
+    """
+
+    __slots__ = (
+        "first_day",
+        "last_day",
+        "last_price",
+        "peak",
+        "peak_day",
+        "max_drawdown",
+        "drawdown_peak_day",
+        "window",
+        "count",
+        "total",
+        "total_sq",
+        "down_sq",
+    )
+
+    def __init__(self, days: np.ndarray, prices: np.ndarray) -> None:
+        self.first_day = int(days[0])
+        self.last_day = int(days[-1])
+        self.last_price = float(prices[-1])
+        peak = int(prices.argmax())
+        self.peak, self.peak_day = float(prices[peak]), int(days[peak])
+        drawdowns = prices / np.maximum.accumulate(prices) - 1
+        trough = int(drawdowns.argmin())
+        self.max_drawdown = float(drawdowns[trough])
+        self.drawdown_peak_day = int(days[int(prices[: trough + 1].argmax())])
+        start = int(np.searchsorted(days, self.last_day - WINDOW_DAYS))
+        window_days, window_prices = days[start:], prices[start:]
+        returns = window_prices[1:] / window_prices[:-1] - 1
+        # (day, price, return from the previous bar in the window)
+        self.window = deque(zip(window_days.tolist(), window_prices.tolist(), [0.0] + returns.tolist()))
+        self.count = len(returns)
+        self.total = float(returns.sum())
+        self.total_sq = float((returns ** 2).sum())
+        self.down_sq = float((np.minimum(returns, 0.0) ** 2).sum())
+
+    def advance(self, days: np.ndarray, prices: np.ndarray) -> Optional[int]:
+        """Fold in a later series of the same ticker keyed by date.
+
+        Returns the number of new bars, or ``None`` when the series does not
+        continue this state (bars added at the front, the last seen bar
+        missing or re-based, or the drawdown peaks dropped off) and the
+        state must be rebuilt.
+        """
+        first = int(days[0])
+        if first < self.first_day or first > min(self.peak_day, self.drawdown_peak_day):
+            return None
+        position = int(np.searchsorted(days, self.last_day))
+        if position == len(days) or days[position] != self.last_day or prices[position] != self.last_price:
+            return None
+        self.first_day = first
+        self.append(days[position + 1:], prices[position + 1:])
+        return len(days) - position - 1
+
+    def append(self, days: np.ndarray, prices: np.ndarray) -> None:
+        for day, price in zip(days.tolist(), prices.tolist()):
+            ret = price / self.last_price - 1
+            self.window.append((day, price, ret))
+            self._add(ret, 1)
+            self.last_day, self.last_price = day, price
+            if price > self.peak:
+                self.peak, self.peak_day = price, day
+            if price / self.peak - 1 < self.max_drawdown:
+                self.max_drawdown, self.drawdown_peak_day = price / self.peak - 1, self.peak_day
+        while len(self.window) > 1 and self.window[0][0] < self.last_day - WINDOW_DAYS:
+            self.window.popleft()
+            # The new first bar's return reached back outside the window.
+            day, price, ret = self.window[0]
+            self._add(ret, -1)
+            self.window[0] = (day, price, 0.0)
+
+    def _add(self, ret: float, sign: int) -> None:
+        self.count += sign
+        self.total += sign * ret
+        self.total_sq += sign * ret * ret
+        self.down_sq += sign * min(ret, 0.0) ** 2
+
+    def metrics(self) -> Tuple[float, float, float, float]:
+        first_day, first_price, _ = self.window[0]
+        years = (self.last_day - first_day) / 365
+        cagr = (self.last_price / first_price) ** (1 / years) - 1 if years > 0 else 0.0
+        if self.count > 1:
+            variance = max((self.total_sq - self.total ** 2 / self.count) / (self.count - 1), 0.0)
+            downside = (self.down_sq / self.count) ** 0.5
+        else:
+            variance, downside = 0.0, 0.0
+        return cagr, self.max_drawdown, (variance * TRADING_DAYS) ** 0.5, downside * TRADING_DAYS ** 0.5
+
+
+class TickerMetricsTable:
+    """Compact ``tickers x METRIC_FIELDS`` float table read by the scorers.
+
+    Rows are looked up through a ticker -> row dict, so scoring a portfolio
+    costs O(holdings). ``version`` changes whenever any row changes.
+    """
+
+    def __init__(self) -> None:
+        self.rows: Dict[str, int] = {}
+        self.values = np.empty((0, len(METRIC_FIELDS)))
+        self.version = 0
+        self._states: Dict[str, _RollingState] = {}
+        self._lock = threading.Lock()
+        self._reference: Tuple[int, Optional[np.ndarray]] = (-1, None)
+
+    def update(self, ticker: str, dates: np.ndarray, prices: np.ndarray) -> None:
+        """Fold a refreshed price series for ``ticker`` into the table.
+
+        If the series continues what was seen before (matched on the last
+        bar's date and price), just the new bars are applied; otherwise the
+        ticker is recomputed from scratch.
+        """
+        days = np.asarray(dates).astype("datetime64[D]").astype("int64")
+        prices = np.asarray(prices, dtype="f8")
+        if len(days) < 2:
+            return
+        with self._lock:
+            state = self._states.get(ticker)
+            added = state.advance(days, prices) if state is not None else None
+            if added == 0:
+                return
+            if added is None:
+                state = self._states[ticker] = _RollingState(days, prices)
+            self._write_row(ticker, state.metrics())
+
+    def _write_row(self, ticker: str, metrics: Tuple[float, ...]) -> None:
+        row = self.rows.get(ticker)
+        if row is None:
+            row = len(self.rows)
+            if row >= len(self.values):
+                grown = np.empty((max(16, 2 * len(self.values)), len(METRIC_FIELDS)))
+                grown[: len(self.values)] = self.values
+                self.values = grown
+            self.rows[ticker] = row
+        self.values[row] = metrics
+        self.version += 1
+
+    def missing(self, tickers: Iterable[str]) -> List[str]:
+        """Tickers without a row yet."""
+        return [ticker for ticker in tickers if ticker not in self.rows]
+
+    def get(self, ticker: str) -> Optional[np.ndarray]:
+        row = self.rows.get(ticker)
+        return None if row is None else self.values[row]
+
+    def columns(self, tickers: Iterable[str]) -> np.ndarray:
+        """Metrics for ``tickers`` as a ``(len(tickers), 4)`` array, ``NaN`` where unknown."""
+        out = []
+        for ticker in tickers:
+            row = self.rows.get(ticker)
+            out.append(self.values[row] if row is not None else np.full(len(METRIC_FIELDS), np.nan))
+        return np.array(out).reshape(-1, len(METRIC_FIELDS))
+
+    def profile(self, weights: Dict[str, float]) -> Optional[np.ndarray]:
+        """Weight-averaged metrics, or ``None`` unless every positive holding is known."""
+        acc = np.zeros(len(METRIC_FIELDS))
+        total = 0.0
+        for ticker, weight in weights.items():
+            if weight <= 0:
+                continue
+            row = self.rows.get(ticker)
+            if row is None:
+                return None
+            acc += weight * self.values[row]
+            total += weight
+        return acc / total if total > 0 else None
+
+    def model_reference(self) -> Optional[np.ndarray]:
+        """Mean of the registered models' profiles, or ``None`` while any is incomplete."""
+        version, reference = self._reference
+        if version != self.version:
+            profiles = [self.profile(model_registry.weights(key)) for key in model_registry.keys]
+            reference = None if any(p is None for p in profiles) else np.mean(profiles, axis=0)
+            self._reference = (self.version, reference)
+        return reference
+
+
+ticker_metrics = TickerMetricsTable()
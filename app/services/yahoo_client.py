@@ -0,0 +1,108 @@
+"""Async Yahoo Finance chart API client over pooled keep-alive connections."""
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import os
+from typing import TYPE_CHECKING, Dict, List
+from urllib.parse import quote
+
+import numpy as np
+
+from ..config import GLOBAL_CONFIG
+from ..utils.http import AsyncClientPool
+from ..utils.metrics import track_upstream
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+YAHOO_CHART_URL = os.getenv("YAHOO_CHART_URL", "https://query2.finance.yahoo.com/v8/finance/chart")
+YAHOO_MAX_CONNECTIONS = int(os.getenv("YAHOO_MAX_CONNECTIONS", "16"))
+YAHOO_TIMEOUT_SECONDS = float(os.getenv("YAHOO_TIMEOUT_SECONDS", "10"))
+
+
+def _epoch(day: dt.date) -> int:
+    return int(dt.datetime.combine(day, dt.time(), dt.timezone.utc).timestamp())
+
+
+def parse_chart(payload: dict) -> pd.Series:
+    """Adjusted closes from a chart response, indexed by exchange-local date."""
+    import pandas as pd
+
+    results = (payload.get("chart") or {}).get("result") or []
+    if not results or not results[0].get("timestamp"):
+        return pd.Series(dtype="float64")
+    result = results[0]
+    indicators = result.get("indicators", {})
+    closes = (indicators.get("adjclose") or indicators.get("quote") or [{}])[0]
+    values = closes.get("adjclose", closes.get("close"))
+    if values is None:
+        return pd.Series(dtype="float64")
+    offset = (result.get("meta") or {}).get("gmtoffset") or 0
+    seconds = np.asarray(result["timestamp"], dtype="int64") + offset
+    dates = pd.DatetimeIndex(seconds.astype("datetime64[s]").astype("datetime64[D]").astype("datetime64[ns]"))
+    series = pd.Series(np.asarray(values, dtype="f8"), index=dates).dropna()
+    return series[~series.index.duplicated(keep="last")]
+
+
+class YahooChartClient:
+    """Fetches adjusted closes with at most ``max_connections`` requests in flight.
+
+    The sync ``yf.download`` helpers in :mod:`app.services.data_loader` block a
+    thread for every download; this client lets the request path wait on
+    Yahoo without holding one.
+    """
+
+    def __init__(self, pool: AsyncClientPool, max_connections: int) -> None:
+        self.pool = pool
+        self._limit = max_connections
+        self._semaphores: Dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            self._semaphores = {loop: asyncio.Semaphore(self._limit)}
+            semaphore = self._semaphores[loop]
+        return semaphore
+
+    @track_upstream("yahoo_chart")
+    async def download(self, ticker: str, start: dt.date, end: dt.date) -> pd.Series:
+        """Adjusted closes for ``[start, end)``; empty when Yahoo has no data."""
+        import pandas as pd
+
+        params = {
+            "period1": _epoch(start),
+            "period2": _epoch(end),
+            "interval": GLOBAL_CONFIG.data_interval,
+            "events": "div,split",
+            "includeAdjustedClose": "true",
+        }
+        async with self._semaphore():
+            response = await self.pool.client().get(f"/{quote(ticker, safe='')}", params=params)
+        if response.status_code == 404:
+            return pd.Series(dtype="float64")
+        response.raise_for_status()
+        series = parse_chart(response.json())
+        return series[(series.index >= pd.Timestamp(start)) & (series.index < pd.Timestamp(end))]
+
+    async def download_many(self, tickers: List[str], start: dt.date, end: dt.date) -> Dict[str, pd.Series]:
+        """Download tickers concurrently; failed or empty tickers are left out."""
+        fetched = await asyncio.gather(*(self.download(t, start, end) for t in tickers), return_exceptions=True)
+        return {
+            ticker: series
+            for ticker, series in zip(tickers, fetched)
+            if not isinstance(series, BaseException) and not series.empty
+        }
+
+
+yahoo_client = YahooChartClient(
+    AsyncClientPool(
+        YAHOO_CHART_URL,
+        max_connections=YAHOO_MAX_CONNECTIONS,
+        max_keepalive=YAHOO_MAX_CONNECTIONS,
+        timeout=YAHOO_TIMEOUT_SECONDS,
+        headers={"User-Agent": "Mozilla/5.0 (compatible; portfolio-pulse)"},
+    ),
+    YAHOO_MAX_CONNECTIONS,
+)
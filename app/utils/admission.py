@@ -0,0 +1,288 @@
+"""Admission control for endpoint classes.
+
+Each :class:`EndpointClass` has its own concurrency limit, bounded queue,
+queue-time deadline and per-user in-flight cap, so a burst of expensive
+analytics cannot take the worker threads cheap endpoints need. Requests that
+wait past their deadline get ``503`` with ``Retry-After``. Degradable classes
+stop waiting early and run in *degraded mode*: the request is served from
+cached prices and precomputed or default metrics instead of blocking on a
+slot (see :func:`is_degraded`).
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Deque, Dict, Optional
+
+from starlette.responses import JSONResponse
+
+from .metrics import Gauge, admission_events, admission_wait, registry
+
+_degraded: ContextVar[bool] = ContextVar("pulse_degraded", default=False)
+
+NORMAL, DEGRADED, SHED, USER_LIMITED = "normal", "degraded", "shed", "user_limited"
+
+
+def is_degraded() -> bool:
+    """Whether the current request runs in degraded mode.
+
+    Degraded requests must not download prices or wait on shared rebuilds;
+    they use whatever data is already in memory, falling back to defaults.
+    """
+    return _degraded.get()
+
+
+class EndpointClass:
+    """Concurrency slots, FIFO queue and per-user counts for one class of endpoints.
+
+    ``limit`` requests run at once. Up to ``max_queue`` more wait, each for at
+    most ``queue_timeout`` seconds. A ``degradable`` class waits only
+    ``degrade_after`` seconds (not at all once the queue is full) before
+    running the request in degraded mode, with at most ``degraded_limit``
+    degraded requests in flight. No user key may hold more than ``per_user``
+    requests of the class at once, queued or running.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        max_queue: int,
+        queue_timeout: float,
+        per_user: int,
+        degradable: bool = False,
+        degrade_after: float = 0.25,
+        degraded_limit: Optional[int] = None,
+    ) -> None:
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.per_user = per_user
+        self.degradable = degradable
+        self.degrade_after = min(degrade_after, queue_timeout)
+        self.degraded_limit = limit if degraded_limit is None else degraded_limit
+        self.retry_after = max(1, math.ceil(queue_timeout))
+        self.in_flight = 0
+        self.degraded_in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._users: Dict[str, int] = {}
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, user: str) -> str:
+        """Admit a request for ``user``; returns the mode it runs in or why it was refused.
+
+        After ``NORMAL`` or ``DEGRADED`` the caller must call :meth:`release`
+        with the same mode.
+        """
+        count = self._users.get(user, 0)
+        if count >= self.per_user:
+            admission_events.inc(self.name, USER_LIMITED)
+            return USER_LIMITED
+        # Counted while queued too, so one user cannot fill the queue.
+        self._users[user] = count + 1
+        mode = SHED
+        try:
+            mode = await self._acquire_slot()
+        finally:
+            if mode == SHED:
+                self._release_user(user)
+        admission_events.inc(self.name, "admitted" if mode == NORMAL else mode)
+        return mode
+
+    async def _acquire_slot(self) -> str:
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return NORMAL
+        if len(self._waiters) >= self.max_queue:
+            return self._degrade() or SHED
+        admission_events.inc(self.name, "queued")
+        start = time.perf_counter()
+        # One waiter for the whole wait, so a request still queued after
+        # ``degrade_after`` keeps its place in line.
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        granted = await self._wait(waiter, self.degrade_after if self.degradable else self.queue_timeout)
+        if not granted and self.degradable:
+            mode = self._degrade()
+            if mode is not None:
+                self._abandon(waiter)
+                admission_wait.observe(time.perf_counter() - start, self.name)
+                return mode
+            granted = await self._wait(waiter, self.queue_timeout - (time.perf_counter() - start))
+        if not granted:
+            self._abandon(waiter)
+        admission_wait.observe(time.perf_counter() - start, self.name)
+        return NORMAL if granted else SHED
+
+    def _degrade(self) -> Optional[str]:
+        if self.degradable and self.degraded_in_flight < self.degraded_limit:
+            self.degraded_in_flight += 1
+            return DEGRADED
+        return None
+
+    async def _wait(self, waiter: asyncio.Future, timeout: float) -> bool:
+        """Wait for :meth:`release` to hand ``waiter`` a slot; ``False`` on timeout.
+
+        A timed-out waiter stays queued; the caller decides whether to
+        :meth:`_abandon` it.
+        """
+        if timeout > 0 and not waiter.done():
+            try:
+                await asyncio.wait((waiter,), timeout=timeout)
+            except BaseException:
+                # Cancelled (client gone).
+                self._abandon(waiter)
+                raise
+        return waiter.done()
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done():
+            # Handed a slot it will not use: pass it on.
+            self._release_slot()
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self, user: str, mode: str) -> None:
+        self._release_user(user)
+        if mode == DEGRADED:
+            self.degraded_in_flight -= 1
+        else:
+            self._release_slot()
+
+    def _release_user(self, user: str) -> None:
+        count = self._users.get(user, 0) - 1
+        if count > 0:
+            self._users[user] = count
+        else:
+            self._users.pop(user, None)
+
+    def _release_slot(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Hand the slot straight to the oldest waiter.
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+def _env_class(name: str, limit: int, max_queue: int, queue_timeout: float, per_user: int, **kwargs) -> EndpointClass:
+    prefix = f"ADMISSION_{name.upper()}_"
+    return EndpointClass(
+        name,
+        limit=int(os.getenv(prefix + "CONCURRENCY", str(limit))),
+        max_queue=int(os.getenv(prefix + "QUEUE", str(max_queue))),
+        queue_timeout=float(os.getenv(prefix + "QUEUE_TIMEOUT_SECONDS", str(queue_timeout))),
+        per_user=int(os.getenv(prefix + "PER_USER", str(per_user))),
+        **kwargs,
+    )
+
+
+# Interactive requests mostly wait on upstream I/O and borrow a worker thread
+# only to score, so thousands may be in flight. Analytics and simulations
+# hold a thread for most of their run; together they stay under anyio's 40.
+ENDPOINT_CLASSES: Dict[str, EndpointClass] = {
+    endpoint_class.name: endpoint_class
+    for endpoint_class in (
+        _env_class("interactive", limit=4096, max_queue=4096, queue_timeout=5.0, per_user=32),
+        _env_class(
+            "analytics",
+            limit=8,
+            max_queue=64,
+            queue_timeout=2.0,
+            per_user=2,
+            degradable=os.getenv("ADMISSION_DEGRADED_MODE", "true").lower() == "true",
+            degrade_after=float(os.getenv("ADMISSION_DEGRADE_AFTER_SECONDS", "0.25")),
+            degraded_limit=int(os.getenv("ADMISSION_ANALYTICS_DEGRADED_CONCURRENCY", "4")),
+        ),
+        _env_class("simulation", limit=2, max_queue=16, queue_timeout=10.0, per_user=1),
+    )
+}
+
+registry.register(
+    Gauge(
+        "pulse_admission_queue_depth",
+        "Requests waiting for a slot, by endpoint class.",
+        lambda: {(name,): c.queue_depth for name, c in ENDPOINT_CLASSES.items()},
+        labels=("endpoint_class",),
+    )
+)
+registry.register(
+    Gauge(
+        "pulse_admission_in_flight",
+        "Admitted requests running, by endpoint class and mode (normal, degraded).",
+        lambda: {
+            key: value
+            for name, c in ENDPOINT_CLASSES.items()
+            for key, value in (((name, NORMAL), c.in_flight), ((name, DEGRADED), c.degraded_in_flight))
+        },
+        labels=("endpoint_class", "mode"),
+    )
+)
+
+
+def _user_key(scope) -> str:
+    # Admission runs before authentication, so users are keyed by credential.
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            return value.decode("latin-1")
+    client = scope.get("client")
+    return client[0] if client else ""
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying :data:`ENDPOINT_CLASSES` by request path.
+
+    ``routes`` maps paths to class names; other paths are not admission
+    controlled. Degraded responses carry ``X-Pulse-Degraded: 1``.
+    """
+
+    def __init__(self, app, routes: Dict[str, str], classes: Dict[str, EndpointClass] = ENDPOINT_CLASSES) -> None:
+        self.app = app
+        self.routes = {path: classes[name] for path, name in routes.items()}
+
+    async def __call__(self, scope, receive, send) -> None:
+        endpoint_class = self.routes.get(scope["path"]) if scope["type"] == "http" else None
+        if endpoint_class is None:
+            await self.app(scope, receive, send)
+            return
+        user = _user_key(scope)
+        mode = await endpoint_class.acquire(user)
+        if mode == USER_LIMITED:
+            await self._refuse(429, "Too many concurrent requests for this user.", endpoint_class)(scope, receive, send)
+            return
+        if mode == SHED:
+            await self._refuse(503, "Server busy, retry later.", endpoint_class)(scope, receive, send)
+            return
+
+        async def send_degraded(message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), (b"x-pulse-degraded", b"1")]
+            await send(message)
+
+        token = _degraded.set(mode == DEGRADED)
+        try:
+            await self.app(scope, receive, send_degraded if mode == DEGRADED else send)
+        finally:
+            _degraded.reset(token)
+            endpoint_class.release(user, mode)
+
+    @staticmethod
+    def _refuse(status_code: int, detail: str, endpoint_class: EndpointClass) -> JSONResponse:
+        return JSONResponse(
+            {"detail": detail},
+            status_code=status_code,
+            headers={"Retry-After": str(endpoint_class.retry_after)},
+        )
@@ -3,33 +3,156 @@ from __future__ import annotations
 
 import os
 from functools import lru_cache
+from typing import Any, Dict
 
-from fastapi import Depends, HTTPException, Security, status
+import jwt
+from fastapi import HTTPException, Security, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from supabase import Client, create_client
+from starlette.concurrency import run_in_threadpool
+
+from .http import AsyncClientPool
+from .metrics import timer, track_upstream
 
 security_scheme = HTTPBearer(auto_error=False)
 
+JWKS_ALGORITHMS = ["RS256", "ES256"]
+
+
+class LocalJWTVerifier:
+    """Verify Supabase access tokens without calling the Supabase API.
+
+    Uses the project's shared HS256 secret when one is given, otherwise the
+    signing keys published at the JWKS endpoint, which are cached and
+    re-fetched every ``refresh_seconds``.
+    """
+
+    def __init__(
+        self,
+        secret: str | None = None,
+        jwks_url: str | None = None,
+        audience: str | None = "authenticated",
+        issuer: str | None = None,
+        refresh_seconds: int = 600,
+    ) -> None:
+        if not secret and not jwks_url:
+            raise ValueError("A JWT secret or a JWKS URL is required for local verification.")
+        self.secret = secret
+        self.audience = audience
+        self.issuer = issuer
+        self._jwks_client = None if secret else jwt.PyJWKClient(jwks_url, lifespan=refresh_seconds)
+
+    @property
+    def uses_jwks(self) -> bool:
+        return self._jwks_client is not None
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        if self._jwks_client is None:
+            key: Any = self.secret
+            algorithms = ["HS256"]
+        else:
+            key = self._jwks_client.get_signing_key_from_jwt(token).key
+            algorithms = JWKS_ALGORITHMS
+        return jwt.decode(
+            token,
+            key,
+            algorithms=algorithms,
+            audience=self.audience,
+            issuer=self.issuer,
+            options={"require": ["exp", "sub"], "verify_aud": self.audience is not None},
+        )
+
+
+def _build_verifier() -> LocalJWTVerifier | None:
+    if os.getenv("SUPABASE_AUTH_MODE", "remote").lower() != "local":
+        return None
+    url = os.getenv("SUPABASE_URL")
+    jwks_url = os.getenv("SUPABASE_JWKS_URL") or (f"{url.rstrip('/')}/auth/v1/.well-known/jwks.json" if url else None)
+    return LocalJWTVerifier(
+        secret=os.getenv("SUPABASE_JWT_SECRET"),
+        jwks_url=jwks_url,
+        audience=os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated") or None,
+        issuer=os.getenv("SUPABASE_JWT_ISSUER"),
+        refresh_seconds=int(os.getenv("SUPABASE_JWKS_REFRESH_SECONDS", "600")),
+    )
+
 
-def _build_client() -> Client | None:
+@lru_cache(maxsize=1)
+def get_jwt_verifier() -> LocalJWTVerifier | None:
+    return _build_verifier()
+
+
+class SupabaseAuthClient:
+    """Resolves access tokens to users with the Supabase Auth REST API.
+
+    Calls ``GET /auth/v1/user`` over a pooled keep-alive connection, so
+    verifying a token holds no thread while Supabase answers.
+    """
+
+    def __init__(self, url: str, anon_key: str, pool: AsyncClientPool | None = None) -> None:
+        self.pool = pool or AsyncClientPool(
+            f"{url.rstrip('/')}/auth/v1",
+            max_connections=int(os.getenv("SUPABASE_MAX_CONNECTIONS", "64")),
+            timeout=float(os.getenv("SUPABASE_TIMEOUT_SECONDS", "10")),
+        )
+        self.anon_key = anon_key
+
+    @track_upstream("supabase")
+    async def get_user_id(self, token: str) -> str | None:
+        """The user id for ``token``, or ``None`` when Supabase rejects it."""
+        response = await self.pool.client().get(
+            "/user",
+            headers={"apikey": self.anon_key, "Authorization": f"Bearer {token}"},
+        )
+        if response.status_code in (401, 403):
+            return None
+        response.raise_for_status()
+        return response.json().get("id")
+
+    async def aclose(self) -> None:
+        await self.pool.aclose()
+
+
+def _build_client() -> SupabaseAuthClient | None:
     url = os.getenv("SUPABASE_URL")
     key = os.getenv("SUPABASE_ANON_KEY")
     if not url or not key:
         return None
-    return create_client(url, key)
+    return SupabaseAuthClient(url, key)
 
 
 @lru_cache(maxsize=1)
-def get_supabase_client() -> Client | None:
+def get_supabase_client() -> SupabaseAuthClient | None:
     try:
         return _build_client()
     except Exception:
         return None
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials | None = Security(security_scheme),
 ):
+    # Timed here rather than with a decorator: FastAPI resolves the dependency's
+    # annotations against the function's own module globals.
+    with timer("get_current_user"):
+        return await _authenticate(credentials)
+
+
+async def _authenticate(credentials: HTTPAuthorizationCredentials | None) -> Dict[str, Any]:
+    verifier = get_jwt_verifier()
+    if verifier is not None:
+        if credentials is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token.")
+        try:
+            if verifier.uses_jwks:
+                # Key refreshes fetch the JWKS document with a blocking request.
+                claims = await run_in_threadpool(verifier.verify, credentials.credentials)
+            else:
+                claims = verifier.verify(credentials.credentials)
+        except jwt.PyJWTError as exc:
+            if os.getenv("SUPABASE_AUTH_REMOTE_FALLBACK", "false").lower() != "true":
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Supabase token.") from exc
+        else:
+            return {"id": claims["sub"]}
     client = get_supabase_client()
     allow_anon = os.getenv("ALLOW_ANON", "false").lower() == "true"
     if client is None:
@@ -42,9 +165,9 @@ def get_current_user(
     if credentials is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token.")
     try:
-        user = client.auth.get_user(credentials.credentials)
+        user_id = await client.get_user_id(credentials.credentials)
     except Exception as exc:  # pragma: no cover
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Supabase token.") from exc
-    if user is None or user.user is None:
+    if user_id is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Supabase user.")
-    return {"id": user.user.id}
+    return {"id": user_id}
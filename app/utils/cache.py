@@ -0,0 +1,320 @@
+"""Small in-process caching helpers."""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Hashable, Iterable, List, Optional, TypeVar
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """Thread-safe bounded mapping that evicts the least recently used key."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, V]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Optional[V]:
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: Hashable, value: V) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Optional[V]:
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class _Flight:
+    """A load in progress; waiters block on ``done`` and then read the outcome."""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+
+    def result(self) -> Any:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "last_access")
+
+    def __init__(self, value: Any, expires_at: float, last_access: float) -> None:
+        self.value = value
+        self.expires_at = expires_at
+        self.last_access = last_access
+
+
+class SingleFlightCache(Generic[V]):
+    """Bounded LRU cache that runs at most one load per key at a time.
+
+    Concurrent misses on a key wait for the first caller's load and share its
+    value or its exception. Failed loads are not cached, so the next miss
+    retries. ``stats`` counts hits, misses, coalesced waits, evictions and
+    load errors; ``events`` (anything with ``inc(name, amount=...)``, such as
+    a metrics counter) receives the same counts.
+
+    With an ``expires`` policy each value carries an expiry timestamp. Expired
+    values are still served (counted as ``stale``) for up to ``max_stale``
+    seconds so callers never wait on a refresh; :meth:`expired_keys` and
+    :meth:`refresh_many` let a background job reload them, and
+    :meth:`drop_idle` forgets keys nobody has asked for.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        on_insert: Callable[[Hashable, V], None] | None = None,
+        events: Any = None,
+        expires: Callable[[Hashable, V], float] | None = None,
+        max_stale: float = float("inf"),
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.maxsize = maxsize
+        self.max_stale = max_stale
+        self.stats: Dict[str, int] = dict.fromkeys(
+            ("hit", "stale", "miss", "coalesced", "eviction", "expired", "idle", "load_error"), 0
+        )
+        self._data: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self._on_insert = on_insert
+        self._events = events
+        self._expires = expires
+        self._clock = clock
+
+    def _record(self, event: str, count: int = 1) -> None:
+        # Called with the lock held.
+        if count:
+            self.stats[event] += count
+            if self._events is not None:
+                self._events.inc(event, amount=count)
+
+    def _store(self, key: Hashable, value: V, now: float) -> None:
+        expires_at = self._expires(key, value) if self._expires is not None else float("inf")
+        entry = self._data.get(key)
+        self._data[key] = _Entry(value, expires_at, entry.last_access if entry is not None else now)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self._record("eviction")
+
+    def _lookup(self, key: Hashable, now: float) -> _Entry | None:
+        """Return a servable entry, counting it as a hit or a stale hit."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if now >= entry.expires_at + self.max_stale:
+            # Too old to serve: treat as a miss, keeping the value until replaced.
+            return None
+        self._data.move_to_end(key)
+        entry.last_access = now
+        self._record("hit" if now < entry.expires_at else "stale")
+        return entry
+
+    def get(self, key: Hashable, default: Any = None) -> Optional[V]:
+        """Return a cached value, fresh or stale, without loading it or counting the lookup.
+
+        Like every lookup it marks the key as in use for :meth:`drop_idle`.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            self._data.move_to_end(key)
+            entry.last_access = self._clock()
+            return entry.value
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, V]:
+        """Cached values for ``keys``, fresh or stale, without loading any.
+
+        Unlike :meth:`get` each value found counts as a hit or a stale hit;
+        absent keys are left out and not counted.
+        """
+        results: Dict[Hashable, V] = {}
+        with self._lock:
+            now = self._clock()
+            for key in dict.fromkeys(keys):
+                entry = self._data.get(key)
+                if entry is None:
+                    continue
+                self._data.move_to_end(key)
+                entry.last_access = now
+                self._record("hit" if now < entry.expires_at else "stale")
+                results[key] = entry.value
+        return results
+
+    def record(self, event: str, count: int = 1) -> None:
+        """Count ``event`` for work done outside the cache, e.g. loads that :meth:`put` their results."""
+        with self._lock:
+            self._record(event, count)
+
+    def touch(self, keys: Iterable[Hashable]) -> None:
+        """Mark cached ``keys`` as in use for :meth:`drop_idle` without reading them."""
+        with self._lock:
+            now = self._clock()
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is not None:
+                    entry.last_access = now
+
+    def put(self, key: Hashable, value: V) -> None:
+        with self._lock:
+            self._store(key, value, self._clock())
+        if self._on_insert is not None:
+            self._on_insert(key, value)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[Hashable], V]) -> V:
+        """Return the value for ``key``, calling ``loader(key)`` once across all threads."""
+        with self._lock:
+            entry = self._lookup(key, self._clock())
+            if entry is not None:
+                return entry.value
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._record("coalesced")
+                owned = False
+            else:
+                flight = self._flights[key] = _Flight()
+                self._record("miss")
+                owned = True
+        if not owned:
+            return flight.result()
+        self._load({key: flight}, lambda keys: {key: loader(key)}, raise_errors=True)
+        return flight.value
+
+    def get_many_or_load(
+        self,
+        keys: Iterable[Hashable],
+        loader: Callable[[List[Hashable]], Dict[Hashable, V]],
+    ) -> Dict[Hashable, V]:
+        """Batch form of :meth:`get_or_load`.
+
+        Keys that are neither cached nor already loading are passed to one
+        ``loader`` call; keys another thread is loading are waited on. Keys
+        the loader leaves out, or whose load failed, are omitted.
+        """
+        results: Dict[Hashable, V] = {}
+        owned: Dict[Hashable, _Flight] = {}
+        waiting: Dict[Hashable, _Flight] = {}
+        with self._lock:
+            now = self._clock()
+            for key in dict.fromkeys(keys):
+                entry = self._lookup(key, now)
+                if entry is not None:
+                    results[key] = entry.value
+                elif key in self._flights:
+                    waiting[key] = self._flights[key]
+                else:
+                    owned[key] = self._flights[key] = _Flight()
+            self._record("coalesced", len(waiting))
+            self._record("miss", len(owned))
+        if owned:
+            results.update(self._load(owned, loader))
+        for key, flight in waiting.items():
+            try:
+                results[key] = flight.result()
+            except Exception:
+                pass
+        return results
+
+    def missing(self, keys: Iterable[Hashable]) -> List[Hashable]:
+        """Keys :meth:`get_or_load` would have to load: absent or too stale to serve."""
+        with self._lock:
+            cutoff = self._clock() - self.max_stale
+            return [key for key in keys if (entry := self._data.get(key)) is None or entry.expires_at <= cutoff]
+
+    def expired_keys(self) -> List[Hashable]:
+        """Keys whose values have expired and are not already being reloaded."""
+        with self._lock:
+            now = self._clock()
+            return [key for key, entry in self._data.items() if entry.expires_at <= now and key not in self._flights]
+
+    def refresh_many(self, keys: Iterable[Hashable], loader: Callable[[List[Hashable]], Dict[Hashable, V]]) -> int:
+        """Reload ``keys`` with one ``loader`` call while callers keep reading the old values.
+
+        Keys already loading are skipped. On failure the old values stay in
+        place. Returns the number of keys refreshed.
+        """
+        with self._lock:
+            owned = {key: self._flights.setdefault(key, _Flight()) for key in keys if key not in self._flights}
+            self._record("expired", len(owned))
+        if not owned:
+            return 0
+        return len(self._load(owned, loader))
+
+    def drop_idle(self, max_idle: float) -> int:
+        """Forget keys that no lookup has touched for ``max_idle`` seconds."""
+        with self._lock:
+            cutoff = self._clock() - max_idle
+            idle = [key for key, entry in self._data.items() if entry.last_access < cutoff]
+            for key in idle:
+                del self._data[key]
+            self._record("idle", len(idle))
+        return len(idle)
+
+    def _load(
+        self,
+        flights: Dict[Hashable, _Flight],
+        loader: Callable[[List[Hashable]], Dict[Hashable, V]],
+        raise_errors: bool = False,
+    ) -> Dict[Hashable, V]:
+        """Run ``loader`` for claimed ``flights``, publish the outcome and wake waiters."""
+        error: BaseException | None = None
+        values: Dict[Hashable, V] = {}
+        try:
+            loaded = loader(list(flights))
+            values = {key: value for key, value in loaded.items() if key in flights}
+        except BaseException as exc:
+            error = exc
+        try:
+            with self._lock:
+                now = self._clock()
+                for key, flight in flights.items():
+                    if key in values:
+                        self._store(key, values[key], now)
+                        flight.value = values[key]
+                    else:
+                        flight.error = error or KeyError(key)
+                        self._record("load_error")
+                    del self._flights[key]
+            if self._on_insert is not None:
+                for key, value in values.items():
+                    self._on_insert(key, value)
+        finally:
+            for flight in flights.values():
+                flight.done.set()
+        if error is not None and (raise_errors or not isinstance(error, Exception)):
+            raise error
+        return values
+
+    def keys(self) -> List[Hashable]:
+        with self._lock:
+            return list(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,177 @@
+"""Incremental parsing of broker position/lot CSV exports."""
+from __future__ import annotations
+
+import codecs
+import csv
+import re
+from typing import Dict, List, Optional, Tuple
+
+TICKER_COLUMNS = ("symbol", "ticker", "security symbol", "instrument")
+AMOUNT_COLUMNS = ("market value", "current value", "value", "amount", "market value ($)", "mkt val (market value)")
+QUANTITY_COLUMNS = ("quantity", "qty", "shares", "qty (quantity)")
+PRICE_COLUMNS = ("price", "last price", "current price", "price ($)")
+WEIGHT_COLUMNS = ("weight", "allocation", "% of account", "percent of account")
+TICKER_PATTERN = re.compile(r"^[A-Z0-9][A-Z0-9.\-/^=]{0,14}$")
+MISSING_VALUES = {"", "--", "n/a", "na", "-"}
+# Longest record accepted, in characters. Real export rows are a few hundred;
+# an unbalanced quote would otherwise buffer the rest of the upload.
+MAX_RECORD_CHARS = 64 * 1024
+# Symbol cells of broker rows that are not holdings: cash balances, pending
+# settlements and account totals. Several of them look like tickers.
+NON_HOLDING_SYMBOLS = {
+    "CASH",
+    "CASH & CASH INVESTMENTS",
+    "CASH & MONEY MARKET",
+    "CASH AND SWEEP",
+    "PENDING ACTIVITY",
+    "TOTAL",
+    "TOTALS",
+    "ACCOUNT TOTAL",
+    "GRAND TOTAL",
+}
+
+
+class CsvFormatError(ValueError):
+    """The upload is not a CSV the parser can read; ``line`` is where it went wrong."""
+
+    def __init__(self, line: int, message: str) -> None:
+        super().__init__(f"Line {line}: {message}")
+        self.line = line
+
+
+def _column(header: List[str], names: Tuple[str, ...]) -> Optional[int]:
+    for name in names:
+        if name in header:
+            return header.index(name)
+    return None
+
+
+def parse_number(text: str) -> Optional[float]:
+    """Parse broker number formats such as ``$1,234.50``, ``(12.00)`` or ``12.5%``."""
+    text = text.strip()
+    if text.lower() in MISSING_VALUES:
+        return None
+    negative = text.startswith("(") and text.endswith(")")
+    cleaned = text.strip("()").replace("$", "").replace(",", "").replace("%", "").strip()
+    try:
+        value = float(cleaned)
+    except ValueError:
+        return None
+    return -value if negative else value
+
+
+class LotAggregator:
+    """Sums position values per ticker from CSV bytes fed in arbitrary chunks.
+
+    Leading preamble lines are skipped until a header row with a ticker column
+    and a value column (market value, quantity x price, or weight) appears.
+    Cash, pending-activity and total rows (:data:`NON_HOLDING_SYMBOLS`) and
+    rows without a ticker-like symbol or a usable value (footnotes) are
+    counted in ``skipped`` and ignored. Memory is the
+    per-ticker totals plus at most one partial record, whatever the file size:
+    a record longer than ``max_record_chars`` (typically an unbalanced quote)
+    raises :class:`CsvFormatError` naming the line it starts on.
+    """
+
+    def __init__(self, max_record_chars: int = MAX_RECORD_CHARS) -> None:
+        self.totals: Dict[str, float] = {}
+        self.lots = 0
+        self.skipped = 0
+        self.uses_weights = False
+        self.max_record_chars = max_record_chars
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        self._partial = ""
+        self._record: List[str] = []
+        self._record_chars = 0
+        self._record_line = 0
+        self._lines = 0
+        self._quotes = 0
+        self._columns: Optional[Tuple[int, Optional[int], Optional[int], Optional[int]]] = None
+
+    def feed(self, chunk: bytes) -> None:
+        text = self._partial + self._decoder.decode(chunk)
+        lines = text.splitlines(keepends=True)
+        # Keep a trailing line without its newline for the next chunk.
+        self._partial = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+        for line in lines:
+            self._add_line(line)
+        if self._record_chars + len(self._partial) > self.max_record_chars:
+            self._too_long()
+
+    def finish(self) -> Dict[str, float]:
+        """Flush buffered input and return the per-ticker totals."""
+        tail = self._partial + self._decoder.decode(b"", final=True)
+        self._partial = ""
+        if tail:
+            self._add_line(tail + "\n")
+        if self._record:
+            self._parse_record("".join(self._record))
+            self._record = []
+        if self._columns is None:
+            raise ValueError("No header row with a symbol column and a value, quantity/price or weight column.")
+        return self.totals
+
+    def _add_line(self, line: str) -> None:
+        # A quoted field may contain newlines; a record is complete once its
+        # quote count is even ("" escapes keep the parity).
+        self._lines += 1
+        if not self._record:
+            self._record_line = self._lines
+        self._record.append(line)
+        self._record_chars += len(line)
+        self._quotes += line.count('"')
+        if self._record_chars > self.max_record_chars:
+            self._too_long()
+        if self._quotes % 2 == 0:
+            record = "".join(self._record)
+            self._record = []
+            self._record_chars = 0
+            self._quotes = 0
+            self._parse_record(record)
+
+    def _too_long(self) -> None:
+        line = self._record_line if self._record else self._lines + 1
+        hint = " (unbalanced quote?)" if self._quotes % 2 else ""
+        raise CsvFormatError(line, f"record longer than {self.max_record_chars} characters{hint}.")
+
+    def _parse_record(self, record: str) -> None:
+        row = next(csv.reader([record]), [])
+        if not any(cell.strip() for cell in row):
+            return
+        if self._columns is None:
+            self._read_header(row)
+            return
+        ticker_col, amount_col, quantity_col, price_col = self._columns
+        if len(row) <= ticker_col:
+            self.skipped += 1
+            return
+        ticker = row[ticker_col].strip().upper()
+        if ticker.rstrip("*") in NON_HOLDING_SYMBOLS:
+            self.skipped += 1
+            return
+        value: Optional[float] = None
+        if amount_col is not None and amount_col < len(row):
+            value = parse_number(row[amount_col])
+        elif quantity_col is not None and price_col is not None and max(quantity_col, price_col) < len(row):
+            quantity, price = parse_number(row[quantity_col]), parse_number(row[price_col])
+            value = quantity * price if quantity is not None and price is not None else None
+        if not TICKER_PATTERN.match(ticker) or value is None or value < 0:
+            self.skipped += 1
+            return
+        self.totals[ticker] = self.totals.get(ticker, 0.0) + value
+        self.lots += 1
+
+    def _read_header(self, row: List[str]) -> None:
+        header = [cell.strip().lower() for cell in row]
+        ticker_col = _column(header, TICKER_COLUMNS)
+        if ticker_col is None:
+            return
+        amount_col = _column(header, AMOUNT_COLUMNS)
+        quantity_col = _column(header, QUANTITY_COLUMNS)
+        price_col = _column(header, PRICE_COLUMNS)
+        if amount_col is None and (quantity_col is None or price_col is None):
+            amount_col = _column(header, WEIGHT_COLUMNS)
+            if amount_col is None:
+                return
+            self.uses_weights = True
+        self._columns = (ticker_col, amount_col, quantity_col, price_col)
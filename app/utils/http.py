@@ -0,0 +1,59 @@
+"""Pooled keep-alive HTTP clients for upstream services."""
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Dict, Optional
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class AsyncClientPool:
+    """Lazily created :class:`httpx.AsyncClient` shared by every request.
+
+    Connections belong to the event loop that opened them, so the client is
+    tied to the running loop and replaced if a different loop asks for it
+    (tests and scripts that start a loop per call).
+    """
+
+    def __init__(
+        self,
+        base_url: str = "",
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        timeout: float = 10.0,
+        headers: Optional[Dict[str, str]] = None,
+        transport: "httpx.AsyncBaseTransport | None" = None,
+    ) -> None:
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.timeout = timeout
+        self.headers = headers or {}
+        self.transport = transport
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional["httpx.AsyncClient"] = None
+
+    def client(self) -> "httpx.AsyncClient":
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                ),
+                transport=self.transport,
+            )
+            self._loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        if client is not None and self._loop is asyncio.get_running_loop():
+            await client.aclose()
+        self._loop = None
@@ -1,15 +1,55 @@
 """Mathematical helpers for Portfolio Pulse."""
 from __future__ import annotations
 
+import hashlib
 from typing import Dict, Iterable, Tuple
 
+import numpy as np
+
+# Scores are rounded after dropping float noise below this many decimals, so
+# a quantity summed in another order (batch or incremental scoring) rounds
+# the same way as in the scalar scorers.
+NOISE_DECIMALS = 9
 
 def clamp(value: float, minimum: float, maximum: float) -> float:
     return max(min(value, maximum), minimum)
 
 
+def round_score(value: float, digits: int) -> float:
+    """``round(value, digits)`` ignoring float noise below :data:`NOISE_DECIMALS`."""
+    return round(round(value, NOISE_DECIMALS), digits)
+
+
+def round_scores(values: np.ndarray, digits: int) -> np.ndarray:
+    """:func:`round_score` for every element of ``values``.
+
+    ``np.round`` scales and rounds halves to even, which can decide ties
+    differently from ``round``; elements near a tie take the scalar path.
+    """
+    values = np.asarray(values, dtype="f8")
+    rounded = np.round(np.round(values, NOISE_DECIMALS), digits)
+    ties = np.zeros(values.shape, dtype=bool)
+    for decimals in (NOISE_DECIMALS, digits):
+        scaled = values * 10.0 ** decimals
+        ties |= np.abs(scaled - np.floor(scaled) - 0.5) < 1e-3
+    if ties.any():
+        rounded[ties] = [round_score(value, digits) for value in values[ties].tolist()]
+    return rounded
+
+
 def normalize_portfolio(items: Iterable[Tuple[str, float]]) -> Dict[str, float]:
-    total = sum(amount for _, amount in items)
+    """Weights per upper-cased ticker; repeated tickers (e.g. tax lots) are summed."""
+    totals: Dict[str, float] = {}
+    for ticker, amount in items:
+        key = ticker.upper()
+        totals[key] = totals.get(key, 0.0) + amount
+    total = sum(totals.values())
     if total <= 0:
         raise ValueError("Portfolio must have a positive total value.")
-    return {ticker.upper(): amount / total for ticker, amount in items}
+    return {ticker: amount / total for ticker, amount in totals.items()}
+
+
+def portfolio_fingerprint(weights: Dict[str, float], total_value: float) -> str:
+    """Stable hash of a portfolio that ignores holding order and float noise."""
+    canonical = ";".join(f"{ticker.upper()}={weight:.10f}" for ticker, weight in sorted(weights.items()))
+    return hashlib.sha1(f"{canonical}|{total_value:.2f}".encode()).hexdigest()
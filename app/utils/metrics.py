@@ -0,0 +1,302 @@
+"""Minimal in-process Prometheus metrics.
+
+Counters and histograms are plain Python objects guarded by a lock and
+rendered in the Prometheus text exposition format by :func:`render`.
+Recording a sample is a dict lookup, a bisect and two additions, so the
+instrumentation stays on in production.
+"""
+from __future__ import annotations
+
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Sequence, Tuple, TypeVar
+
+F = TypeVar("F", bound=Callable)
+
+# Seconds; spans sub-millisecond scoring up to multi-second upstream downloads.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter, optionally split by label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge:
+    """Value read from a callback at scrape time.
+
+    With ``labels``, the callback returns a mapping of label values to values.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], Any], labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._read = read
+
+    def samples(self) -> List[str]:
+        if not self.labels:
+            return [f"{self.name} {_format_value(self._read())}"]
+        items = sorted(self._read().items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, optionally split by label values."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            series[slot] += 1
+            series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return 0 if series is None else int(sum(series[:-1]))
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        lines: List[str] = []
+        for key, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound) if bound == float("inf") else repr(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {repr(series[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {_format_value(cumulative)}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Counter | Gauge | Histogram] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.register(
+    Histogram(
+        "pulse_http_request_duration_seconds",
+        "HTTP request latency by route template, method and status code.",
+        labels=("method", "route", "status"),
+    )
+)
+function_duration = registry.register(
+    Histogram(
+        "pulse_function_duration_seconds",
+        "Latency of instrumented internal calls.",
+        labels=("function",),
+    )
+)
+price_cache_events = registry.register(
+    Counter(
+        "pulse_price_cache_events_total",
+        "Price cache lookups and evictions by outcome (hit, miss, eviction).",
+        labels=("event",),
+    )
+)
+upstream_requests = registry.register(
+    Counter(
+        "pulse_upstream_requests_total",
+        "Calls to external services by upstream and outcome (ok, error).",
+        labels=("upstream", "outcome"),
+    )
+)
+admission_events = registry.register(
+    Counter(
+        "pulse_admission_requests_total",
+        "Admission decisions by endpoint class and outcome (admitted, queued, degraded, shed, user_limited).",
+        labels=("endpoint_class", "outcome"),
+    )
+)
+admission_wait = registry.register(
+    Histogram(
+        "pulse_admission_wait_seconds",
+        "Time requests spent queued for an endpoint class slot.",
+        labels=("endpoint_class",),
+    )
+)
+
+
+class timer:
+    """Context manager form of :func:`timed` for code that cannot be decorated."""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> "timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        function_duration.observe(time.perf_counter() - self.start, self.name)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Record the wall time of every call to the decorated function, errors included."""
+
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                function_duration.observe(time.perf_counter() - start, name)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def track_upstream(upstream: str) -> Callable[[F], F]:
+    """Count successful and failed calls to an external service (sync or async)."""
+
+    def decorator(fn: F) -> F:
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                try:
+                    result = await fn(*args, **kwargs)
+                except Exception:
+                    upstream_requests.inc(upstream, "error")
+                    raise
+                upstream_requests.inc(upstream, "ok")
+                return result
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                upstream_requests.inc(upstream, "error")
+                raise
+            upstream_requests.inc(upstream, "ok")
+            return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route template.
+
+    Routes are labelled by their template (``/portfolio/score``) rather than
+    the raw path so label cardinality stays bounded; unmatched paths share
+    one ``<unmatched>`` label.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            http_request_duration.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                getattr(route, "path", "<unmatched>"),
+                str(status_code),
+            )
+
+
+def render() -> str:
+    return registry.render()
@@ -0,0 +1 @@
+"""Benchmarks for Portfolio Pulse. Run modules with ``python -m benchmarks.<name>``."""
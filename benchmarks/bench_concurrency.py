@@ -0,0 +1,206 @@
+"""Concurrent in-flight requests per worker against slow stand-in upstreams.
+
+Starts a local stand-in for Supabase Auth and the Yahoo chart API that answers
+after ``--latency`` seconds, one API worker under uvicorn pointed at it, and
+then fires ``--requests`` simultaneous requests from as many users:
+
+    python -m benchmarks.bench_concurrency --requests 2000 --latency 0.5
+
+Each role runs in its own process. Every request waits on the stand-in, so a
+worker that held a thread per request would never have more than 40 upstream
+calls open at once. Reports the wall time per route and the peak number of
+upstream calls the stand-in saw in flight.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+
+# Users spread over this many tickers nobody has loaded yet, so comparisons
+# also wait on the chart stand-in (one download per ticker).
+TICKER_POOL = 32
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def standin_app(latency: float):
+    """Supabase ``/auth/v1/user`` and Yahoo ``/v8/finance/chart/{ticker}`` with fixed latency."""
+    import pandas as pd
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    from .fakes import chart_payload
+
+    current = {"auth": 0, "chart": 0}
+    peak = dict(current)
+
+    async def wait(kind: str) -> None:
+        current[kind] += 1
+        peak[kind] = max(peak[kind], current[kind])
+        try:
+            await asyncio.sleep(latency)
+        finally:
+            current[kind] -= 1
+
+    async def user(request: Request) -> JSONResponse:
+        await wait("auth")
+        token = request.headers.get("authorization", "").removeprefix("Bearer ")
+        if not token.startswith("token-"):
+            return JSONResponse({"msg": "invalid JWT"}, status_code=401)
+        return JSONResponse({"id": token.replace("token-", "user-", 1), "aud": "authenticated"})
+
+    async def chart(request: Request) -> JSONResponse:
+        await wait("chart")
+        start = pd.Timestamp(int(request.query_params["period1"]), unit="s")
+        end = pd.Timestamp(int(request.query_params["period2"]), unit="s")
+        return JSONResponse(chart_payload(request.path_params["ticker"], start, end))
+
+    async def stats(request: Request) -> JSONResponse:
+        body = dict(peak)
+        if request.method == "DELETE":
+            peak.update(current)
+        return JSONResponse(body)
+
+    return Starlette(
+        routes=[
+            Route("/auth/v1/user", user),
+            Route("/v8/finance/chart/{ticker}", chart),
+            Route("/stats", stats, methods=["GET", "DELETE"]),
+        ]
+    )
+
+
+def serve_api(port: int, standin_url: str, requests: int) -> None:
+    """Run the API with yfinance faked (background jobs only) and real upstream clients."""
+    import uvicorn
+
+    os.environ["YAHOO_CHART_URL"] = f"{standin_url}/v8/finance/chart"
+    os.environ["YAHOO_MAX_CONNECTIONS"] = str(requests)
+    os.environ["SUPABASE_MAX_CONNECTIONS"] = str(requests)
+    os.environ["MODEL_METRICS_SNAPSHOT"] = os.path.join(tempfile.mkdtemp(prefix="pulse-bench-"), "metrics.json")
+    # Measure the request path itself rather than the admission limits.
+    for name in ("INTERACTIVE", "ANALYTICS"):
+        os.environ.setdefault(f"ADMISSION_{name}_CONCURRENCY", str(requests))
+        os.environ.setdefault(f"ADMISSION_{name}_QUEUE", str(requests))
+
+    from . import fakes
+
+    fakes.install()
+    from app.main import app
+    from app.services.yahoo_client import yahoo_client
+    from app.utils import auth
+
+    yahoo_client.pool.transport = None
+    client = auth.SupabaseAuthClient(standin_url, "anon-key")
+    auth.get_supabase_client = lambda: client
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", backlog=8192)
+
+
+def _spawn(*args: str) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-m", "benchmarks.bench_concurrency", *args])
+
+
+def _wait_ready(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up")
+
+
+async def _fire(base_url: str, method: str, path: str, tokens: List[str], body=None) -> tuple[float, Dict[int, int]]:
+    limits = httpx.Limits(max_connections=len(tokens), max_keepalive_connections=len(tokens))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=300) as client:
+
+        async def call(i: int, token: str) -> int:
+            headers = {"Authorization": f"Bearer {token}"}
+            response = await client.request(method, path, headers=headers, json=body(i) if body else None)
+            return response.status_code
+
+        start = time.perf_counter()
+        codes = await asyncio.gather(*(call(i, token) for i, token in enumerate(tokens)))
+        wall = time.perf_counter() - start
+    counts: Dict[int, int] = {}
+    for code in codes:
+        counts[code] = counts.get(code, 0) + 1
+    return wall, counts
+
+
+def run(requests: int, latency: float) -> Dict[str, dict]:
+    standin_port, api_port = _free_port(), _free_port()
+    standin_url = f"http://127.0.0.1:{standin_port}"
+    api_url = f"http://127.0.0.1:{api_port}"
+    processes = [_spawn("--standin", str(standin_port), "--latency", str(latency))]
+    try:
+        _wait_ready(f"{standin_url}/stats")
+        processes.append(_spawn("--serve-api", str(api_port), "--standin-url", standin_url, "--requests", str(requests)))
+        _wait_ready(f"{api_url}/health")
+        tokens = [f"token-{i}" for i in range(requests)]
+        results: Dict[str, dict] = {}
+        stages = (
+            (
+                "POST",
+                "/portfolio/upload",
+                lambda i: {"portfolio": [{"ticker": "VTI", "amount": 60}, {"ticker": f"T{i % TICKER_POOL:03d}", "amount": 40}]},
+            ),
+            ("GET", "/portfolio/score", None),
+            ("GET", "/portfolio/model-comparison", None),
+        )
+        for method, path, body in stages:
+            httpx.delete(f"{standin_url}/stats")
+            wall, codes = asyncio.run(_fire(api_url, method, path, tokens, body))
+            results[f"{method} {path}"] = {
+                "requests": requests,
+                "wall_seconds": round(wall, 3),
+                "status_codes": codes,
+                "peak_upstream_in_flight": httpx.get(f"{standin_url}/stats").json(),
+            }
+        return results
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Concurrent in-flight requests against slow upstreams")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.5, help="Stand-in response delay in seconds.")
+    parser.add_argument("--standin", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    parser.add_argument("--serve-api", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    parser.add_argument("--standin-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.standin:
+        import uvicorn
+
+        uvicorn.run(standin_app(args.latency), host="127.0.0.1", port=args.standin, log_level="warning", backlog=8192)
+        return 0
+    if args.serve_api:
+        serve_api(args.serve_api, args.standin_url, args.requests)
+        return 0
+    print(json.dumps(run(args.requests, args.latency), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
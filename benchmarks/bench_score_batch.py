@@ -0,0 +1,59 @@
+"""Compare scalar and batched Pulse scoring on a synthetic advisor book.
+
+Run with ``python -m benchmarks.bench_score_batch [n_portfolios]``.
+"""
+from __future__ import annotations
+
+import random
+import sys
+import time
+from typing import Dict, List
+
+from app.api.batch_scoring import score_portfolios
+from app.api.scoring import model_tracking_error, pulse_score
+from app.config import ASSET_CLASS_MAP, MODEL_PORTFOLIOS
+from app.utils.math_ops import normalize_portfolio
+
+
+def synthetic_book(n: int, seed: int = 7) -> List[Dict[str, float]]:
+    rng = random.Random(seed)
+    universe = sorted(set(ASSET_CLASS_MAP).union(*MODEL_PORTFOLIOS.values())) + [f"STOCK{i}" for i in range(300)]
+    return [
+        normalize_portfolio([(ticker, rng.uniform(100, 10_000)) for ticker in rng.sample(universe, rng.randint(1, 30))])
+        for _ in range(n)
+    ]
+
+
+def main(n: int = 10_000) -> None:
+    book = synthetic_book(n)
+
+    start = time.perf_counter()
+    scalar = [(pulse_score(weights), model_tracking_error(weights)) for weights in book]
+    scalar_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = score_portfolios(book)
+    batch_seconds = time.perf_counter() - start
+
+    mismatches = 0
+    for row, ((total, breakdown, expected_return, *_), tracking) in enumerate(scalar):
+        expected = [total, *breakdown.values(), expected_return, *(tracking[key] for key in batch.model_keys)]
+        actual = [
+            batch.total[row],
+            batch.diversification[row],
+            batch.resilience[row],
+            batch.return_efficiency[row],
+            batch.risk_balance[row],
+            batch.expected_return[row],
+            *batch.tracking[row],
+        ]
+        mismatches += expected != [float(value) for value in actual]
+
+    print(f"portfolios: {n}")
+    print(f"scalar:     {scalar_seconds * 1e3:8.1f} ms")
+    print(f"batch:      {batch_seconds * 1e3:8.1f} ms  ({scalar_seconds / batch_seconds:.1f}x)")
+    print(f"mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
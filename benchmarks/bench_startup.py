@@ -0,0 +1,132 @@
+"""Measure import time and time-to-first-response of the API.
+
+Run with ``python -m benchmarks.bench_startup [--runs N] [--output results.jsonl]``.
+Each run starts a fresh interpreter, so the numbers include cold imports.
+The server runs with the offline fakes from :mod:`benchmarks.fakes` and keeps
+its price store and snapshots in a temporary directory removed afterwards, so
+no run downloads anything or warms up from an earlier one. Time to first
+response is counted from when the fakes are installed. Appending to a JSONL
+file lets the results be tracked over time.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+HEAVY_MODULES = ("pandas", "yfinance", "httpx")
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({"import_seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def _isolated_env(root: str) -> dict:
+    """Environment whose price store, snapshots and shared matrices live under ``root``."""
+    return {
+        **os.environ,
+        "ALLOW_ANON": "true",
+        "PRICE_STORE_DIR": os.path.join(root, "prices"),
+        "PRICE_CACHE_SNAPSHOT": os.path.join(root, "snapshots", "price_cache.json"),
+        "MODEL_METRICS_SNAPSHOT": os.path.join(root, "snapshots", "model_metrics.json"),
+        "SHARED_MATRIX_DIR": os.path.join(root, "shared"),
+    }
+
+
+def measure_import() -> dict:
+    with tempfile.TemporaryDirectory(prefix="pulse-startup-") as root:
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE],
+            check=True,
+            capture_output=True,
+            text=True,
+            env=_isolated_env(root),
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(port: int, root: str) -> None:
+    """Run the API under uvicorn with the fakes installed, as ``benchmarks.run`` does."""
+    import uvicorn
+
+    from . import fakes
+
+    fakes.install(root)
+    print("fakes installed", flush=True)
+    uvicorn.run("app.main:app", host="127.0.0.1", port=port, log_level="warning")
+
+
+def measure_first_response(path: str = "/health", timeout: float = 30.0) -> float:
+    """Seconds from the server's fakes being installed until ``path`` first answers 200."""
+    port = _free_port()
+    with tempfile.TemporaryDirectory(prefix="pulse-startup-") as root:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.bench_startup", "--serve", str(port), "--root", root],
+            env=_isolated_env(root),
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            if not server.stdout.readline():
+                raise RuntimeError("server exited before installing the fakes")
+            start = time.perf_counter()
+            while time.perf_counter() - start < timeout:
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=1) as response:
+                        if response.status == 200:
+                            return time.perf_counter() - start
+                except OSError:
+                    time.sleep(0.01)
+            raise TimeoutError(f"{path} did not respond within {timeout}s")
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+            server.stdout.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Append the summary as one JSON line to this file.")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    parser.add_argument("--root", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.root)
+        return
+
+    imports = [measure_import() for _ in range(args.runs)]
+    first_responses = [measure_first_response() for _ in range(args.runs)]
+    summary = {
+        "timestamp": time.time(),
+        "runs": args.runs,
+        "import_seconds_median": statistics.median(run["import_seconds"] for run in imports),
+        "first_response_seconds_median": statistics.median(first_responses),
+        "heavy_modules_loaded": sorted({m for run in imports for m in run["loaded"]}),
+    }
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "a") as fh:
+            fh.write(json.dumps(summary) + "\n")
+
+
+if __name__ == "__main__":
+    main()
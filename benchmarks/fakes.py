@@ -0,0 +1,131 @@
+"""Deterministic offline stand-ins for yfinance and Supabase.
+
+``install()`` must run before ``app`` is imported: it points the price store
+and snapshots at a temporary directory, then patches ``yfinance.download``,
+the Yahoo chart client and the Supabase client so nothing touches the network.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from typing import Dict, List
+from urllib.parse import unquote
+
+import httpx
+import numpy as np
+import pandas as pd
+
+STATIC_USERS: Dict[str, str] = {f"token-{i}": f"user-{i}" for i in range(64)}
+# Tickers starting with this have no price data, like delisted or mistyped symbols.
+NO_DATA_PREFIX = "DELISTED"
+
+
+def _seed(ticker: str) -> int:
+    return int.from_bytes(hashlib.sha256(ticker.encode()).digest()[:4], "little")
+
+
+def synthetic_closes(ticker: str, start, end) -> pd.Series:
+    """Geometric random walk for ``[start, end)`` that is identical on every call.
+
+    Each ticker's path is generated from a fixed origin date, so different
+    windows of the same ticker agree on overlapping days. Tickers starting
+    with :data:`NO_DATA_PREFIX` get an empty series.
+    """
+    if ticker.startswith(NO_DATA_PREFIX):
+        return pd.Series(dtype="float64")
+    origin = pd.Timestamp("2000-01-03")
+    days = pd.bdate_range(origin, pd.Timestamp(end) - pd.Timedelta(days=1))
+    rng = np.random.default_rng(_seed(ticker))
+    drift = rng.uniform(0.0001, 0.0005)
+    vol = rng.uniform(0.004, 0.02)
+    path = 100 * np.exp(np.cumsum(rng.normal(drift, vol, len(days))))
+    series = pd.Series(path, index=days)
+    return series[series.index >= pd.Timestamp(start)]
+
+
+class FakeYFinance:
+    """Mimics the parts of ``yf.download`` that ``data_loader`` relies on."""
+
+    def __init__(self) -> None:
+        self.calls: List[object] = []
+
+    def download(self, tickers, start=None, end=None, **_kwargs) -> pd.DataFrame:
+        self.calls.append(tickers)
+        names = [tickers] if isinstance(tickers, str) else list(tickers)
+        closes = pd.DataFrame({ticker: synthetic_closes(ticker, start, end) for ticker in names})
+        if isinstance(tickers, str):
+            return pd.DataFrame({"Adj Close": closes[tickers], "Close": closes[tickers]})
+        return pd.concat({"Adj Close": closes, "Close": closes}, axis=1)
+
+
+def chart_payload(ticker: str, start, end) -> dict:
+    """Yahoo chart API response body for :func:`synthetic_closes`."""
+    closes = synthetic_closes(ticker, start, end)
+    # Bars are stamped at the 09:30 New York open, as Yahoo does.
+    timestamps = (closes.index.values.astype("datetime64[s]").astype("int64") + 13 * 3600 + 1800).tolist()
+    return {
+        "chart": {
+            "result": [
+                {
+                    "meta": {"symbol": ticker, "gmtoffset": -14400},
+                    "timestamp": timestamps,
+                    "indicators": {"quote": [{"close": closes.tolist()}], "adjclose": [{"adjclose": closes.tolist()}]},
+                }
+            ],
+            "error": None,
+        }
+    }
+
+
+class FakeYahooChart:
+    """``httpx`` transport answering chart API requests with synthetic closes."""
+
+    def __init__(self) -> None:
+        self.calls: List[str] = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        ticker = unquote(request.url.path.rsplit("/", 1)[-1])
+        self.calls.append(ticker)
+        start = pd.Timestamp(int(request.url.params["period1"]), unit="s")
+        end = pd.Timestamp(int(request.url.params["period2"]), unit="s")
+        return httpx.Response(200, json=chart_payload(ticker, start, end))
+
+
+def supabase_transport(users: Dict[str, str] = STATIC_USERS) -> httpx.MockTransport:
+    """Answers ``GET /auth/v1/user`` for the tokens in ``users`` like Supabase Auth."""
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        token = request.headers.get("authorization", "").removeprefix("Bearer ")
+        user_id = users.get(token)
+        if user_id is None:
+            return httpx.Response(401, json={"msg": "invalid JWT"})
+        return httpx.Response(200, json={"id": user_id, "aud": "authenticated"})
+
+    return httpx.MockTransport(handle)
+
+
+def install(root: str | None = None) -> FakeYFinance:
+    """Patch yfinance, the Yahoo chart client and Supabase with the fakes and isolate on-disk state.
+
+    On-disk state goes under ``root``, a fresh temporary directory by default.
+    """
+    root = root or tempfile.mkdtemp(prefix="pulse-bench-")
+    os.environ["PRICE_STORE_DIR"] = os.path.join(root, "prices")
+    os.environ.setdefault("PORTFOLIO_STORE", "memory")
+    os.environ.pop("SUPABASE_AUTH_MODE", None)
+
+    import yfinance
+
+    fake = FakeYFinance()
+    yfinance.download = fake.download
+
+    from app.services.yahoo_client import yahoo_client
+    from app.utils import auth
+    from app.utils.http import AsyncClientPool
+
+    yahoo_client.pool.transport = httpx.MockTransport(FakeYahooChart().handle)
+    pool = AsyncClientPool("http://supabase.invalid/auth/v1", transport=supabase_transport())
+    client = auth.SupabaseAuthClient("http://supabase.invalid", "anon-key", pool)
+    auth.get_supabase_client = lambda: client
+    return fake
@@ -0,0 +1,64 @@
+"""Timing, summary statistics and baseline comparison for the benchmarks."""
+from __future__ import annotations
+
+import json
+import time
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+
+def summarize(latencies: Sequence[float], wall_seconds: float | None = None) -> Dict[str, float]:
+    """p50/p99/mean latency in microseconds and throughput in operations per second."""
+    samples = np.asarray(latencies) * 1e6
+    wall = wall_seconds if wall_seconds is not None else float(np.sum(latencies))
+    return {
+        "count": int(len(samples)),
+        "p50_us": round(float(np.percentile(samples, 50)), 2),
+        "p99_us": round(float(np.percentile(samples, 99)), 2),
+        "mean_us": round(float(samples.mean()), 2),
+        "ops_per_sec": round(len(samples) / wall, 1) if wall > 0 else float("inf"),
+    }
+
+
+def time_calls(fn: Callable[[], object], iterations: int, warmup: int = 3) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    latencies: List[float] = []
+    clock = time.perf_counter
+    for _ in range(iterations):
+        start = clock()
+        fn()
+        latencies.append(clock() - start)
+    return summarize(latencies)
+
+
+def compare(current: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    """Print a p50/p99 comparison table and return the names that regressed beyond ``tolerance``."""
+    regressions: List[str] = []
+    print(f"{'benchmark':<48} {'p50 base':>10} {'p50 now':>10} {'p99 base':>10} {'p99 now':>10}  change")
+    for name, stats in current.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<48} {'-':>10} {stats['p50_us']:>10.1f} {'-':>10} {stats['p99_us']:>10.1f}  new")
+            continue
+        change = stats["p50_us"] / base["p50_us"] - 1 if base["p50_us"] else 0.0
+        flag = ""
+        if change > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            f"{name:<48} {base['p50_us']:>10.1f} {stats['p50_us']:>10.1f} "
+            f"{base['p99_us']:>10.1f} {stats['p99_us']:>10.1f}  {change:+.1%}{flag}"
+        )
+    return regressions
+
+
+def load_results(path: str) -> Dict[str, Dict[str, float]]:
+    with open(path) as fh:
+        return json.load(fh)["results"]
+
+
+def save_results(path: str, results: Dict[str, Dict[str, float]]) -> None:
+    with open(path, "w") as fh:
+        json.dump({"timestamp": time.time(), "results": results}, fh, indent=2, sort_keys=True)
@@ -0,0 +1,102 @@
+"""In-process load test of every ``/portfolio/*`` route through the ASGI app."""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Dict, List
+
+import httpx
+
+from app.main import app
+
+from .fakes import STATIC_USERS
+from .micro import synthetic_portfolio
+
+GET_ROUTES = (
+    "/portfolio/score",
+    "/portfolio/model-comparison",
+    "/portfolio/rebalance-suggestions",
+    "/portfolio/summary",
+    "/portfolio/backtest",
+    "/portfolio/score-history",
+    "/portfolio/simulation?paths=2000",
+)
+
+
+def _headers(token: str) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _upload_payload(size: int, seed: int) -> dict:
+    weights = synthetic_portfolio(size, seed)
+    return {"portfolio": [{"ticker": ticker, "amount": round(weight * 10_000, 2)} for ticker, weight in weights.items()]}
+
+
+def _csv_payload(size: int, seed: int) -> bytes:
+    """Broker export with two lots per holding plus the cash and total rows exports carry."""
+    weights = synthetic_portfolio(size, seed)
+    lines = ["Account Summary", "", "Symbol,Quantity,Price,Market Value"]
+    for ticker, weight in weights.items():
+        value = weight * 10_000
+        lines += [f"{ticker},1,{value / 2:.2f},{value / 2:.2f}"] * 2
+    lines += ["CASH,,,250.00", "TOTAL,,,10250.00"]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def _holdings_patch(i: int) -> dict:
+    return {"changes": [{"ticker": "VTI", "delta": 10.0}, {"ticker": "IAU", "amount": 100.0 + i % 7}]}
+
+
+async def _drive(client: httpx.AsyncClient, method: str, path: str, requests: int, concurrency: int, body=None):
+    tokens = list(STATIC_USERS)
+    latencies: List[float] = []
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        for i in counter:
+            token = tokens[i % len(tokens)]
+            payload = body(i) if body else None
+            if isinstance(payload, bytes):
+                kwargs = {"content": payload, "headers": {**_headers(token), "Content-Type": "text/csv"}}
+            else:
+                kwargs = {"json": payload, "headers": _headers(token)}
+            start = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise RuntimeError(f"{method} {path} returned {response.status_code}: {response.text}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+async def _run(requests: int, concurrency: int, holdings: int) -> Dict[str, Dict[str, float]]:
+    from .harness import summarize
+
+    results: Dict[str, Dict[str, float]] = {}
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        # Every static user gets a portfolio; this also measures uploads.
+        latencies, wall = await _drive(
+            client, "POST", "/portfolio/upload", len(STATIC_USERS), concurrency, lambda i: _upload_payload(holdings, i)
+        )
+        results["load/POST /portfolio/upload"] = summarize(latencies, wall)
+        batch = {"portfolios": [{"id": str(i), **_upload_payload(holdings, i)} for i in range(100)]}
+        latencies, wall = await _drive(client, "POST", "/portfolio/score-batch", max(1, requests // 10), concurrency, lambda i: batch)
+        results["load/POST /portfolio/score-batch (100)"] = summarize(latencies, wall)
+        for path in GET_ROUTES:
+            await _drive(client, "GET", path, concurrency, concurrency)  # warm caches
+            latencies, wall = await _drive(client, "GET", path, requests, concurrency)
+            results[f"load/GET {path}"] = summarize(latencies, wall)
+        # Edits run after the reads so they do not invalidate the warmed caches mid-measurement.
+        latencies, wall = await _drive(client, "PATCH", "/portfolio/holdings", requests, concurrency, _holdings_patch)
+        results["load/PATCH /portfolio/holdings"] = summarize(latencies, wall)
+        latencies, wall = await _drive(
+            client, "POST", "/portfolio/upload-csv", requests, concurrency, lambda i: _csv_payload(holdings, i)
+        )
+        results["load/POST /portfolio/upload-csv"] = summarize(latencies, wall)
+    return results
+
+
+def run(requests: int = 500, concurrency: int = 16, holdings: int = 20) -> Dict[str, Dict[str, float]]:
+    return asyncio.run(_run(requests, concurrency, holdings))
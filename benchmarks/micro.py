@@ -0,0 +1,40 @@
+"""Micro-benchmarks of the scoring and data functions across portfolio sizes."""
+from __future__ import annotations
+
+import random
+from typing import Dict
+
+from app.api.scoring import build_asset_class_distribution, model_tracking_error, pulse_score
+from app.config import ASSET_CLASS_MAP, MODEL_PORTFOLIOS
+from app.services.data_loader import fetch_price_histories
+from app.services.risk import expected_performance
+from app.utils.math_ops import normalize_portfolio
+
+from .harness import time_calls
+
+SIZES = (5, 50, 500)
+
+
+def synthetic_portfolio(size: int, seed: int = 11) -> Dict[str, float]:
+    rng = random.Random(seed + size)
+    known = sorted(set(ASSET_CLASS_MAP).union(*MODEL_PORTFOLIOS.values()))
+    universe = known + [f"SYN{i:04d}" for i in range(max(0, size - len(known)))]
+    return normalize_portfolio([(ticker, rng.uniform(100, 10_000)) for ticker in rng.sample(universe, size)])
+
+
+def run(iterations: int = 200) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    for size in SIZES:
+        weights = synthetic_portfolio(size)
+        # Prime the price cache and risk model so the timings cover the warm path.
+        expected_performance(weights)
+        cases = {
+            "build_asset_class_distribution": lambda: build_asset_class_distribution(weights),
+            "pulse_score": lambda: pulse_score(weights),
+            "model_tracking_error": lambda: model_tracking_error(weights),
+            "expected_performance": lambda: expected_performance(weights),
+        }
+        for name, fn in cases.items():
+            results[f"micro/{name}/holdings={size}"] = time_calls(fn, iterations)
+    results["micro/fetch_price_histories/cache_hit"] = time_calls(lambda: fetch_price_histories(["VTI"]), iterations)
+    return results
@@ -0,0 +1,58 @@
+"""Run the offline benchmark suite.
+
+    python -m benchmarks.run                      # micro + load, print results
+    python -m benchmarks.run --save base.json     # store a baseline
+    python -m benchmarks.run --compare base.json  # exit 1 on p50 regressions
+
+yfinance and Supabase are replaced by the deterministic fakes in
+:mod:`benchmarks.fakes`, so results are reproducible without network access.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+
+from . import fakes
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Portfolio Pulse benchmark suite")
+    parser.add_argument("--suite", choices=("all", "micro", "load"), default="all")
+    parser.add_argument("--iterations", type=int, default=200, help="Calls per micro-benchmark.")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per route in the load test.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--save", help="Write results to this JSON file.")
+    parser.add_argument("--compare", help="Compare against a saved baseline JSON file.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p50 slowdown before failing.")
+    args = parser.parse_args()
+
+    fakes.install()
+    # The load test measures handler throughput, so admission control must not
+    # shed or degrade its concurrent requests.
+    for name in ("INTERACTIVE", "ANALYTICS", "SIMULATION"):
+        os.environ.setdefault(f"ADMISSION_{name}_CONCURRENCY", "4096")
+        os.environ.setdefault(f"ADMISSION_{name}_PER_USER", "4096")
+    # Imported after the fakes are installed so the app picks up the patched environment.
+    from . import load, micro
+    from .harness import compare, load_results, save_results
+
+    results = {}
+    if args.suite in ("all", "micro"):
+        results.update(micro.run(args.iterations))
+    if args.suite in ("all", "load"):
+        results.update(load.run(args.requests, args.concurrency))
+
+    if args.compare:
+        regressions = compare(results, load_results(args.compare), args.tolerance)
+    else:
+        print(json.dumps(results, indent=2))
+        regressions = []
+    if args.save:
+        save_results(args.save, results)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""Run the suite against the offline fakes from :mod:`benchmarks.fakes`.
+
+The fakes are installed while this module is imported, before any test module
+imports ``app``, so the price store and snapshots live in a temporary
+directory and no test touches Yahoo or Supabase. :data:`EXTRA_MODEL` is
+registered through ``MODEL_DIR`` alongside the built-in models.
+"""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+
+import httpx
+import pytest
+
+from benchmarks import fakes
+
+# A model registered from MODEL_DIR on top of the built-in ones.
+EXTRA_MODEL = {"key": "three_fund", "name": "Three Fund", "weights": {"VTI": 0.5, "VXUS": 0.3, "BND": 0.2}}
+
+_model_dir = tempfile.mkdtemp(prefix="pulse-models-")
+with open(os.path.join(_model_dir, "three_fund.json"), "w") as fh:
+    json.dump(EXTRA_MODEL, fh)
+os.environ["MODEL_DIR"] = _model_dir
+_yfinance = fakes.install()
+_chart = fakes.FakeYahooChart()
+
+from app.services.yahoo_client import yahoo_client  # noqa: E402
+
+yahoo_client.pool.transport = httpx.MockTransport(_chart.handle)
+
+
+@pytest.fixture
+def fake_yfinance() -> fakes.FakeYFinance:
+    """The patched ``yf.download``; ``calls`` lists the tickers of every download."""
+    _yfinance.calls.clear()
+    return _yfinance
+
+
+@pytest.fixture
+def fake_chart() -> fakes.FakeYahooChart:
+    """The Yahoo chart API stand-in; ``calls`` lists the requested tickers."""
+    _chart.calls.clear()
+    return _chart
+
+
+@pytest.fixture
+def client():
+    """Client for the ASGI app; bearer ``token-n`` authenticates as ``user-n``."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    return TestClient(app)
+
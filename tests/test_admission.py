@@ -0,0 +1,50 @@
+import asyncio
+
+from app.utils.admission import DEGRADED, NORMAL, SHED, EndpointClass
+
+
+def test_waiting_past_degrade_after_keeps_queue_position():
+    async def scenario():
+        endpoint_class = EndpointClass(
+            "test", limit=1, max_queue=8, queue_timeout=1.0, per_user=4,
+            degradable=True, degrade_after=0.2, degraded_limit=0,
+        )
+        assert await endpoint_class.acquire("a") == NORMAL
+        admitted = []
+
+        async def request(user):
+            mode = await endpoint_class.acquire(user)
+            admitted.append(user)
+            return mode
+
+        first = asyncio.ensure_future(request("b"))
+        await asyncio.sleep(0.1)
+        second = asyncio.ensure_future(request("c"))
+        # "b" has passed degrade_after with no degraded slot free; "c" has not.
+        await asyncio.sleep(0.15)
+        assert endpoint_class.queue_depth == 2
+        endpoint_class.release("a", NORMAL)
+        assert await first == NORMAL
+        endpoint_class.release("b", NORMAL)
+        assert await second == NORMAL
+        endpoint_class.release("c", NORMAL)
+        return admitted, endpoint_class
+
+    admitted, endpoint_class = asyncio.run(scenario())
+    assert admitted == ["b", "c"]
+    assert (endpoint_class.in_flight, endpoint_class.queue_depth) == (0, 0)
+
+
+def test_timed_out_waiters_leave_the_queue():
+    async def scenario():
+        endpoint_class = EndpointClass(
+            "test", limit=1, max_queue=8, queue_timeout=0.05, per_user=4,
+            degradable=True, degrade_after=0.01, degraded_limit=1,
+        )
+        assert await endpoint_class.acquire("a") == NORMAL
+        modes = await asyncio.gather(endpoint_class.acquire("b"), endpoint_class.acquire("c"))
+        return modes, endpoint_class
+
+    modes, endpoint_class = asyncio.run(scenario())
+    assert modes == [DEGRADED, SHED]
+    assert endpoint_class.queue_depth == 0
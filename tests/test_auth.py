@@ -0,0 +1,77 @@
+import io
+import json
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt import jwks_client
+
+from app.utils.auth import LocalJWTVerifier
+
+KID = "test-key"
+
+
+def _keys():
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return private, private.public_key()
+
+
+PRIVATE_KEY, PUBLIC_KEY = _keys()
+OTHER_KEY, _ = _keys()
+
+
+JWKS = {"keys": [jwt.algorithms.RSAAlgorithm.to_jwk(PUBLIC_KEY, as_dict=True) | {"kid": KID, "use": "sig"}]}
+
+
+@pytest.fixture
+def jwks_fetches(monkeypatch):
+    """Serve :data:`JWKS` in place of the Supabase JWKS endpoint; lists the fetched URLs."""
+    fetches = []
+
+    def urlopen(request, timeout=None, context=None):
+        fetches.append(request.full_url)
+        return io.BytesIO(json.dumps(JWKS).encode())
+
+    monkeypatch.setattr(jwks_client.urllib.request, "urlopen", urlopen)
+    return fetches
+
+
+def _verifier(**kwargs) -> LocalJWTVerifier:
+    return LocalJWTVerifier(jwks_url="http://supabase.invalid/auth/v1/.well-known/jwks.json", **kwargs)
+
+
+def _token(key=PRIVATE_KEY, **claims) -> str:
+    payload = {"sub": "user-1", "aud": "authenticated", "exp": int(time.time()) + 60, **claims}
+    return jwt.encode(payload, key, algorithm="RS256", headers={"kid": KID})
+
+
+def test_valid_token_returns_its_claims_and_caches_the_keys(jwks_fetches):
+    verifier = _verifier()
+    assert verifier.verify(_token())["sub"] == "user-1"
+    assert verifier.verify(_token(sub="user-2"))["sub"] == "user-2"
+    assert len(jwks_fetches) == 1
+
+
+def test_expired_token_is_rejected(jwks_fetches):
+    with pytest.raises(jwt.ExpiredSignatureError):
+        _verifier().verify(_token(exp=int(time.time()) - 60))
+
+
+def test_token_signed_with_another_key_is_rejected(jwks_fetches):
+    with pytest.raises(jwt.InvalidSignatureError):
+        _verifier().verify(_token(key=OTHER_KEY))
+
+
+def test_token_for_another_audience_is_rejected(jwks_fetches):
+    with pytest.raises(jwt.InvalidAudienceError):
+        _verifier().verify(_token(aud="anon"))
+
+
+def test_shared_secret_tokens_are_verified_without_jwks():
+    verifier = LocalJWTVerifier(secret="shared-secret")
+    token = jwt.encode({"sub": "user-2", "aud": "authenticated", "exp": int(time.time()) + 60}, "shared-secret")
+    assert not verifier.uses_jwks
+    assert verifier.verify(token)["sub"] == "user-2"
+    with pytest.raises(jwt.InvalidSignatureError):
+        LocalJWTVerifier(secret="other-secret").verify(token)
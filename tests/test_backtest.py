@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from app.config import GlobalConfig
+from app.services.backtest import drifted_weights, rebalance_starts, run_backtests
+from app.services.data_loader import PriceMatrix
+
+DATES = np.array(["2024-01-02", "2024-02-15", "2024-04-01", "2024-05-15", "2024-07-01"], dtype="datetime64[D]")
+# B has no bar on 2024-02-15 and keeps its last price.
+MATRIX = PriceMatrix(
+    dates=DATES,
+    tickers=("A", "B"),
+    prices=np.array([[100.0, 50.0], [110.0, np.nan], [120.0, 40.0], [132.0, 40.0], [120.0, 50.0]]),
+)
+
+
+def test_rebalance_starts_open_each_calendar_period():
+    assert rebalance_starts(DATES, "quarterly").tolist() == [0, 2, 4]
+    assert rebalance_starts(DATES, "monthly").tolist() == [0, 1, 2, 3, 4]
+    assert rebalance_starts(DATES, "annual").tolist() == [0]
+
+
+def test_trade_cost_is_charged_on_each_rebalance():
+    config = GlobalConfig(expense_ratio_bps=0, trade_cost_bp_per_rebalance=100)
+    result = run_backtests({"half": {"A": 0.5, "B": 0.5}}, MATRIX, config)
+    # Quarter 1 ends flat (0.5 x 1.2 + 0.5 x 0.8) and pays 1%; quarter 2
+    # grows 1.125 and pays 1% again on 2024-07-01.
+    expected = [100.0, 105.0, 99.0, 103.95, 99.0 * 1.125 * 0.99]
+    assert result.curve("half") == pytest.approx(expected)
+
+
+def test_expense_ratio_drags_by_elapsed_time():
+    config = GlobalConfig(expense_ratio_bps=100, trade_cost_bp_per_rebalance=0)
+    result = run_backtests({"a": {"A": 1.0}}, MATRIX, config)
+    days = (DATES - DATES[0]).astype("int64")
+    expected = 100.0 * np.array([100.0, 110.0, 120.0, 132.0, 120.0]) / 100.0 * 0.99 ** (days / 365)
+    assert result.curve("a") == pytest.approx(expected)
+
+
+def test_unpriced_holdings_are_dropped_and_the_rest_renormalized():
+    config = GlobalConfig(expense_ratio_bps=0, trade_cost_bp_per_rebalance=0)
+    result = run_backtests({"a": {"A": 0.5, "ZZNONE": 0.5}, "none": {"ZZNONE": 1.0}}, MATRIX, config)
+    assert result.keys == ["a"]
+    assert result.curve("a")[-1] == pytest.approx(120.0)
+
+
+def test_drifted_weights_follow_prices_between_period_starts():
+    dates, tickers, weights = drifted_weights({"A": 0.5, "B": 0.25, "ZZNONE": 0.25}, MATRIX, "quarterly")
+    assert dates.tolist() == DATES[[0, 2, 4]].tolist()
+    assert tickers == ["A", "B", "ZZNONE"]
+    # A and B move with prices; the unpriced holding keeps its value.
+    expected = [[0.5, 0.25, 0.25], [0.6 / 1.05, 0.2 / 1.05, 0.25 / 1.05], [0.6 / 1.1, 0.25 / 1.1, 0.25 / 1.1]]
+    assert weights == pytest.approx(np.array(expected))
@@ -0,0 +1,71 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.api.batch_scoring import score_portfolios
+from app.api.scoring import model_tracking_error, pulse_score
+from app.config import ASSET_CLASS_MAP, MODEL_PORTFOLIOS
+from app.services.ticker_metrics import ticker_metrics
+from app.utils.math_ops import normalize_portfolio
+from benchmarks.fakes import synthetic_closes
+
+KNOWN = sorted(set(ASSET_CLASS_MAP).union(*MODEL_PORTFOLIOS.values()))
+UNKNOWN = [f"ZZB{i}" for i in range(5)]
+
+
+@pytest.fixture(autouse=True)
+def _known_metrics():
+    # Portfolios of known tickers score from historical metrics, the rest
+    # from the asset-mix heuristics.
+    for ticker in KNOWN:
+        closes = synthetic_closes(ticker, "2015-01-01", "2025-01-01")
+        ticker_metrics.update(ticker, closes.index.values, closes.values)
+
+
+def _random_portfolios(count: int, seed: int):
+    rng = random.Random(seed)
+    portfolios = []
+    for _ in range(count):
+        universe = KNOWN + UNKNOWN if rng.random() < 0.5 else KNOWN
+        tickers = rng.sample(universe, rng.randint(1, 12))
+        portfolios.append(normalize_portfolio([(ticker, rng.uniform(1, 1000)) for ticker in tickers]))
+    return portfolios
+
+
+def _fractional_portfolios(count: int, seed: int):
+    # Weights like 1/8 or 7/40 land component sums exactly on rounding ties.
+    rng = random.Random(seed)
+    portfolios = []
+    for _ in range(count):
+        denominator = rng.choice([2, 4, 5, 8, 10, 16, 20, 40, 100])
+        cuts = sorted(rng.sample(range(1, denominator), min(rng.randint(0, 5), denominator - 1)))
+        parts = [b - a for a, b in zip([0, *cuts], [*cuts, denominator])]
+        universe = KNOWN + UNKNOWN if rng.random() < 0.5 else KNOWN
+        portfolios.append(dict(zip(rng.sample(universe, len(parts)), (part / denominator for part in parts))))
+    return portfolios
+
+
+def test_batch_scores_match_the_scalar_scorers():
+    _assert_matches_scalar(_random_portfolios(500, seed=20240601))
+
+
+def test_batch_scores_match_at_rounding_boundaries():
+    boundaries = [{"SPY": 0.125, "TIP": 0.875}, {"SPY": 0.125, "TIP": 0.875, "ZZB0": 0.0}, {"ZZB1": 0.125, "TIP": 0.875}]
+    _assert_matches_scalar(boundaries + _fractional_portfolios(3000, seed=7))
+
+
+def _assert_matches_scalar(portfolios):
+    scores = score_portfolios(portfolios)
+    grades = scores.grades()
+    for row, weights in enumerate(portfolios):
+        total, breakdown, expected_return, _, grade, _ = pulse_score(weights)
+        assert scores.total[row] == total
+        assert scores.diversification[row] == breakdown["diversification"]
+        assert scores.resilience[row] == breakdown["resilience"]
+        assert scores.return_efficiency[row] == breakdown["return_efficiency"]
+        assert scores.risk_balance[row] == breakdown["risk_balance"]
+        assert scores.expected_return[row] == expected_return
+        assert grades[row] == grade
+        tracking = model_tracking_error(weights)
+        np.testing.assert_array_equal(scores.tracking[row], [tracking[key] for key in scores.model_keys])
@@ -0,0 +1,22 @@
+from app.utils.cache import SingleFlightCache
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_plain_gets_keep_keys_from_going_idle():
+    clock = _Clock()
+    cache = SingleFlightCache(8, clock=clock)
+    cache.put("read", 1)
+    cache.put("unread", 2)
+    for _ in range(5):
+        clock.now += 60
+        assert cache.get("read") == 1
+        cache.drop_idle(120)
+    assert cache.keys() == ["read"]
+    assert cache.stats["idle"] == 1
@@ -0,0 +1,63 @@
+import pytest
+
+from app.utils.csv_lots import CsvFormatError, LotAggregator
+
+HEADERS = {"Authorization": "Bearer token-11", "Content-Type": "text/csv"}
+
+EXPORT = (
+    b'"Positions for account Brokerage ...1234 as of 04:00 PM ET"\n'
+    b"\n"
+    b"Symbol,Description,Quantity,Price,Market Value\n"
+    b'VTI,VANGUARD TOTAL STOCK MKT,10,"$250.00","$2,500.00"\n'
+    b"VTI,VANGUARD TOTAL STOCK MKT,2,$250.00,$500.00\n"
+    b"BND,VANGUARD TOTAL BOND MARKET,20,$75.00,\"$1,500.00\"\n"
+    b'CASH,Cash & Cash Investments,--,--,"$1,000.00"\n'
+    b'Cash & Cash Investments,,--,--,"$1,000.00"\n'
+    b"Pending activity,,--,--,$250.00\n"
+    b'TOTAL,,--,--,"$6,750.00"\n'
+    b'Account Total,,--,--,"$6,750.00"\n'
+)
+
+
+def _parse(data: bytes, chunk: int) -> LotAggregator:
+    aggregator = LotAggregator()
+    for i in range(0, len(data), chunk):
+        aggregator.feed(data[i : i + chunk])
+    aggregator.finish()
+    return aggregator
+
+
+def test_cash_and_total_rows_are_not_holdings():
+    aggregator = _parse(EXPORT, len(EXPORT))
+    assert aggregator.totals == {"VTI": 3000.0, "BND": 1500.0}
+    assert aggregator.lots == 3
+    assert aggregator.skipped == 5
+
+
+def test_chunk_boundaries_do_not_change_totals():
+    for chunk in (1, 7, 64):
+        assert _parse(EXPORT, chunk).totals == {"VTI": 3000.0, "BND": 1500.0}
+
+
+def test_unbalanced_quote_is_capped_and_names_its_line():
+    data = EXPORT + b'VXUS,"VANGUARD TOTAL INTL,5,$60.00,$300.00\n' + b"BND,BOND,1,$75.00,$75.00\n" * 200
+    aggregator = LotAggregator(max_record_chars=1024)
+    with pytest.raises(CsvFormatError) as excinfo:
+        for i in range(0, len(data), 64):
+            aggregator.feed(data[i : i + 64])
+    assert excinfo.value.line == 12
+    assert str(excinfo.value).startswith("Line 12:")
+
+
+def test_overlong_line_without_newline_is_rejected():
+    aggregator = LotAggregator(max_record_chars=1024)
+    with pytest.raises(CsvFormatError) as excinfo:
+        aggregator.feed(b"Symbol,Market Value\n" + b"A" * 2048)
+    assert excinfo.value.line == 2
+
+
+def test_upload_with_unbalanced_quote_is_a_400(client):
+    body = b"Symbol,Market Value\n" + b'VTI,"2500\n' + b"BND,1500\n" * 10000
+    response = client.post("/portfolio/upload-csv", content=body, headers=HEADERS)
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Line 2:")
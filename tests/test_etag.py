@@ -0,0 +1,74 @@
+from app.api import portfolio
+from app.config import GLOBAL_CONFIG
+from app.services import model_metrics as model_metrics_module
+from app.services.data_loader import price_cache
+from app.services.model_metrics import model_metrics
+
+HEADERS = {"Authorization": "Bearer token-13"}
+PORTFOLIO = [{"ticker": "VTI", "weight": 60}, {"ticker": "ZZETAG", "weight": 40}]
+
+
+def _settled(client, path):
+    # The first responses build the risk model and model metrics the tag
+    # covers; poll until the tag holds.
+    etag = None
+    for _ in range(5):
+        response = client.get(path, headers=HEADERS)
+        if response.headers["etag"] == etag:
+            return response
+        etag = response.headers["etag"]
+    raise AssertionError(f"ETag of {path} never settled")
+
+
+def _upload(client, portfolio=PORTFOLIO):
+    assert client.post("/portfolio/upload", json={"portfolio": portfolio}, headers=HEADERS).status_code == 200
+
+
+def test_matching_if_none_match_gets_an_empty_304(client):
+    _upload(client)
+    for path in ("/portfolio/score", "/portfolio/model-comparison", "/portfolio/summary"):
+        etag = _settled(client, path).headers["etag"]
+        response = client.get(path, headers={**HEADERS, "If-None-Match": f'W/{etag}, "other"'})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+
+def test_unchanged_responses_reuse_the_serialized_body(client, monkeypatch):
+    _upload(client)
+    first = _settled(client, "/portfolio/score")
+    builds = []
+    serialize = portfolio._serialize
+    monkeypatch.setattr(portfolio, "_serialize", lambda build: builds.append(build) or serialize(build))
+    again = client.get("/portfolio/score", headers=HEADERS)
+    assert again.content == first.content
+    assert builds == []
+
+
+def test_holdings_and_price_changes_change_the_tag(client):
+    _upload(client)
+    etag = _settled(client, "/portfolio/score").headers["etag"]
+    _upload(client, [{"ticker": "VTI", "weight": 50}, {"ticker": "ZZETAG", "weight": 50}])
+    moved = client.get("/portfolio/score", headers={**HEADERS, "If-None-Match": etag})
+    assert moved.status_code == 200
+    key = ("ZZETAG", GLOBAL_CONFIG.lookback_years)
+    price_cache.put(key, price_cache.get(key) * 1.01)
+    repriced = client.get("/portfolio/score", headers={**HEADERS, "If-None-Match": moved.headers["etag"]})
+    assert repriced.status_code == 200
+
+
+def test_model_metrics_refresh_invalidates_the_tag(client, monkeypatch):
+    _upload(client)
+    before = _settled(client, "/portfolio/model-comparison")
+    performance = model_metrics_module._model_performance()
+    bumped = {key: {**values, "expected_return": values["expected_return"] + 0.01} for key, values in performance.items()}
+    monkeypatch.setattr(model_metrics_module, "_model_performance", lambda: bumped)
+    try:
+        model_metrics.refresh(force=True)
+        after = client.get("/portfolio/model-comparison", headers={**HEADERS, "If-None-Match": before.headers["etag"]})
+    finally:
+        monkeypatch.undo()
+        model_metrics.refresh(force=True)
+    assert after.status_code == 200
+    returns = {model["model_key"]: model["expected_return"] for model in after.json()["models"]}
+    assert returns == {key: round(values["expected_return"], 4) for key, values in bumped.items()}
@@ -0,0 +1,41 @@
+import random
+
+from app.api import portfolio
+from app.api.scoring import model_tracking_error, pulse_score
+from app.config import ASSET_CLASS_MAP
+
+HEADERS = {"Authorization": "Bearer token-14"}
+TICKERS = sorted(ASSET_CLASS_MAP)[:12] + ["ZZHOLD"]
+
+
+def _patch(client, changes):
+    return client.patch("/portfolio/holdings", json={"changes": changes}, headers=HEADERS)
+
+
+def test_patch_sequence_matches_a_full_recompute(client):
+    upload = [{"ticker": "VTI", "amount": 400}, {"ticker": "BND", "amount": 400}, {"ticker": "IAU", "amount": 200}]
+    response = client.post("/portfolio/upload", json={"portfolio": upload}, headers=HEADERS)
+    user_id = response.json()["user_id"]
+    rng = random.Random(21)
+    # Start on ties: equal largest holdings and a hedge weight right at 10%.
+    edits = [[{"ticker": "IAU", "delta": -100}, {"ticker": "TLT", "amount": 100}], [{"ticker": "VTI", "amount": 0}]]
+    for _ in range(300):
+        changes = []
+        for ticker in rng.sample(TICKERS, rng.randint(1, 3)):
+            if rng.random() < 0.5:
+                changes.append({"ticker": ticker, "amount": rng.choice([0, rng.randint(1, 40) * 25])})
+            else:
+                changes.append({"ticker": ticker, "delta": rng.randint(-8, 8) * 12.5})
+        edits.append(changes)
+    applied = 0
+    for changes in edits:
+        response = _patch(client, changes)
+        if response.status_code == 422:
+            continue
+        assert response.status_code == 200
+        applied += 1
+        weights = portfolio.portfolio_store.get_portfolio(user_id)
+        body = response.json()
+        assert body["score"] == portfolio._score_model(pulse_score(weights)).dict(), changes
+        assert body["tracking_error"] == model_tracking_error(weights), changes
+    assert applied > 200
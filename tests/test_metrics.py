@@ -0,0 +1,89 @@
+import re
+
+import httpx
+
+from app.services.data_loader import price_cache
+from app.services.yahoo_client import yahoo_client
+
+HEADERS = {"Authorization": "Bearer token-17"}
+PORTFOLIO = [{"ticker": "VTI", "weight": 60}, {"ticker": "ZZMETRICS", "weight": 40}]
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{([a-zA-Z_]\w*="(?:[^"\\]|\\.)*",?)*\})? (\S+)$')
+
+
+def _samples(text):
+    samples = {}
+    for line in text.splitlines():
+        if not line.startswith("#"):
+            match = SAMPLE.match(line)
+            assert match, line
+            samples[line.rsplit(" ", 1)[0]] = float(match.group(4))
+    return samples
+
+
+def test_exposition_format(client):
+    client.get("/health")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    text = response.text
+    assert text.endswith("\n")
+    families = re.findall(r"^# TYPE (\S+) (counter|gauge|histogram)$", text, re.M)
+    assert {name for name, _ in families} == set(re.findall(r"^# HELP (\S+) ", text, re.M))
+    samples = _samples(text)
+    # Histogram buckets are cumulative and end in +Inf, equal to the count.
+    series = 'method="GET",route="/health",status="200"'
+    buckets = [value for key, value in samples.items() if key.startswith(f"pulse_http_request_duration_seconds_bucket{{{series},")]
+    assert buckets == sorted(buckets)
+    assert samples[f'pulse_http_request_duration_seconds_bucket{{{series},le="+Inf"}}'] == buckets[-1]
+    assert samples[f"pulse_http_request_duration_seconds_count{{{series}}}"] == buckets[-1]
+
+
+def test_requests_are_labelled_by_route_template(client):
+    client.post("/portfolio/upload", json={"portfolio": PORTFOLIO}, headers=HEADERS)
+    before = _samples(client.get("/metrics").text)
+    assert client.get("/portfolio/score", headers=HEADERS).status_code == 200
+    assert client.get("/portfolio/score").status_code == 401
+    assert client.get("/no/such/path/42").status_code == 404
+    after = _samples(client.get("/metrics").text)
+
+    def count(method, route, status):
+        key = f'pulse_http_request_duration_seconds_count{{method="{method}",route="{route}",status="{status}"}}'
+        return after.get(key, 0) - before.get(key, 0)
+
+    assert count("GET", "/portfolio/score", "200") == 1
+    assert count("GET", "/portfolio/score", "401") == 1
+    assert count("GET", "<unmatched>", "404") == 1
+    assert not any("/no/such/path" in key for key in after)
+
+
+def test_price_cache_counters_match_the_cache(client):
+    client.post("/portfolio/upload", json={"portfolio": PORTFOLIO}, headers=HEADERS)
+    client.get("/portfolio/summary", headers=HEADERS)
+    samples = _samples(client.get("/metrics").text)
+    for event in ("hit", "miss"):
+        assert price_cache.stats[event] > 0
+        assert samples[f'pulse_price_cache_events_total{{event="{event}"}}'] == price_cache.stats[event]
+    assert samples["pulse_price_cache_entries"] == len(price_cache)
+
+
+def test_upstream_errors_are_counted(client, fake_chart, monkeypatch):
+    def handle(request):
+        if request.url.path.endswith("/ZZDOWN"):
+            return httpx.Response(503)
+        return fake_chart.handle(request)
+
+    monkeypatch.setattr(yahoo_client.pool, "transport", httpx.MockTransport(handle))
+    monkeypatch.setattr(yahoo_client.pool, "_client", None)
+    portfolio = [{"ticker": "VTI", "weight": 50}, {"ticker": "ZZDOWN", "weight": 25}, {"ticker": "ZZUP", "weight": 25}]
+    client.post("/portfolio/upload", json={"portfolio": portfolio}, headers=HEADERS)
+    before = _samples(client.get("/metrics").text)
+    # The failed download degrades to the no-data fallbacks.
+    assert client.get("/portfolio/summary", headers=HEADERS).status_code == 200
+    after = _samples(client.get("/metrics").text)
+
+    def delta(outcome):
+        key = f'pulse_upstream_requests_total{{upstream="yahoo_chart",outcome="{outcome}"}}'
+        return after.get(key, 0) - before.get(key, 0)
+
+    assert delta("error") == 1
+    assert delta("ok") == len(fake_chart.calls)
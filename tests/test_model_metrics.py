@@ -0,0 +1,47 @@
+import json
+
+from app.services import model_metrics as model_metrics_module
+from app.services.model_metrics import ModelMetricsCache
+from app.services.model_registry import model_registry
+
+
+def test_snapshot_round_trips_into_a_new_worker(tmp_path):
+    path = tmp_path / "model_metrics.json"
+    first = ModelMetricsCache(path, refresh_seconds=900)
+    assert first.refresh(force=True)
+    assert set(first.get()) == set(model_registry.keys)
+
+    second = ModelMetricsCache(path, refresh_seconds=900)
+    assert second.load_snapshot()
+    assert second.get() == first.get()
+    assert second.digest == first.digest
+
+
+def test_snapshot_for_other_models_is_ignored(tmp_path):
+    path = tmp_path / "model_metrics.json"
+    ModelMetricsCache(path, refresh_seconds=900).refresh(force=True)
+    payload = json.loads(path.read_text())
+    path.write_text(json.dumps({**payload, "models_fingerprint": "other"}))
+    assert not ModelMetricsCache(path, refresh_seconds=900).load_snapshot()
+
+
+def test_defaults_from_failed_downloads_are_not_snapshotted(tmp_path, monkeypatch):
+    path = tmp_path / "model_metrics.json"
+    cache = ModelMetricsCache(path, refresh_seconds=900)
+    # TLT's download failed, so the models holding it got default metrics.
+    priced = model_metrics_module.price_digests
+
+    def without_tlt(tickers):
+        return {ticker: digest for ticker, digest in priced(tickers).items() if ticker != "TLT"}
+
+    monkeypatch.setattr(model_metrics_module, "price_digests", without_tlt)
+    assert cache.refresh()
+    assert set(cache.get()) == set(model_registry.keys)
+    assert not path.exists()
+    # Served, but recomputed on the next tick rather than kept.
+    assert cache.refresh()
+
+    monkeypatch.setattr(model_metrics_module, "price_digests", priced)
+    assert cache.refresh()
+    assert ModelMetricsCache(path, refresh_seconds=900).load_snapshot()
+    assert not cache.refresh()
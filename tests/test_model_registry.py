@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from app.api.scoring import model_tracking_error
+from app.services.model_registry import model_registry
+
+EXTRA = "three_fund"
+HEADERS = {"Authorization": "Bearer token-9"}
+PORTFOLIO = [{"ticker": "VTI", "amount": 5000}, {"ticker": "VXUS", "amount": 3000}, {"ticker": "TLT", "amount": 2000}]
+
+
+@pytest.fixture
+def uploaded(client):
+    response = client.post("/portfolio/upload", json={"portfolio": PORTFOLIO}, headers=HEADERS)
+    assert response.status_code == 200
+    return client
+
+
+def test_models_from_model_dir_are_registered():
+    assert EXTRA in model_registry.keys
+    assert model_registry.names[EXTRA] == "Three Fund"
+
+
+def test_nearest_model_can_be_a_registered_model():
+    assert model_registry.nearest({"VTI": 0.5, "VXUS": 0.3, "BND": 0.2}) == [(EXTRA, 0.0)]
+
+
+def test_tracking_errors_match_model_tracking_error():
+    rng = random.Random(97)
+    tickers = [*model_registry.tickers, "ZZZZ"]
+    portfolios = [{"VTI": 0.15625, "IAU": 0.21875, "ZZZZ": 0.625}]
+    for _ in range(5000):
+        amounts = {ticker: rng.choice([100, 250, 1250, 2500, 5000]) * rng.randint(1, 8) for ticker in rng.sample(tickers, rng.randint(1, 6))}
+        portfolios.append({ticker: amount / sum(amounts.values()) for ticker, amount in amounts.items()})
+    for weights in portfolios:
+        errors = dict(zip(model_registry.keys, model_registry.tracking_errors(weights).tolist()))
+        assert errors == model_tracking_error(weights), weights
+
+
+def test_score_batch_tracks_every_registered_model(client):
+    body = {"portfolios": [{"id": "a", "portfolio": PORTFOLIO}]}
+    response = client.post("/portfolio/score-batch", json=body, headers=HEADERS)
+    assert response.status_code == 200
+    assert set(response.json()["results"][0]["tracking_error"]) == set(model_registry.keys)
+
+
+def test_holdings_edits_track_every_registered_model(uploaded):
+    response = uploaded.patch("/portfolio/holdings", json={"changes": [{"ticker": "BND", "amount": 1000}]}, headers=HEADERS)
+    assert response.status_code == 200
+    assert set(response.json()["tracking_error"]) == set(model_registry.keys)
+
+
+def test_history_backtest_and_simulation_cover_every_registered_model(uploaded):
+    history = uploaded.get("/portfolio/score-history", headers=HEADERS).json()
+    assert all(set(point["tracking_error"]) == set(model_registry.keys) for point in history["points"])
+    backtest = uploaded.get("/portfolio/backtest?points=10", headers=HEADERS).json()
+    assert {curve["key"]: curve["name"] for curve in backtest["curves"]}[EXTRA] == "Three Fund"
+    simulation = uploaded.get("/portfolio/simulation?paths=100&horizon_days=20", headers=HEADERS).json()
+    assert {outcome["key"] for outcome in simulation["outcomes"]} == {"user", *model_registry.keys}
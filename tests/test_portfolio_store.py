@@ -0,0 +1,43 @@
+import threading
+
+import pytest
+
+from app.services.portfolio_store import SQLitePortfolioStore
+
+
+def _add_one(weights, total_value):
+    return weights, total_value + 1
+
+
+def test_concurrent_updates_are_not_lost(tmp_path):
+    path = tmp_path / "portfolios.db"
+    SQLitePortfolioStore(path).set_portfolio("user-1", {"VTI": 1.0}, 0.0)
+
+    def worker():
+        # A store per thread stands in for separate worker processes.
+        store = SQLitePortfolioStore(path)
+        for _ in range(25):
+            store.update_portfolio("user-1", _add_one)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert SQLitePortfolioStore(path).get_record("user-1") == ({"VTI": 1.0}, 100.0)
+
+
+def test_failed_update_leaves_the_portfolio_unchanged(tmp_path):
+    store = SQLitePortfolioStore(tmp_path / "portfolios.db")
+    store.set_portfolio("user-1", {"VTI": 1.0}, 10.0)
+
+    def reject(weights, total_value):
+        raise ValueError("Portfolio must have a positive total value.")
+
+    with pytest.raises(ValueError):
+        store.update_portfolio("user-1", reject)
+    with pytest.raises(KeyError):
+        store.update_portfolio("user-2", _add_one)
+    assert store.get_record("user-1") == ({"VTI": 1.0}, 10.0)
+    store.update_portfolio("user-1", _add_one)
+    assert store.get_total_value("user-1") == 11.0
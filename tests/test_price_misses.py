@@ -0,0 +1,58 @@
+from app.api import portfolio
+from app.services.data_loader import fetch_price_histories, price_cache
+
+HEADERS = {"Authorization": "Bearer token-10"}
+PORTFOLIO = [{"ticker": "VTI", "weight": 70}, {"ticker": "DELISTEDA", "weight": 30}]
+
+
+def test_tickers_without_data_are_not_requested_again(fake_yfinance):
+    assert fetch_price_histories(["DELISTEDB", "ZZMA"]).keys() == {"ZZMA"}
+    assert fetch_price_histories(["DELISTEDB", "ZZMA"]).keys() == {"ZZMA"}
+    assert [sorted(call) for call in fake_yfinance.calls] == [["DELISTEDB", "ZZMA"]]
+
+
+def test_score_polls_do_not_retry_unlisted_tickers(client, fake_chart):
+    client.post("/portfolio/upload", json={"portfolio": PORTFOLIO}, headers=HEADERS)
+    first = client.get("/portfolio/score", headers=HEADERS)
+    assert first.status_code == 200
+    assert fake_chart.calls.count("DELISTEDA") == 1
+    again = client.get("/portfolio/score", headers=HEADERS)
+    assert again.status_code == 200
+    assert again.headers["etag"] == first.headers["etag"]
+    assert fake_chart.calls.count("DELISTEDA") == 1
+
+
+def test_not_modified_responses_skip_the_prefetch(client, fake_chart, monkeypatch):
+    client.post("/portfolio/upload", json={"portfolio": PORTFOLIO}, headers=HEADERS)
+    client.get("/portfolio/summary", headers=HEADERS)
+    prefetches = []
+
+    async def prefetch(tickers):
+        prefetches.append(tickers)
+
+    monkeypatch.setattr(portfolio, "_prefetch_metrics", prefetch)
+    monkeypatch.setattr(portfolio, "_prefetch_prices", prefetch)
+    fake_chart.calls.clear()
+    for path in ("/portfolio/score", "/portfolio/summary", "/portfolio/model-comparison"):
+        etag = client.get(path, headers=HEADERS).headers["etag"]
+        prefetches.clear()
+        response = client.get(path, headers={**HEADERS, "If-None-Match": etag})
+        assert response.status_code == 304
+        assert prefetches == []
+    assert fake_chart.calls == []
+
+
+def test_async_loads_and_cache_only_reads_count_as_cache_events(client, fake_chart):
+    portfolio_ = [{"ticker": "ZZASYNC", "weight": 60}, {"ticker": "DELISTEDC", "weight": 40}]
+    client.post("/portfolio/upload", json={"portfolio": portfolio_}, headers=HEADERS)
+    before = dict(price_cache.stats)
+    # The risk model behind the summary reads histories after the prefetch.
+    assert client.get("/portfolio/summary", headers=HEADERS).status_code == 200
+    assert fake_chart.calls.count("ZZASYNC") == 1
+    # Every ticker the request downloaded was a miss; the delisted one failed.
+    assert price_cache.stats["miss"] - before["miss"] == len(fake_chart.calls)
+    assert price_cache.stats["load_error"] - before["load_error"] == 1
+    assert price_cache.stats["hit"] > before["hit"]
+    exposition = client.get("/metrics").text
+    assert f'pulse_price_cache_events_total{{event="miss"}} {price_cache.stats["miss"]}' in exposition
+    assert f'pulse_price_cache_events_total{{event="hit"}} {price_cache.stats["hit"]}' in exposition
@@ -0,0 +1,36 @@
+from app.config import GLOBAL_CONFIG
+from app.services.data_loader import price_cache
+from app.services.price_refresh import PriceRefresher
+from benchmarks.fakes import synthetic_closes
+
+HEADERS = {"Authorization": "Bearer token-12"}
+PORTFOLIO = [{"ticker": "ZZPOLLED", "weight": 100}]
+YEARS = GLOBAL_CONFIG.lookback_years
+
+
+class _Clock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_polled_tickers_are_not_dropped_as_idle(client, monkeypatch):
+    clock = _Clock(price_cache._clock())
+    monkeypatch.setattr(price_cache, "_clock", clock)
+    refresher = PriceRefresher(interval_seconds=60, idle_seconds=24 * 3600)
+    client.post("/portfolio/upload", json={"portfolio": PORTFOLIO}, headers=HEADERS)
+    price_cache.put(("ZZUNPOLLED", YEARS), synthetic_closes("ZZUNPOLLED", "2020-01-01", "2021-01-01"))
+    etags = {}
+    for _ in range(8):
+        clock.now += 6 * 3600
+        for path in ("/portfolio/score", "/portfolio/model-comparison"):
+            headers = {**HEADERS, "If-None-Match": etags[path]} if path in etags else HEADERS
+            response = client.get(path, headers=headers)
+            assert response.status_code in (200, 304)
+            etags[path] = response.headers["etag"]
+        refresher.run_once()
+    cached = price_cache.keys()
+    assert ("ZZPOLLED", YEARS) in cached
+    assert ("ZZUNPOLLED", YEARS) not in cached
@@ -0,0 +1,70 @@
+import datetime as dt
+
+from app.config import GLOBAL_CONFIG
+from app.services.data_loader import fetch_price_histories, price_cache
+from app.services.price_store import OVERLAP_BARS, PriceStore
+from benchmarks.fakes import synthetic_closes
+
+START = dt.date(2020, 1, 1)
+END = dt.date(2021, 1, 5)
+
+
+class _Downloader:
+    """Synthetic closes, optionally rescaled, recording each requested window."""
+
+    def __init__(self, scale: float = 1.0) -> None:
+        self.scale = scale
+        self.calls = []
+
+    def __call__(self, ticker, start, end):
+        self.calls.append((ticker, start, end))
+        return synthetic_closes(ticker, start, end) * self.scale
+
+
+def test_stored_history_is_read_without_downloading(tmp_path):
+    downloader = _Downloader()
+    store = PriceStore(tmp_path, downloader)
+    first = store.get_history("VTI", START, END)
+    assert downloader.calls == [("VTI", START, END)]
+    again = PriceStore(tmp_path, downloader).get_history("VTI", START, END)
+    assert len(downloader.calls) == 1
+    assert again.equals(first)
+
+
+def test_later_reads_fetch_only_the_overlap_and_new_days(tmp_path):
+    downloader = _Downloader()
+    store = PriceStore(tmp_path, downloader)
+    stored = store.get_history("VTI", START, END)
+    later = END + dt.timedelta(days=7)
+    series = store.get_history("VTI", START, later)
+    _, fetch_from, _ = downloader.calls[-1]
+    assert fetch_from == stored.index[-OVERLAP_BARS].date()
+    assert series.index[-1] > stored.index[-1]
+    assert series.equals(synthetic_closes("VTI", START, later))
+
+
+def test_rebased_closes_rescale_the_stored_history(tmp_path):
+    downloader = _Downloader()
+    store = PriceStore(tmp_path, downloader)
+    store.get_history("VTI", START, END)
+    downloader.scale = 0.5
+    series = store.get_history("VTI", START, END + dt.timedelta(days=7))
+    expected = synthetic_closes("VTI", START, END + dt.timedelta(days=7)) * 0.5
+    assert len(downloader.calls) == 2
+    assert ((series - expected).abs() < 1e-9).all()
+
+
+def test_fetch_price_histories_batches_misses_and_then_hits_the_cache(fake_yfinance):
+    tickers = ["ZZSA", "ZZSB"]
+    histories = fetch_price_histories(tickers)
+    assert sorted(histories) == tickers
+    assert [sorted(call) for call in fake_yfinance.calls] == [tickers]
+    assert all(price_cache.get((ticker, GLOBAL_CONFIG.lookback_years)) is not None for ticker in tickers)
+    again = fetch_price_histories(tickers)
+    assert len(fake_yfinance.calls) == 1
+    assert all(again[ticker] is histories[ticker] for ticker in tickers)
+
+
+def test_cached_only_lookups_never_download(fake_yfinance):
+    assert fetch_price_histories(["ZZSC"], cached_only=True) == {}
+    assert fake_yfinance.calls == []
@@ -0,0 +1,38 @@
+import random
+
+from app.services.model_registry import model_registry
+from app.services.rebalance import rank_target_models, registry_tracking_errors
+from app.utils.math_ops import normalize_portfolio
+
+HEADERS = {"Authorization": "Bearer token-8"}
+
+
+def _portfolio(seed: int):
+    rng = random.Random(seed)
+    tickers = rng.sample(model_registry.tickers + ["AAPL", "MSFT", "ZZOTHER"], 5)
+    return normalize_portfolio([(ticker, rng.uniform(1, 100)) for ticker in tickers])
+
+
+def test_ranking_precomputed_tracking_errors_matches_nearest():
+    for seed in range(50):
+        weights = _portfolio(seed)
+        tracking = registry_tracking_errors(weights)
+        assert rank_target_models(weights, 3, tracking) == rank_target_models(weights, 3)
+
+
+def test_summary_computes_tracking_errors_once(client, monkeypatch):
+    calls = []
+    tracking_errors = model_registry.tracking_errors
+
+    def counted(weights):
+        calls.append(weights)
+        return tracking_errors(weights)
+
+    portfolio = [{"ticker": "VTI", "weight": 60}, {"ticker": "TLT", "weight": 40}]
+    client.post("/portfolio/upload", json={"portfolio": portfolio}, headers=HEADERS)
+    monkeypatch.setattr(model_registry, "tracking_errors", counted)
+    response = client.get("/portfolio/summary", headers=HEADERS)
+    assert response.status_code == 200
+    assert len(calls) == 1
+    target, _ = rank_target_models({"VTI": 0.6, "TLT": 0.4})[0]
+    assert response.json()["rebalance"]["target_model"] == model_registry.names[target]
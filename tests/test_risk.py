@@ -0,0 +1,74 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from app.config import GLOBAL_CONFIG
+from app.services.backtest import run_backtests
+from app.services.data_loader import load_price_matrix, prefetch_histories, price_cache
+from app.services.risk import RiskEngine, build_risk_model
+from app.services.simulation import portfolio_returns
+from benchmarks.fakes import synthetic_closes
+
+# Trades every calendar day, like a crypto pair.
+DAILY = "ZZDAILY"
+
+
+def _cache_daily_ticker() -> None:
+    closes = synthetic_closes(DAILY, "2005-01-01", "2030-01-01")
+    days = pd.date_range(closes.index[0], periods=len(closes), freq="D")
+    series = pd.Series(closes.to_numpy(), index=days)
+    price_cache.put((DAILY, GLOBAL_CONFIG.lookback_years), series[series.index <= pd.Timestamp.now()])
+
+
+def _volatility(tickers, ticker):
+    matrix = load_price_matrix(tickers)
+    model = build_risk_model(matrix, tickers, 0)
+    column = matrix.index[ticker]
+    return model.cov[column, column] ** 0.5, model.mean[column]
+
+
+def test_risk_statistics_do_not_depend_on_other_tickers_calendars():
+    _cache_daily_ticker()
+    alone = _volatility(["VTI"], "VTI")
+    with_daily = _volatility(["VTI", DAILY], "VTI")
+    np.testing.assert_allclose(with_daily, alone)
+
+
+def test_backtest_curves_skip_dates_only_other_tickers_traded():
+    _cache_daily_ticker()
+    matrix = load_price_matrix(["VTI", "TLT", DAILY])
+    result = run_backtests({"user": {"VTI": 0.6, "TLT": 0.4}}, matrix)
+    weekdays = (result.dates.astype("datetime64[D]").astype("int64") + 3) % 7
+    assert len(result.dates) > 0
+    assert (weekdays < 5).all()
+
+
+def test_simulated_portfolios_keep_their_own_trading_days():
+    _cache_daily_ticker()
+    models = {"model": {"VTI": 0.6, "TLT": 0.4}}
+    _, (alone,) = portfolio_returns(models)
+    keys, series = portfolio_returns({"user": {DAILY: 1.0}, **models})
+    assert keys == ["user", "model"]
+    np.testing.assert_allclose(series[1], alone)
+    assert len(series[0]) > len(series[1])
+
+
+def test_cache_only_models_claim_only_the_tickers_they_read():
+    key = ("VTI", GLOBAL_CONFIG.lookback_years)
+
+    async def scenario():
+        await prefetch_histories(["VTI", "ZZEVICTED", "DELISTEDC"])
+        vti = price_cache.get(key)
+        # Everything prefetched is evicted again, except VTI.
+        price_cache.drop_idle(-1)
+        price_cache.put(key, vti)
+        engine = RiskEngine()
+        model = engine.model_for(["VTI", "ZZEVICTED", "DELISTEDC"])
+        return model, engine.model_for(["VTI", "DELISTEDC"])
+
+    model, again = asyncio.run(scenario())
+    assert "VTI" in model.requested
+    assert not {"ZZEVICTED", "DELISTEDC"} & model.requested
+    # A ticker that just came back without data does not force a rebuild.
+    assert again is model
@@ -0,0 +1,52 @@
+import numpy as np
+
+from app.api.scoring import (
+    assemble_score,
+    build_asset_class_distribution,
+    model_tracking_error,
+    resilience_score,
+    return_efficiency_score,
+)
+from app.services.backtest import drifted_weights
+from app.services.risk import risk_engine
+from app.services.ticker_metrics import TickerMetricsTable, ticker_metrics
+
+HEADERS = {"Authorization": "Bearer token-16"}
+PORTFOLIO = [{"ticker": "VTI", "weight": 50}, {"ticker": "BND", "weight": 30}, {"ticker": "IAU", "weight": 20}]
+WEIGHTS = {"VTI": 0.5, "BND": 0.3, "IAU": 0.2}
+
+
+def _asset_mix_score(weights):
+    # pulse_score with no trailing metrics for any ticker.
+    table = TickerMetricsTable()
+    distribution = build_asset_class_distribution(weights)
+    return assemble_score(
+        distribution,
+        resilience_score(weights, table),
+        return_efficiency_score(distribution, weights, table),
+        max(weights.items(), key=lambda item: item[1]),
+    )
+
+
+def test_history_scores_buy_and_hold_drift_each_quarter(client):
+    assert client.post("/portfolio/upload", json={"portfolio": PORTFOLIO}, headers=HEADERS).status_code == 200
+    response = client.get("/portfolio/score-history", headers=HEADERS)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["frequency"] == "quarterly"
+    dates, tickers, rows = drifted_weights(WEIGHTS, risk_engine.model_for(WEIGHTS).matrix, "quarterly")
+    assert [point["date"] for point in body["points"]] == [str(date) for date in dates]
+    quarters = dates.astype("datetime64[M]").astype("int64") // 3
+    assert (np.diff(quarters) == 1).all()
+
+    # Today's trailing metrics exist but would leak later prices into past
+    # points, so every point uses the asset-mix scores.
+    assert set(WEIGHTS) <= set(ticker_metrics.rows)
+    assert rows[0].tolist() == [WEIGHTS[ticker] for ticker in tickers]
+    for point, row in zip(body["points"], rows):
+        weights = dict(zip(tickers, row.tolist()))
+        total, breakdown, *_ = _asset_mix_score(weights)
+        assert point["pulse_score"] == total
+        assert point["breakdown"] == breakdown
+        assert point["tracking_error"] == model_tracking_error(weights)
+    assert len({point["pulse_score"] for point in body["points"]}) > 1
@@ -0,0 +1,85 @@
+import time
+
+import numpy as np
+
+from app.services import data_loader
+from app.services.data_loader import fetch_price_histories, price_digests, shared_matrix
+from app.services.risk import RiskEngine
+from app.services.shared_matrix import KEEP_GENERATIONS, SharedMatrixStore
+
+DATES = np.arange("2024-01-01", "2024-01-06", dtype="datetime64[D]")
+PRICES = np.array([[100.0, 50.0], [101.0, 51.0], [102.0, np.nan], [103.0, 52.0], [104.0, 53.0]])
+
+
+def _publish(store, requested, prices=PRICES, tickers=("AAA", "BBB"), digests=None, expires_at=None):
+    returns = prices[1:] / prices[:-1] - 1
+    return store.publish(
+        frozenset(requested),
+        DATES[: len(prices)],
+        tickers,
+        prices,
+        returns,
+        time.time() + 3600 if expires_at is None else expires_at,
+        digests if digests is not None else {ticker: f"digest-{ticker}" for ticker in tickers},
+    )
+
+
+def test_published_generation_round_trips(tmp_path):
+    store = SharedMatrixStore(tmp_path)
+    published = _publish(store, {"AAA", "BBB"})
+    attached = SharedMatrixStore(tmp_path).current()
+    assert attached.generation == published.generation == 1
+    assert attached.tickers == ("AAA", "BBB")
+    np.testing.assert_array_equal(attached.prices, PRICES)
+    np.testing.assert_array_equal(attached.dates, DATES)
+    assert attached.digests == {"AAA": "digest-AAA", "BBB": "digest-BBB"}
+    assert attached.covers(frozenset({"AAA"}))
+    assert not attached.covers(frozenset({"AAA", "CCC"}))
+    assert not attached.covers(frozenset({"AAA"}), now=time.time() + 7200)
+    assert attached.matches({"AAA": "digest-AAA"})
+    assert not attached.matches({"AAA": "digest-AAA", "BBB": "newer"})
+
+
+def test_generations_advance_and_old_ones_are_pruned(tmp_path):
+    store = SharedMatrixStore(tmp_path, check_interval=0)
+    versions = []
+    for _ in range(5):
+        _publish(store, {"AAA", "BBB"})
+        versions.append(store.generation())
+    assert versions == sorted(set(versions))
+    assert store.current().generation == 5
+    assert len(list(tmp_path.glob("gen-*"))) == KEEP_GENERATIONS
+
+
+def _cached(tickers):
+    histories = fetch_price_histories(tickers)
+    return histories, price_digests(tickers)
+
+
+def test_engine_attaches_only_to_generations_built_from_its_closes():
+    histories, digests = _cached(["VTI", "TLT"])
+    dates = np.array(histories["VTI"].index.values.astype("datetime64[D]"))
+    prices = np.column_stack([histories["VTI"].to_numpy(), histories["TLT"].reindex(histories["VTI"].index).to_numpy()])
+    doubled = prices * 2
+    returns = doubled[1:] / doubled[:-1] - 1
+    expires_at = time.time() + 3600
+    # Another worker's generation with other closes for TLT.
+    stale = {**digests, "TLT": "other-closes"}
+    shared_matrix.publish(frozenset({"VTI", "TLT"}), dates, ("VTI", "TLT"), doubled, returns, expires_at, stale)
+    model = RiskEngine().model_for(["VTI", "TLT"])
+    column = model.matrix.index["TLT"]
+    assert model.matrix.prices[-1, column] == histories["TLT"].iloc[-1]
+    # Built from the same closes: attached as published.
+    shared_matrix.publish(frozenset({"VTI", "TLT"}), dates, ("VTI", "TLT"), doubled, returns, expires_at, digests)
+    model = RiskEngine().model_for(["VTI", "TLT"])
+    assert model.matrix.prices[-1, model.matrix.index["TLT"]] == doubled[-1, 1]
+
+
+def test_tickers_without_data_are_retried_after_their_miss_expires(monkeypatch):
+    engine = RiskEngine()
+    model = engine.model_for(["VTI", "DELISTEDD"])
+    assert "DELISTEDD" not in model.requested
+    assert "DELISTEDD" not in shared_matrix.current().requested
+    assert engine.tickers_to_load(["VTI", "DELISTEDD"]) == frozenset()
+    monkeypatch.setattr(data_loader, "PRICE_MISS_TTL_SECONDS", 0)
+    assert "DELISTEDD" in engine.tickers_to_load(["VTI", "DELISTEDD"])
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from app.services import simulation
+from app.services.simulation import run_simulation, simulate_chunk
+
+HEADERS = {"Authorization": "Bearer token-15"}
+PORTFOLIOS = {"a": {"VTI": 0.6, "BND": 0.4}, "b": {"IAU": 1.0}}
+
+
+def test_process_pool_gives_the_serial_result(monkeypatch):
+    serial = run_simulation(PORTFOLIOS, paths=5000, horizon_days=30, seed=11)
+    monkeypatch.setattr(simulation, "PARALLEL_MIN_PATHS", 1)
+    monkeypatch.setattr(simulation, "SIMULATION_WORKERS", 2)
+    try:
+        pooled = run_simulation(PORTFOLIOS, paths=5000, horizon_days=30, seed=11)
+    finally:
+        simulation.shutdown_pool()
+    assert pooled == serial
+    assert run_simulation(PORTFOLIOS, paths=5000, horizon_days=30, seed=12) != serial
+
+
+def test_blocks_longer_than_the_horizon_are_cut_to_it():
+    series = np.array([0.1, -0.5, 0.2, 0.0, 0.3, -0.1, 0.05, 0.4])
+    drawdown, terminal = simulate_chunk([series], np.random.SeedSequence(3), paths=200, horizon_days=3, block_days=5)
+    # Each path is one window of 3 days starting where a 5-day block fits.
+    windows = [np.prod(1.0 + series[start:start + 3]) for start in range(len(series) - 5 + 1)]
+    assert terminal.shape == drawdown.shape == (200, 1)
+    assert all(np.isclose(windows, value).any() for value in terminal[:, 0])
+    assert (drawdown <= 0).all() and drawdown.min() == pytest.approx(-0.5)
+
+
+def test_path_day_budget_is_a_422(client, monkeypatch):
+    portfolio = [{"ticker": "VTI", "weight": 60}, {"ticker": "BND", "weight": 40}]
+    client.post("/portfolio/upload", json={"portfolio": portfolio}, headers=HEADERS)
+    monkeypatch.setattr(simulation, "SIMULATION_MAX_PATH_DAYS", 100 * 252)
+    response = client.get("/portfolio/simulation?paths=101&horizon_days=252", headers=HEADERS)
+    assert response.status_code == 422
+    assert "paths x horizon_days" in response.json()["detail"]
+    assert client.get("/portfolio/simulation?paths=100&horizon_days=252", headers=HEADERS).status_code == 200
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from app.services.ticker_metrics import TickerMetricsTable, _RollingState
+
+# Nine years of weekday bars with a crash early on and a new high later.
+DAYS = np.arange(np.datetime64("2015-01-05"), np.datetime64("2024-01-05"), dtype="datetime64[D]")
+DAYS = DAYS[np.is_busday(DAYS)].astype("int64")
+_rng = np.random.default_rng(11)
+_returns = _rng.normal(0.0004, 0.01, len(DAYS))
+_returns[300:340] = -0.01
+PRICES = 100 * np.cumprod(1 + _returns)
+
+
+def _rebuilt(days, prices):
+    return _RollingState(days, prices).metrics()
+
+
+def test_advance_matches_a_rebuild_as_the_window_rolls():
+    end = 6 * 252
+    state = _RollingState(DAYS[:end], PRICES[:end])
+    start, advanced = 0, 0
+    while end < len(DAYS):
+        # Each refresh brings a few new bars and drops old ones at the front.
+        end, start = min(end + 7, len(DAYS)), start + 5
+        days, prices = DAYS[start:end], PRICES[start:end]
+        if state.advance(days, prices) is None:
+            state = _RollingState(days, prices)
+        else:
+            advanced += 1
+        assert state.metrics() == pytest.approx(_rebuilt(days, prices), rel=1e-9, abs=1e-12)
+    assert advanced > 100
+
+
+def test_append_rolls_bars_out_of_the_five_year_window():
+    state = _RollingState(DAYS[:300], PRICES[:300])
+    for chunk in range(300, len(DAYS), 50):
+        state.append(DAYS[chunk:chunk + 50], PRICES[chunk:chunk + 50])
+    # The drawdown covers the full history; the rest only the last five years.
+    assert state.metrics() == pytest.approx(_rebuilt(DAYS, PRICES), rel=1e-9, abs=1e-12)
+    assert state.window[0][0] >= DAYS[-1] - 5 * 365
+
+
+def test_back_adjusted_history_is_rebuilt():
+    table = TickerMetricsTable()
+    dates = DAYS.astype("datetime64[D]")
+    table.update("ZZT", dates[:-10], PRICES[:-10])
+    # A dividend back-adjusts every earlier close, so the last seen bar moves.
+    adjusted = PRICES * 0.98
+    adjusted[-10:] = PRICES[-10:]
+    assert _RollingState(DAYS[:-10], PRICES[:-10]).advance(DAYS, adjusted) is None
+    table.update("ZZT", dates, adjusted)
+    assert table.values[table.rows["ZZT"]] == pytest.approx(_rebuilt(DAYS, adjusted), rel=1e-12)